@@ -0,0 +1,369 @@
+import numpy as np
+
+from yieldSolver import STATS, BRACKET, TOLERANCE, MAX_ITERATIONS
+import kernels
+from conventions import ACT_365, ACT_ACT, dayCountCodes, frequencyCounts, yearFractions
+
+
+
+#batchYTM is a utility module.
+#
+#It solves for the YTM of many (bond, date) pairs at once, rather than one bond at a time like bond.calcYTM.
+#
+#Each (coupon, maturity, settlement date, clean price) row is laid out as one row of a padded cash-flow matrix:
+#	-the coupon flows sit in the first columns (padded with zeros up to the longest bond),
+#	-the notional sits in the last column.
+#Each row can have its own coupon frequency and day count convention (see conventions): they only change the
+#amounts and times that are written into the matrix, so a universe with mixed conventions is solved in the same batch.
+#By default, coupons are semi-annual and times are ACT/365.
+#Newton's method is then applied to every row at once using NumPy, and rows that have converged are masked out.
+#Rows where Newton's method fails are solved by bisection instead (as in yieldSolver), and every solve is recorded in a solverStats object.
+#
+#The results match bond.calcYTM to within its tolerance of 0.0000001.
+#With the numba backend (see kernels), each row is solved by a compiled loop on its year fractions instead, without building
+#the cash-flow matrix, with results matching the NumPy path to within kernels.RTOL.
+#
+#With risk=True, the risk measures are calculated from the same cash-flow matrix at the converged yields:
+#the DCF P, the time-weighted DCF (= -dP/dr), and the time-squared-weighted DCF (= d2P/dr2). The yields are
+#continuously compounded (as in bond.calcYTM), so the modified duration equals the Macaulay duration.
+
+
+
+def couponDates(maturities, dates, frequencies=2):
+	"""
+	Given arrays of maturity dates and current dates, determine the date of the
+	last (i.e. most recent) and next coupon payments, together with the number of
+	coupon payments remaining until maturity.
+
+	Coupons are assumed to fall on the maturity schedule (every 12/frequency months),
+	exactly as in bond.lastCouponDate and bond.nextCouponDate. Raises ValueError if a frequency doesn't divide 12 months evenly.
+
+	Parameters
+	----------
+	maturities : array_like of datetime64[D]
+		The maturity dates
+	dates : array_like of datetime64[D]
+		The current dates
+	frequencies : array_like of int or str
+		The number of coupons per year, or its name (2, semi-annual, by default, see conventions.frequencyCounts)
+
+	Returns
+	-------
+	tuple of numpy.ndarray
+		(last coupon dates, next coupon dates, number of coupons remaining)
+	"""
+	maturities = np.asarray(maturities, dtype='datetime64[D]')
+	dates = np.asarray(dates, dtype='datetime64[D]')
+	maturities, dates = np.broadcast_arrays(maturities, dates)
+	months = 12 // frequencyCounts(frequencies)		#the months between coupons
+
+	maturityMonths = maturities.astype('datetime64[M]')
+	maturityDays = maturities - maturityMonths.astype('datetime64[D]')
+	monthsToMaturity = (maturityMonths - dates.astype('datetime64[M]')).astype(np.int64)
+
+	#Walk back k coupon periods from maturity. The month of the candidate date is never before
+	#the current month, so at most one extra step is needed when the candidate falls after the current date.
+	k = np.maximum(monthsToMaturity // months, 0)
+	lastCoupon = _shiftMonths(maturityMonths, maturityDays, -months*k)
+	k = np.where(lastCoupon > dates, k + 1, k)
+	lastCoupon = _shiftMonths(maturityMonths, maturityDays, -months*k)
+	nextCoupon = _shiftMonths(maturityMonths, maturityDays, -months*(k - 1))
+
+	return lastCoupon, nextCoupon, k
+
+
+#Shift a (month, day-of-month offset) date by a number of months.
+#The day is clamped to the end of a shorter month (e.g. the 31st of August shifted by 6 months is the 28th of February).
+def _shiftMonths(months, days, shift):
+	shifted = months + shift
+	start = shifted.astype('datetime64[D]')
+	monthLength = ((shifted + 1).astype('datetime64[D]') - start).astype(np.int64)
+	return start + np.minimum(days.astype(np.int64), monthLength - 1)
+
+
+
+def cashFlowTerms(maturities, dates, frequencies=2, dayCounts=ACT_365):
+	"""
+	Given arrays of maturity dates and current dates, determine the year fractions that place each bond's
+	cash flows in time, under each bond's coupon frequency and day count convention.
+
+	Under ACT/ACT, every coupon period is exactly 1/frequency years long, so the maturity is (coupons - 1)/frequency
+	years after the next coupon. Under the other conventions, each time is the year fraction from the current date.
+	Raises ValueError for frequencies that don't divide 12 months evenly and unknown day count conventions.
+
+	Parameters
+	----------
+	maturities : array_like of datetime64[D]
+		The maturity dates
+	dates : array_like of datetime64[D]
+		The current dates
+	frequencies : array_like of int or str
+		The number of coupons per year, or its name (see conventions.frequencyCounts)
+	dayCounts : array_like of int or str
+		The day count codes, or their names (see conventions.dayCountCodes)
+
+	Returns
+	-------
+	tuple of numpy.ndarray
+		(year fraction since the last coupon, times in years until the next coupon and until maturity,
+		number of coupons remaining, coupons per year), all with the broadcast shape of the inputs
+	"""
+	maturities = np.asarray(maturities, dtype='datetime64[D]')
+	dates = np.asarray(dates, dtype='datetime64[D]')
+	frequencies, dayCounts = frequencyCounts(frequencies), dayCountCodes(dayCounts)
+	lastCoupon, nextCoupon, numCoupons = couponDates(maturities, dates, frequencies)
+	maturities, dates, frequencies, dayCounts = np.broadcast_arrays(maturities, dates, frequencies, dayCounts)
+
+	accrual = yearFractions(lastCoupon, dates, dayCounts, lastCoupon, nextCoupon, frequencies)
+	timeToCoupon = yearFractions(dates, nextCoupon, dayCounts, lastCoupon, nextCoupon, frequencies)
+	timeToMaturity = yearFractions(dates, maturities, dayCounts, lastCoupon, nextCoupon, frequencies)
+	isActual = dayCounts == ACT_ACT
+	if isActual.any():
+		timeToMaturity = np.where(isActual, timeToCoupon + (numCoupons - 1)/frequencies, timeToMaturity)
+	return accrual, timeToCoupon, timeToMaturity, numCoupons, frequencies
+
+
+
+def cashFlowMatrix(coupons, maturities, dates, frequencies=2, dayCounts=ACT_365):
+	"""
+	Build the padded cash-flow matrix for an array of bonds on an array of dates.
+
+	Parameters
+	----------
+	coupons : array_like
+		The coupon rates
+	maturities : array_like of datetime64[D]
+		The maturity dates
+	dates : array_like of datetime64[D]
+		The current dates
+	frequencies : array_like of int
+		The number of coupons per year (2, semi-annual, by default)
+	dayCounts : array_like of int
+		The day count codes (ACT/365 by default, see conventions.DAY_COUNTS)
+
+	Returns
+	-------
+	tuple of numpy.ndarray
+		(cash flows, times in years until each cash flow, accrued interest)
+		The cash flows and times are 2D with one row per (bond, date) pair,
+		the accrued interest is 1D.
+	"""
+	coupons = np.asarray(coupons, dtype=float)
+	accrual, timeToCoupon, timeToMaturity, numCoupons, frequencies = cashFlowTerms(maturities, dates, frequencies, dayCounts)
+	coupons = np.broadcast_to(coupons, accrual.shape)
+	accruedInterest = accrual*coupons
+
+	#One column per coupon, plus a final column for the notional
+	width = int(numCoupons.max(initial=0)) + 1
+	steps = np.arange(width - 1)
+	isCoupon = steps < numCoupons[:, None]
+
+	flows = np.zeros((len(coupons), width))
+	times = np.zeros((len(coupons), width))
+	flows[:, :-1] = np.where(isCoupon, (coupons/frequencies)[:, None], 0)
+	np.multiply((1/frequencies)[:, None], steps, out=times[:, :-1])	#each row's coupons are 1/frequency years apart
+	times[:, :-1] += timeToCoupon[:, None]
+	flows[:, -1] = 100
+	times[:, -1] = timeToMaturity
+
+	return flows, times, accruedInterest
+
+
+
+RISK_MEASURES = ('ytm', 'dirtyPrice', 'accruedInterest', 'macaulayDuration', 'modifiedDuration', 'convexity', 'dv01')
+
+
+
+def calcYTMBatch(coupons, maturities, dates, cleanPrices, initialGuess=0, maxIterations=MAX_ITERATIONS, stats=None, chunkSize=2000, risk=False,
+		frequencies=2, dayCounts=ACT_365):
+	"""
+	Solve for the YTM of every (coupon, maturity, date, clean price) combination at once.
+
+	The inputs are broadcast against each other, so a universe of bonds priced over a grid of dates
+	can be passed as column vectors of bond terms and a row vector of dates.
+
+	Parameters
+	----------
+	coupons : array_like
+		The coupon rates
+	maturities : array_like of datetime64[D]
+		The maturity dates
+	dates : array_like of datetime64[D]
+		The dates of the clean prices
+	cleanPrices : array_like
+		The clean prices
+	initialGuess : array_like
+		The initial guess(es) for the yield, e.g. the previous day's YTMs (NaN guesses are replaced by 0)
+	maxIterations : int
+		The largest number of iterations of Newton's method (and of the bisection fallback)
+	stats : solverStats
+		Where to record the solves (by default, yieldSolver.STATS)
+	chunkSize : int
+		The number of rows of the cash-flow matrix to solve at a time (bounds memory use, and a few thousand rows keep
+		each chunk's temporary arrays in the CPU cache, which is several times faster than larger chunks)
+	risk : bool
+		Whether to also calculate the risk measures at the converged yields
+	frequencies : array_like of int or str
+		The number of coupons per year, or its name (2, semi-annual, by default, see conventions.frequencyCounts)
+	dayCounts : array_like of int or str
+		The day count codes, or their names (ACT/365 by default, see conventions.dayCountCodes)
+
+	Returns
+	-------
+	numpy.ndarray or dict
+		The YTMs, with the broadcast shape of the inputs.
+		Entries that no yield could be found for are NaN.
+		With risk=True, a dict of arrays with the broadcast shape of the inputs, with the keys (see RISK_MEASURES):
+			'ytm', 'dirtyPrice', 'accruedInterest',
+			'macaulayDuration', 'modifiedDuration' (in years), 'convexity' (in years squared),
+			'dv01' (the change in dirty price per 100 notional for a 1 basis point drop in yield)
+	"""
+	stats = stats if stats is not None else STATS
+	coupons, maturities, dates, cleanPrices, initialGuess, frequencies, dayCounts = np.broadcast_arrays(
+		np.asarray(coupons, dtype=float),
+		np.asarray(maturities, dtype='datetime64[D]'),
+		np.asarray(dates, dtype='datetime64[D]'),
+		np.asarray(cleanPrices, dtype=float),
+		np.nan_to_num(np.asarray(initialGuess, dtype=float), nan=0, posinf=0, neginf=0),
+		frequencyCounts(frequencies),
+		dayCountCodes(dayCounts),
+	)
+	shape = coupons.shape
+	coupons, maturities, dates, cleanPrices, initialGuess, frequencies, dayCounts = (x.ravel()
+		for x in (coupons, maturities, dates, cleanPrices, initialGuess, frequencies, dayCounts))
+
+	YTMs = np.empty(len(coupons))
+	measures = {name: np.empty(len(coupons)) for name in RISK_MEASURES[1:]} if risk else None
+	kernel = kernels.get('solveYTMs')
+	for start in range(0, len(coupons), chunkSize):
+		rows = slice(start, start + chunkSize)
+		if kernel is None or risk:
+			flows, times, accruedInterest = cashFlowMatrix(coupons[rows], maturities[rows], dates[rows], frequencies[rows], dayCounts[rows])
+			dirtyPrices = cleanPrices[rows] + accruedInterest
+		if kernel is None:
+			price = lambda subset, r: _price(flows[subset], times[subset], r)
+			YTMs[rows] = solveRows(price, dirtyPrices, initialGuess[rows], maxIterations, stats)
+		else:
+			YTMs[rows] = _solveCompiled(kernel, coupons[rows], maturities[rows], dates[rows], cleanPrices[rows], initialGuess[rows],
+				frequencies[rows], dayCounts[rows], maxIterations, stats)
+		if risk:
+			measures['dirtyPrice'][rows] = dirtyPrices
+			measures['accruedInterest'][rows] = accruedInterest
+			_riskMeasures(flows, times, YTMs[rows], measures, rows)
+
+	if not risk:
+		return YTMs.reshape(shape)
+	return {name: array.reshape(shape) for name, array in [('ytm', YTMs)] + list(measures.items())}
+
+
+#Solve some rows with the compiled kernels.solveYTMs (the same solve as solveRows on the rows of the cash-flow matrix)
+def _solveCompiled(kernel, coupons, maturities, dates, cleanPrices, initialGuess, frequencies, dayCounts, maxIterations, stats):
+	accrual, timeToCoupon, timeToMaturity, numCoupons, frequencies = cashFlowTerms(maturities, dates, frequencies, dayCounts)
+	r, iterations, evaluations, isFallback = kernel(np.ascontiguousarray(coupons), accrual*coupons, timeToCoupon, timeToMaturity,
+		numCoupons, np.ascontiguousarray(frequencies), np.ascontiguousarray(cleanPrices), np.ascontiguousarray(initialGuess),
+		maxIterations, TOLERANCE, *BRACKET)
+	stats.recordBatch(iterations, evaluations, isFallback, np.isnan(r))
+	return r
+
+
+#Fill in the durations, convexity, and DV01 of some rows of the cash-flow matrix at their converged yields r
+def _riskMeasures(flows, times, r, measures, rows):
+	with np.errstate(all='ignore'):
+		discounted = flows*np.exp(-r[:, None]*times)
+		DCF = discounted.sum(axis=1)
+		weighted = times*discounted
+		duration = weighted.sum(axis=1)/DCF
+		convexity = (times*weighted).sum(axis=1)/DCF
+	measures['macaulayDuration'][rows] = duration
+	measures['modifiedDuration'][rows] = duration
+	measures['convexity'][rows] = convexity
+	measures['dv01'][rows] = duration*DCF*0.0001
+
+
+def solveRows(price, dirtyPrices, initialGuess, maxIterations=MAX_ITERATIONS, stats=None):
+	"""
+	Solve for the yield of many rows at once with Newton's method, only iterating rows that haven't converged yet.
+	Rows that diverge or don't converge within maxIterations are solved by bisection instead.
+
+	Parameters
+	----------
+	price : function
+		Takes an array of row indices and their yields r, and returns (the DCF, the time-weighted DCF) of each of those rows
+		(e.g. from the padded cash-flow matrix, or from a cashFlows.cashFlowSchedule)
+	dirtyPrices : numpy.ndarray
+		The dirty price of each row
+	initialGuess : numpy.ndarray
+		The initial guess for the yield of each row
+	maxIterations : int
+		The largest number of iterations of Newton's method (and of the bisection fallback)
+	stats : solverStats
+		Where to record the solves (by default, yieldSolver.STATS)
+
+	Returns
+	-------
+	numpy.ndarray
+		The yield of each row (NaN where no yield could be found)
+	"""
+	stats = stats if stats is not None else STATS
+	r = np.array(initialGuess, dtype=float)
+	iterations = np.zeros(len(r), dtype=np.int64)
+	active = np.arange(len(r))
+	diverged = []
+
+	with np.errstate(all='ignore'):
+		for _ in range(maxIterations):
+			DCF, deriv = price(active, r[active])
+			error = dirtyPrices[active] - DCF
+			failed = ~np.isfinite(error) | (deriv == 0)
+			diverged.append(active[failed])
+			unconverged = (np.abs(error) > TOLERANCE) & ~failed
+			active = active[unconverged]
+			if len(active) == 0:
+				break
+			iterations[active] += 1
+			r[active] -= error[unconverged]/deriv[unconverged]
+
+		evaluations = iterations + 1
+		fallback = np.concatenate(diverged + [active])
+		if len(fallback) > 0:
+			r[fallback], bisections = _bisect(price, fallback, dirtyPrices[fallback], maxIterations)
+			iterations[fallback] += bisections
+			evaluations[fallback] += bisections + 2
+
+	isFallback = np.zeros(len(r), dtype=bool)
+	isFallback[fallback] = True
+	stats.recordBatch(iterations, evaluations, isFallback, np.isnan(r))
+	return r
+
+
+#Vectorized bisection on the yields in yieldSolver.BRACKET (widened if needed), for the rows Newton's method couldn't solve
+def _bisect(price, rows, dirtyPrices, maxIterations):
+	lo = np.full(len(dirtyPrices), BRACKET[0])
+	hi = np.full(len(dirtyPrices), BRACKET[1])
+	#The DCF decreases as the yield increases, so the yield is bracketed when DCF(lo) >= dirtyPrice >= DCF(hi)
+	for _ in range(6):
+		lo = np.where(price(rows, lo)[0] < dirtyPrices, 2*lo, lo)
+		hi = np.where(price(rows, hi)[0] > dirtyPrices, 2*hi, hi)
+
+	r = np.full(len(dirtyPrices), np.nan)
+	iterations = np.full(len(dirtyPrices), maxIterations)
+	active = np.arange(len(dirtyPrices))
+	for i in range(maxIterations):
+		mid = (lo[active] + hi[active])/2
+		DCF, _ = price(rows[active], mid)
+		done = np.abs(DCF - dirtyPrices[active]) <= TOLERANCE
+		r[active[done]] = mid[done]
+		iterations[active[done]] = i + 1
+		above = DCF > dirtyPrices[active]
+		lo[active[above]] = mid[above]
+		hi[active[~above]] = mid[~above]
+		active = active[~done]
+		if len(active) == 0:
+			break
+	return r, iterations
+
+
+#The DCF and time-weighted DCF of each row of the cash-flow matrix, at yield r
+def _price(flows, times, r):
+	discounted = flows*np.exp(-r[:, None]*times)
+	return discounted.sum(axis=1), (times*discounted).sum(axis=1)
@@ -0,0 +1,363 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+
+from bondUniverse import bondUniverse
+from spotCurve import spotCurve
+from forwardCurve import forwardCurve
+from businessCalendar import businessCalendar
+from batchYTM import cashFlowMatrix, calcYTMBatch
+import cashFlows
+import kernels
+from scenarios import scenarioEngine, parallelShocks, twistShocks
+from util import calcLogArray, calcPCA
+import yieldSolver
+
+
+
+#benchmark is a script for measuring the performance of the calculations at scale.
+#
+#For each size (bonds x days), it generates a synthetic bond universe priced off a smooth yield curve, and times:
+#	-bond.calcYTM (scalar, on a sample of bonds and days), bond.calcYTMs, and batchYTM.calcYTMBatch,
+#	-cashFlows.cashFlowSchedule (building it, and solving for the YTMs on it, on every day),
+#	-spotCurve.calcPoints (serial, on a sample of days) and spotCurve.calcPointsArray,
+#	-forwardCurve.calcRates,
+#	-scenarios.scenarioEngine.revalue (a book of bonds maturing within the last day's spot curve, see curveBook,
+#	 under SCENARIOS parallel and twist shocks of that curve),
+#	-util.calcLogArray, followed by the covariance matrix and its eigen-decomposition (of the YTMs of the bonds closest to
+#	 each of ANALYTICS_TENORS, as main.py does for the 1-5 year bonds).
+#Each stage records its run time (the fastest of REPEATS runs, after an untimed warm-up run), throughput, peak memory
+#(as traced by tracemalloc, in a separate run of the stage so that the tracing does not slow down the timed runs),
+#and any yield solver counters. calcYTMBatch also records its speedup over the scalar bond.calcYTM
+#(the ratio of their throughputs, 'scalarSpeedup').
+#
+#The stages with compiled kernels (see kernels) are timed once per backend given with --backends,
+#and each backend after the first records its speedup over the first:
+#	python py/benchmark.py --backends numpy numba
+#
+#The results are written as JSON, and can be compared against a previous run to catch regressions:
+#	python py/benchmark.py --sizes 11x10 1000x250 --output bench.json --compare previous.json
+
+
+
+START_DATE = datetime(2022, 1, 10)
+SCALAR_SAMPLE = 500			#number of (bond, day) pairs timed with the scalar bond.calcYTM
+SERIAL_SAMPLE_DAYS = 20		#number of days timed with the serial spotCurve.calcPoints
+COUPON_PERIOD_DAYS = 80		#the boot-strapping history cycles through this many business days (see curveUniverse)
+SCENARIOS = 10000			#number of shocked curves the bonds are revalued under
+ANALYTICS_TENORS = np.arange(1, 31)	#the maturities (in years after the last day) of the bonds used for the PCA
+REPEATS = 3					#number of timed runs of each stage (the fastest is recorded)
+
+
+
+def syntheticUniverse(numBonds, numDays, seed=0):
+	"""
+	Generate a bond universe with random coupons and maturities (1-30 years after the last day),
+	priced off a flat 2% yield curve plus noise on consecutive business days.
+
+	Parameters
+	----------
+	numBonds : int
+	numDays : int
+	seed : int
+
+	Returns
+	-------
+	tuple
+		(bondUniverse, numpy.ndarray of the date of each day)
+	"""
+	rng = np.random.default_rng(seed)
+	dates = businessCalendar().dateRange(START_DATE, numDays)
+	lastMonth = dates[-1].astype('datetime64[M]')
+	maturities = (lastMonth + rng.integers(12, 360, numBonds)).astype('datetime64[D]')
+	coupons = rng.choice([0.25, 0.5, 1.0, 1.5, 2.0, 2.75, 3.5], numBonds)
+	yields = 0.02 + rng.normal(0, 0.001, (numBonds, numDays))
+	return bondUniverse(coupons, maturities - 3650, maturities, _cleanPrices(coupons, maturities, dates, yields)), dates
+
+
+def curveUniverse(numBonds, numDays, seed=0):
+	"""
+	Generate a universe suitable for boot-strapping: one bond maturing every six months,
+	with a history that cycles through the first COUPON_PERIOD_DAYS business days (so that
+	each bond has the same number of coupons left on every day, as spotCurve requires).
+
+	Parameters
+	----------
+	numBonds : int
+	numDays : int
+	seed : int
+
+	Returns
+	-------
+	tuple
+		(bondUniverse, numpy.ndarray of the date of each day)
+	"""
+	rng = np.random.default_rng(seed)
+	period = businessCalendar().dateRange(START_DATE, COUPON_PERIOD_DAYS)
+	dates = period[np.arange(numDays) % COUPON_PERIOD_DAYS]
+	firstMonth = np.datetime64(START_DATE, 'M') + 5
+	maturities = (firstMonth + 6*np.arange(numBonds)).astype('datetime64[D]')
+	coupons = rng.choice([0.25, 0.5, 1.0, 1.5, 2.0], numBonds)
+	yields = 0.01 + 0.002*np.arange(numBonds)[:, None]/2 + rng.normal(0, 0.0005, (numBonds, numDays))
+	return bondUniverse(coupons, maturities - 3650, maturities, _cleanPrices(coupons, maturities, dates, yields)), dates
+
+
+def curveBook(curve, curveDates, numBonds, seed=0):
+	"""
+	Generate a book of bonds with random coupons, maturing on the first of a month between the last day of a
+	curveUniverse and the maturity of its longest bond (so that revaluing it doesn't extrapolate the curve).
+
+	Parameters
+	----------
+	curve : bondUniverse
+	curveDates : numpy.ndarray
+	numBonds : int
+	seed : int
+
+	Returns
+	-------
+	tuple of numpy.ndarray
+		(coupons, maturities)
+	"""
+	rng = np.random.default_rng(seed)
+	firstMonth = curveDates[-1].astype('datetime64[M]') + 1
+	lastMonth = curve.getMaturities().max().astype('datetime64[M]')
+	maturities = (firstMonth + rng.integers(0, (lastMonth - firstMonth).astype(int) + 1, numBonds)).astype('datetime64[D]')
+	coupons = rng.choice([0.25, 0.5, 1.0, 1.5, 2.0, 2.75, 3.5], numBonds)
+	return coupons, maturities
+
+
+#Price every bond on every day at the given yields
+def _cleanPrices(coupons, maturities, dates, yields):
+	numBonds, numDays = yields.shape
+	prices = np.empty((numBonds, numDays))
+	for start in range(0, numBonds, max(1, 200000 // numDays)):
+		rows = slice(start, start + max(1, 200000 // numDays))
+		c, m, d = np.broadcast_arrays(coupons[rows, None], maturities[rows, None], dates[None, :])
+		flows, times, accrued = cashFlowMatrix(c.ravel(), m.ravel(), d.ravel())
+		dirty = (flows*np.exp(-yields[rows].reshape(-1, 1)*times)).sum(axis=1)
+		prices[rows] = (dirty - accrued).reshape(-1, numDays)
+	return prices
+
+
+
+#Time a function, returning its result and a record of the stage.
+#The function is run once untimed (so that JIT compilation, loading Numba's cache, and first-touch allocations aren't timed),
+#then timed REPEATS times (keeping the fastest run), and once more with tracemalloc on to measure its peak memory.
+def _timeStage(name, numBonds, numDays, items, func, backend=None):
+	result = func(yieldSolver.solverStats())
+	seconds = float('inf')
+	for _ in range(REPEATS):
+		runStats = yieldSolver.solverStats()
+		start = time.perf_counter()
+		func(runStats)
+		runSeconds = time.perf_counter() - start
+		if runSeconds < seconds:
+			seconds, stats = runSeconds, runStats
+
+	tracemalloc.start()
+	func(yieldSolver.solverStats())
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+
+	record = {
+		'stage': name,
+		'bonds': numBonds,
+		'days': numDays,
+		'items': items,
+		'seconds': seconds,
+		'repeats': REPEATS,
+		'throughput': items/seconds if seconds > 0 else float('inf'),
+		'peakMemoryMB': peak/2**20,
+	}
+	if stats.solves:
+		record['solver'] = stats.asDict()
+	if backend is not None:
+		record['backend'] = backend
+		name = f'{name} [{backend}]'
+	print(f"{name:36s} {numBonds:>7d} x {numDays:<6d} {seconds:10.4f} s {record['throughput']:14.1f} /s {record['peakMemoryMB']:10.1f} MB")
+	return result, record
+
+
+#Time a stage with each backend, returning the result of the first backend and the records.
+#Each record after the first has the speedup over the first backend, and its result must match the first backend's
+#to within the kernels' tolerance (see kernels.matches).
+def _timeBackends(backends, name, numBonds, numDays, items, func):
+	kernels.setBackend(backends[0])
+	first, record = _timeStage(name, numBonds, numDays, items, func, backends[0])
+	records = [record]
+	for backend in backends[1:]:
+		kernels.setBackend(backend)
+		try:
+			result, record = _timeStage(name, numBonds, numDays, items, func, backend)
+		finally:
+			kernels.setBackend(backends[0])
+		record['speedup'] = records[0]['seconds']/record['seconds']
+		print(f"{'':36s} {record['speedup']:.2f}x faster than {backends[0]}")
+		if not kernels.matches(result, first):
+			raise ValueError(f'{name} [{backend}] does not match {backends[0]} to within kernels.RTOL and kernels.ATOL')
+		records.append(record)
+	return first, records
+
+
+def runBenchmarks(sizes, numCurveBonds=11, backends=('numpy',)):
+	"""
+	Run every stage for every size.
+
+	Parameters
+	----------
+	sizes : list of (int, int)
+		The (bonds, days) sizes
+	numCurveBonds : int
+		The number of bonds used for boot-strapping (one per six months)
+	backends : list of str
+		The backends to time the stages with compiled kernels with (see kernels.BACKENDS)
+
+	Returns
+	-------
+	list of dict
+		One record per stage and size
+	"""
+	records = []
+	for numBonds, numDays in sizes:
+		universe, dates = syntheticUniverse(numBonds, numDays)
+		rng = np.random.default_rng(1)
+		sample = [(int(i), int(j)) for i, j in zip(rng.integers(0, numBonds, SCALAR_SAMPLE), rng.integers(0, numDays, SCALAR_SAMPLE))]
+		sampleDates = dates.astype('datetime64[us]').tolist()
+
+		def scalarYTM(stats):
+			for i, j in sample:
+				universe[i].calcYTM(sampleDates[j], universe.getCleanPrices()[i, j], stats=stats)
+		scalarRecord = _timeStage('bond.calcYTM', numBonds, numDays, len(sample), scalarYTM)[1]
+		records.append(scalarRecord)
+
+		numSerialBonds = min(numBonds, 20)
+		def serialYTMs(stats):
+			for i in range(numSerialBonds):
+				universe[i].calcYTMs(START_DATE, dates=dates, stats=stats)
+		records.append(_timeStage('bond.calcYTMs', numSerialBonds, numDays, numSerialBonds*numDays, serialYTMs)[1])
+
+		ytms, stageRecords = _timeBackends(backends, 'calcYTMBatch', numBonds, numDays, numBonds*numDays,
+			lambda stats: calcYTMBatch(universe.getCoupons()[:, None], universe.getMaturities()[:, None], dates[None, :], universe.getCleanPrices(), stats=stats))
+		for record in stageRecords:
+			record['scalarSpeedup'] = record['throughput']/scalarRecord['throughput']
+			print(f"{'':36s} {record['scalarSpeedup']:.1f}x the throughput of bond.calcYTM")
+		records += stageRecords
+
+		schedules, record = _timeStage('cashFlowSchedule', numBonds, numDays, numDays,
+			lambda stats: [cashFlows.cashFlowSchedule(universe.getCoupons(), universe.getMaturities(), date) for date in dates])
+		records.append(record)
+		records.append(_timeStage('cashFlowSchedule.calcYTMs', numBonds, numDays, numBonds*numDays,
+			lambda stats: [s.calcYTMs(universe.getCleanPrices()[:, j], stats=stats) for j, s in enumerate(schedules)])[1])
+
+		curve, curveDates = curveUniverse(numCurveBonds, numDays)
+		serialDays = min(numDays, SERIAL_SAMPLE_DAYS)
+		def serialSpot(stats):
+			day = curve.withCleanPrices(curve.getCleanPrices()[:, :serialDays])
+			spotCurve(day, START_DATE, dates=curveDates[:serialDays]).calcPoints()
+		records.append(_timeStage('spotCurve.calcPoints', numCurveBonds, serialDays, serialDays, serialSpot)[1])
+
+		spotArray, stageRecords = _timeBackends(backends, 'spotCurve.calcPointsArray', numCurveBonds, numDays, numDays,
+			lambda stats: spotCurve(curve, START_DATE, dates=curveDates).calcPointsArray())
+		records += stageRecords
+
+		def forwards(stats):
+			frwd = forwardCurve(spotArray)
+			frwd.calcRates()
+			return np.array(frwd.getForwardArray())
+		forwardMatrix, record = _timeStage('forwardCurve.calcRates', numCurveBonds, numDays, numDays, forwards)
+		records.append(record)
+
+		engine = scenarioEngine.fromSpotArray(spotArray, curveDates)
+		book = curveBook(curve, curveDates, numBonds)
+		shocks = np.vstack([parallelShocks(np.linspace(-0.02, 0.02, SCENARIOS//2), engine.getTimes()),
+			twistShocks(np.linspace(-0.01, 0.01, SCENARIOS - SCENARIOS//2), engine.getTimes())])
+		records.append(_timeStage('scenarioEngine.revalue', numBonds, SCENARIOS, numBonds*SCENARIOS,
+			lambda stats: engine.revalue(*book, shocks))[1])
+
+		#One bond per tenor (the closest), so the covariance matrix stays small at any number of bonds
+		targets = dates[-1] + np.round(365.25*ANALYTICS_TENORS).astype('timedelta64[D]')
+		closest = np.unique(np.abs(universe.getMaturities()[None, :] - targets[:, None]).argmin(axis=1))
+		ytmData = np.abs(ytms[closest].T)
+		def analytics(stats):
+			logReturns = calcLogArray(ytmData)
+			return calcPCA(np.cov(logReturns, rowvar=False))[0]		#the eigenvalues (the eigenvectors' signs are arbitrary)
+		if numDays > 2:
+			records += _timeBackends(backends, 'calcLogArray+cov+eigh', len(closest), numDays, len(closest)*numDays, analytics)[1]
+	return records
+
+
+def compare(records, previous, threshold=0.1):
+	"""
+	Compare the run time of each stage against a previous run, and print the stages that got slower.
+
+	Parameters
+	----------
+	records : list of dict
+		The current results
+	previous : list of dict
+		The results of a previous run
+	threshold : float
+		The relative slow-down above which a stage is reported as a regression
+
+	Returns
+	-------
+	list of dict
+		The regressions, each with the stage, size, and old and new run times
+	"""
+	old = {(r['stage'], r.get('backend', 'numpy'), r['bonds'], r['days']): r for r in previous}
+	regressions = []
+	for r in records:
+		key = (r['stage'], r.get('backend', 'numpy'), r['bonds'], r['days'])
+		if key not in old:
+			continue
+		ratio = r['seconds']/old[key]['seconds']
+		name = r['stage'] if 'backend' not in r else f"{r['stage']} [{r['backend']}]"
+		print(f"{name:36s} {r['bonds']:>7d} x {r['days']:<6d} {ratio:6.2f}x of previous")
+		if ratio > 1 + threshold:
+			regressions.append({'stage': r['stage'], 'backend': r.get('backend'), 'bonds': r['bonds'], 'days': r['days'],
+				'previousSeconds': old[key]['seconds'], 'seconds': r['seconds']})
+	return regressions
+
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Benchmark the YTM, boot-strapping, forward rate, and analytics calculations.')
+	parser.add_argument('--sizes', nargs='+', default=['11x10', '1000x250', '10000x250'],
+		help='bond universe sizes as BONDSxDAYS (e.g. 11x10 1000x250 50000x5000)')
+	parser.add_argument('--curve-bonds', type=int, default=11, help='number of bonds used for boot-strapping')
+	parser.add_argument('--output', default='benchmark.json', help='where to write the results (JSON)')
+	parser.add_argument('--compare', help='a previous results file to compare against')
+	parser.add_argument('--threshold', type=float, default=0.1, help='relative slow-down reported as a regression')
+	parser.add_argument('--backends', nargs='+', choices=kernels.BACKENDS, default=['numpy'],
+		help='backends to time the stages with compiled kernels with (the first is the baseline for the speedups)')
+	args = parser.parse_args(argv)
+
+	sizes = [tuple(int(n) for n in size.lower().split('x')) for size in args.sizes]
+	backends = [backend for backend in args.backends if backend == 'numpy' or kernels.isAvailable()]
+	records = runBenchmarks(sizes, args.curve_bonds, backends)
+	report = {
+		'timestamp': datetime.now().isoformat(timespec='seconds'),
+		'python': platform.python_version(),
+		'numpy': np.__version__,
+		'backends': backends,
+		'platform': platform.platform(),
+		'results': records,
+	}
+
+	if args.compare:
+		with open(args.compare) as f:
+			report['regressions'] = compare(records, json.load(f)['results'], args.threshold)
+
+	with open(args.output, 'w') as f:
+		json.dump(report, f, indent=2)
+	return 1 if report.get('regressions') else 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
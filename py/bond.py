@@ -1,5 +1,10 @@
-from datetime import datetime, timedelta
+import calendar
 import math
+import numpy as np
+
+from businessCalendar import businessCalendar
+from conventions import ACT_365, ACT_ACT, dayCountCodes, frequencyCounts, yearFractions
+import yieldSolver
 
 
 """
@@ -7,18 +12,29 @@ A bond object is used to store information about a bond.
 
 A bond object has an issue date, a maturity date, and a coupon rate.
 
+A bond object also has a coupon frequency (coupons per year) and a day count convention (see conventions).
+	By default, coupons are semi-annual and times are ACT/365 (actual days / 365).
+
 A bond object can also store a list of clean price(s).
 	This list of clean price(s) is assumed to correspond to consecutive business day(s).
+
+A bond object builds its schedule of coupon dates once, when it is constructed.
+	The schedule is stored as a sorted array of date ordinals, so that coupon dates can be looked up by binary search.
 """
 
 class bond:
 	
+	__slots__ = ('issue_date', 'maturity', 'coupon', 'clean_prices', 'frequency', 'dayCount', 'couponSchedule')
+	
 	# Constructor
-	def __init__(self, issue_date, maturity, coupon, clean_prices):
+	def __init__(self, issue_date, maturity, coupon, clean_prices, frequency=2, dayCount=ACT_365):
 		self.issue_date = issue_date
 		self.maturity = maturity
 		self.coupon = coupon
 		self.clean_prices = clean_prices	# Clean prices should correspond to consecutive business days.
+		self.frequency = int(frequencyCounts(frequency))	# Coupons per year, e.g. 2 or 'semi-annual'
+		self.dayCount = int(dayCountCodes(dayCount))		# A code from conventions.DAY_COUNTS, e.g. ACT_365 or 'ACT/365'
+		self.couponSchedule = bond.buildCouponSchedule(issue_date or maturity, maturity, 12 // self.frequency)
 		
 		
 	# For debugging
@@ -30,30 +46,88 @@ class bond:
 		
 		
 		
-	#Take in a coupon date, add 6 months to it, and return the incremented date
+	#Take in a coupon date, add 'months' months to it (6 by default), and return the incremented date.
+	#The day is clamped to the end of a shorter month (e.g. August 31 + 6 months is February 28).
 	@staticmethod
-	def incrementCoupon(couponDate):
-		newYear = couponDate.year + ((couponDate.month + 6) // 12)
-		newMonth = (couponDate.month + 6) % 12
-		if newMonth == 0:
-			newMonth = 12
-		nextCouponDate = couponDate.replace(newYear, newMonth)
+	def incrementCoupon(couponDate, months=6):
+		newYear, newMonth = divmod(couponDate.year*12 + couponDate.month - 1 + months, 12)
+		newDay = min(couponDate.day, calendar.monthrange(newYear, newMonth + 1)[1])
+		nextCouponDate = couponDate.replace(newYear, newMonth + 1, newDay)
 		return nextCouponDate
 		
 		
-	#Take in a coupon date, subtract 6 months from it, and return the decremented date
+	#Take in a coupon date, subtract 'months' months from it (6 by default), and return the decremented date
 	@staticmethod
-	def decrementCoupon(couponDate):
-		newMonth = (couponDate.month + 6) % 12
-		if newMonth == 0:
-			newMonth = 12
-		newYear = couponDate.year
-		if newMonth >= 7:
-			newYear -= 1
-		nextCouponDate = couponDate.replace(newYear, newMonth)
-		return nextCouponDate
+	def decrementCoupon(couponDate, months=6):
+		return bond.incrementCoupon(couponDate, -months)
 		
 		
+	@staticmethod
+	def buildCouponSchedule(start_date, maturity, months=6):
+		"""
+		Build the schedule of coupon dates of a bond, walking back from its maturity date
+		until the first coupon date on or before the start date.
+
+		Parameters
+        ----------
+        start_date : datetime
+            The earliest date the schedule needs to cover
+        maturity : datetime
+            The maturity date of the bond
+        months : int
+            The number of months between coupons (12/frequency)
+
+        Returns
+        -------
+        numpy.ndarray
+           The sorted ordinals of the coupon dates, ending with the maturity date
+		"""
+		dates = [maturity.toordinal()]
+		date = maturity
+		while date > start_date:	# Each date is shifted from the maturity date, so a clamped day doesn't carry over
+			date = bond.decrementCoupon(maturity, months*len(dates))
+			dates.append(date.toordinal())
+		return np.array(dates[::-1], dtype=np.int64)
+		
+		
+	def couponIndex(self, current_date):
+		"""
+		Given the current date, find the position of the most recent coupon payment
+		of a bond in its coupon schedule.
+
+		Parameters
+        ----------
+        current_date : datetime
+            The current date
+
+        Returns
+        -------
+        int
+           The index into couponSchedule of the most recent coupon payment of the bond
+		"""
+		ordinal = current_date.toordinal()
+		if ordinal < self.couponSchedule[0]:	# Extend the schedule back if the date falls before it
+			self.couponSchedule = bond.buildCouponSchedule(current_date, self.maturity, 12 // self.frequency)
+		return int(np.searchsorted(self.couponSchedule, ordinal, side='right')) - 1
+		
+		
+	def couponsRemaining(self, current_date):
+		"""
+		Given the current date, determine the number of coupon payments
+		of a bond still to be made (including the one at maturity).
+
+		Parameters
+        ----------
+        current_date : datetime
+            The current date
+
+        Returns
+        -------
+        int
+           The number of coupon payments still to be made
+		"""
+		i = self.couponIndex(current_date)
+		return len(self.couponSchedule) - 1 - i
 		
 		
 		
@@ -73,10 +147,8 @@ class bond:
         datetime
            The date of the most recent coupon payment of the bond		
 		"""
-		date = self.maturity
-		while date > current_date:
-			date = bond.decrementCoupon(date)
-		return date
+		i = self.couponIndex(current_date)
+		return self.maturity.fromordinal(self.couponSchedule[i])
 		
 		
 	def nextCouponDate(self, current_date):
@@ -94,7 +166,10 @@ class bond:
         datetime
            The date of the next coupon payment of the bond		
 		"""
-		return bond.incrementCoupon(self.lastCouponDate(current_date))
+		i = self.couponIndex(current_date) + 1
+		if i == len(self.couponSchedule):	# The bond has matured
+			return bond.incrementCoupon(self.lastCouponDate(current_date), 12 // self.frequency)
+		return self.maturity.fromordinal(self.couponSchedule[i])
 		
 
 	def daysSinceCoupon(self, current_date):
@@ -133,8 +208,7 @@ class bond:
            The time in years until the next coupon payment of the bond
 		"""
 		couponDate = self.nextCouponDate(current_date)
-		days = (couponDate - current_date).days
-		time = days / 365
+		time = self.yearFraction(current_date, couponDate, current_date)
 		return time
 		
 		
@@ -153,76 +227,117 @@ class bond:
         float
            The time in years until the maturity date of the bond
 		"""
-		days = (self.maturity - currentDate).days
-		time = days/365
+		if self.dayCount == ACT_ACT:	# Whole coupon periods of 1/frequency years after the next coupon
+			return self.timeToNextCoupon(currentDate) + (self.couponsRemaining(currentDate) - 1)/self.frequency
+		time = self.yearFraction(currentDate, self.maturity, currentDate)
 		return time
 		
 		
+	def yearFraction(self, start, end, current_date):
+		"""
+		Return the time in years between two dates under the bond's day count convention.
+
+		Parameters
+        ----------
+        start : datetime
+            The first date
+        end : datetime
+            The second date
+        current_date : datetime
+            The current date (its coupon period is used by ACT/ACT)
+
+        Returns
+        -------
+        float
+           The year fraction between the two dates
+		"""
+		if self.dayCount == ACT_365:
+			return (end - start).days/365
+		periodStart, periodEnd = self.lastCouponDate(current_date), self.nextCouponDate(current_date)
+		dates = np.array([start, end, periodStart, periodEnd], dtype='datetime64[D]')
+		return float(yearFractions(dates[0], dates[1], self.dayCount, dates[2], dates[3], self.frequency))
 		
 		
-	#Given a clean price and the date of that price, calculate the bond's YTM
-	def calcYTM(self, cleanDate, cleanPrice):
+	def accruedInterest(self, current_date):
+		"""
+		Given the current date, return the interest accrued on the bond since
+		its most recent coupon payment (per 100 of notional).
+
+		Parameters
+        ----------
+        current_date : datetime
+            The current date
+
+        Returns
+        -------
+        float
+           The accrued interest of the bond
+		"""
+		return self.yearFraction(self.lastCouponDate(current_date), current_date, current_date)*self.coupon
+		
+		
+		
+		
+	#Given a clean price and the date of that price, calculate the bond's YTM.
+	#The yield is found with yieldSolver (Newton's method from 'initialGuess' by default, see yieldSolver.METHODS),
+	#and the solve is recorded in 'stats' (by default, yieldSolver.STATS).
+	def calcYTM(self, cleanDate, cleanPrice, initialGuess=0, method='newton', stats=None):
 	
 		#Calculate the dirty price
-		n = self.daysSinceCoupon(cleanDate)
-		accruedInterest = n/365*self.coupon
+		accruedInterest = self.accruedInterest(cleanDate)
 		dirtyPrice = cleanPrice + accruedInterest
 		
 		#Setup cashflows
-		couponFlow = self.coupon/2
+		couponFlow = self.coupon/self.frequency
 		notional = 100
 		
 		#Calculate time until cashflows
 		timeToMaturity = self.timeToMaturity(cleanDate)
 		initialTimeToCoupon = self.timeToNextCoupon(cleanDate) 
 		
-		r=0	#Initial guess for yield is r=0
+		numCoupons = self.couponsRemaining(cleanDate)
 		
-		#Each loop is one interation of Newton's method. Break when desired accuracy is achieved. 
-		while True:
-	
-			#Reset loop variables
+		#Add up the discounted cashflows (and their derivative with respect to r) at yield r
+		def priceFunc(r):
 			timeToCoupon = initialTimeToCoupon
-			date = self.nextCouponDate(cleanDate)
 			DCF = 0
 			deriv = 0
 			
 			#Add up coupon cashflows
-			while date <= self.maturity:
-				DCF += couponFlow*math.exp(-r*timeToCoupon)
-				deriv += timeToCoupon*couponFlow*math.exp(-r*timeToCoupon)
+			for _ in range(numCoupons):
+				discounted = couponFlow*math.exp(-r*timeToCoupon)
+				DCF += discounted
+				deriv += timeToCoupon*discounted
 				
-				timeToCoupon += 0.5
-				date = bond.incrementCoupon(date)
+				timeToCoupon += 1/self.frequency
 				
 			#Add maturity cashflow to calculations
-			DCF +=  notional*math.exp(-r*timeToMaturity)
-			deriv += timeToMaturity*notional*math.exp(-r*timeToMaturity)
-			
+			discounted = notional*math.exp(-r*timeToMaturity)
+			DCF += discounted
+			deriv += timeToMaturity*discounted
+			return DCF, deriv
 			
-			#If desired accuracy is not achieved, perform another iteration of Newton's method. 
-			#Else, break and return r (=YTM).
-			if abs(DCF - dirtyPrice) > 0.0000001:
-				r = r - (dirtyPrice - DCF)/deriv
-			else:
-				break
-		return r
+		return yieldSolver.solve(priceFunc, dirtyPrice, initialGuess, method, stats=stats)
 		
 	
 	
 	# Assuming the bond object has a list of clean prices from consecutive business days,
 	# and given the date of the first clean price in the list,
 	# calculate the bond's YTM on each day.
-	def calcYTMs(self, start_date):
-		date = start_date
+	# The date of each price can instead be given directly with 'dates',
+	# otherwise the dates are the consecutive business days of 'businessDays' (a businessCalendar, weekdays by default).
+	# Each day's YTM is solved starting from the previous day's YTM.
+	def calcYTMs(self, start_date, dates=None, businessDays=None, method='newton', stats=None):
+		if dates is None:
+			dates = (businessDays or businessCalendar()).dateRange(start_date, len(self.clean_prices))
+		dates = np.asarray(dates, dtype='datetime64[us]').tolist()
 
 		# Calc YTMs
 		YTMs = []
-		for i, price in enumerate(self.clean_prices):
-			YTMs.append(self.calcYTM(date, price))
-			date = date + timedelta(days=1)
-			if (i%5)==4:
-				date = date + timedelta(days=2)		# Deal with weekends
+		r = 0
+		for date, price in zip(dates, self.clean_prices):
+			r = self.calcYTM(date, price, r if math.isfinite(r) else 0, method, stats)
+			YTMs.append(r)
 
 		return YTMs
 				
@@ -0,0 +1,201 @@
+import numpy as np
+
+from bond import bond
+from batchYTM import calcYTMBatch, cashFlowTerms
+from conventions import ACT_365, dayCountCodes, frequencyCounts
+
+
+
+#bondUniverse is a utility class.
+#
+#A bondUniverse object stores a collection of bonds column by column, rather than as a list of bond objects:
+#	-the coupons, issue dates, and maturity dates are each stored in a contiguous NumPy array,
+#	-so are the coupon frequency and day count code of each bond (see conventions; semi-annual and ACT/365 by default),
+#	 so a universe with mixed conventions is priced in one batch,
+#	-the clean prices are stored in a 2D NumPy array with one row per bond and one column per business day.
+#
+#Indexing a bondUniverse object returns a bondView, which behaves like a bond object but reads its data
+#straight from the columns of the bondUniverse. This lets the existing bond methods (and spotCurve) work on
+#a bondUniverse without copying any of its data.
+
+
+
+class bondUniverse:
+	
+	#Constructor
+	def __init__(self, coupons, issueDates, maturities, cleanPrices, isins=None, frequencies=2, dayCounts=ACT_365):
+		self.coupons = np.asarray(coupons, dtype=float)
+		self.issueDates = np.asarray(issueDates, dtype='datetime64[D]')
+		self.maturities = np.asarray(maturities, dtype='datetime64[D]')
+		self.cleanPrices = np.asarray(cleanPrices, dtype=float)		#One row per bond, one column per business day
+		self.isins = np.asarray(isins if isins is not None else [''] * len(self.coupons), dtype=str)
+		self.frequencies = np.broadcast_to(frequencyCounts(frequencies), self.coupons.shape).copy()	#Coupons per year
+		self.dayCounts = np.broadcast_to(dayCountCodes(dayCounts), self.coupons.shape).copy()		#Day count codes
+		self.couponSchedules = [None]*len(self.coupons)				#Built on first use by each bondView
+		
+		
+	#Build a bondUniverse from a list of bond objects
+	@classmethod
+	def fromBonds(cls, bonds):
+		return cls([b.coupon for b in bonds],
+			[b.issue_date for b in bonds],
+			[b.maturity for b in bonds],
+			[b.clean_prices for b in bonds],
+			frequencies=[b.frequency for b in bonds],
+			dayCounts=[b.dayCount for b in bonds])
+		
+		
+	#Build a bondUniverse of the same bonds with other clean prices (e.g. a block of the days)
+	def withCleanPrices(self, cleanPrices):
+		return bondUniverse(self.coupons, self.issueDates, self.maturities, cleanPrices, isins=self.isins,
+			frequencies=self.frequencies, dayCounts=self.dayCounts)
+		
+		
+	def __len__(self):
+		return len(self.coupons)
+		
+	def __getitem__(self, i):
+		if not -len(self) <= i < len(self):
+			raise IndexError('bondUniverse index out of range')
+		return bondView(self, i % len(self))
+		
+	def __iter__(self):
+		for i in range(len(self)):
+			yield bondView(self, i)
+			
+			
+			
+	#Getter methods:
+	
+	def getCoupons(self):
+		return self.coupons
+		
+	def getIssueDates(self):
+		return self.issueDates
+		
+	def getMaturities(self):
+		return self.maturities
+		
+	def getCleanPrices(self):
+		return self.cleanPrices
+		
+	def getISINs(self):
+		return self.isins
+		
+	def getFrequencies(self):
+		return self.frequencies
+		
+	def getDayCounts(self):
+		return self.dayCounts
+		
+		
+		
+		
+	def timesToMaturity(self, currentDate):
+		"""
+		Given the current date, return the time in years until
+		the maturity date of each bond.
+
+		Parameters
+        ----------
+        currentDate : datetime
+            The current date
+
+        Returns
+        -------
+        numpy.ndarray
+           The time in years until the maturity date of each bond
+		"""
+		return cashFlowTerms(self.maturities, np.datetime64(currentDate, 'D'), self.frequencies, self.dayCounts)[2]
+		
+		
+	def calcYTMs(self, dates):
+		"""
+		Calculate the YTM of every bond on every day of clean prices.
+
+		Parameters
+        ----------
+        dates : array_like of datetime64[D]
+            The date of each column of clean prices
+
+        Returns
+        -------
+        numpy.ndarray
+           The YTMs, with one row per bond and one column per day
+		"""
+		dates = np.asarray(dates, dtype='datetime64[D]')
+		return calcYTMBatch(self.coupons[:, None], self.maturities[:, None], dates[None, :], self.cleanPrices,
+			frequencies=self.frequencies[:, None], dayCounts=self.dayCounts[:, None])
+
+
+	def calcRisk(self, dates):
+		"""
+		Calculate the YTM, dirty price, accrued interest, durations, convexity, and DV01 of every bond on every day of clean prices.
+
+		Parameters
+        ----------
+        dates : array_like of datetime64[D]
+            The date of each column of clean prices
+
+        Returns
+        -------
+        dict
+           The arrays named in batchYTM.RISK_MEASURES, each with one row per bond and one column per day
+		"""
+		dates = np.asarray(dates, dtype='datetime64[D]')
+		return calcYTMBatch(self.coupons[:, None], self.maturities[:, None], dates[None, :], self.cleanPrices, risk=True,
+			frequencies=self.frequencies[:, None], dayCounts=self.dayCounts[:, None])
+		
+		
+		
+		
+#bondView is a lightweight bond object for one row of a bondUniverse.
+#
+#It only stores a reference to the bondUniverse and its row, and reads everything else from the columns of the bondUniverse.
+#Its clean prices are a view into the clean price matrix, not a copy.
+
+class bondView(bond):
+	
+	__slots__ = ('universe', 'row')
+	
+	#Constructor
+	def __init__(self, universe, row):
+		self.universe = universe
+		self.row = row
+		
+		
+	@property
+	def issue_date(self):
+		return self.universe.issueDates[self.row].astype('datetime64[us]').item()
+		
+	@property
+	def maturity(self):
+		return self.universe.maturities[self.row].astype('datetime64[us]').item()
+		
+	@property
+	def coupon(self):
+		return self.universe.coupons[self.row]
+		
+	@property
+	def clean_prices(self):
+		return self.universe.cleanPrices[self.row]
+		
+	@property
+	def frequency(self):
+		return int(self.universe.frequencies[self.row])
+		
+	@property
+	def dayCount(self):
+		return int(self.universe.dayCounts[self.row])
+		
+	@property
+	def couponSchedule(self):
+		schedule = self.universe.couponSchedules[self.row]
+		if schedule is None:
+			schedule = bond.buildCouponSchedule(self.issue_date, self.maturity, 12 // self.frequency)
+			self.universe.couponSchedules[self.row] = schedule
+		return schedule
+		
+	@couponSchedule.setter
+	def couponSchedule(self, schedule):
+		self.universe.couponSchedules[self.row] = schedule
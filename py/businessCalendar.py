@@ -0,0 +1,228 @@
+from datetime import date, timedelta
+import numpy as np
+
+
+
+#businessCalendar is a utility class.
+#
+#A businessCalendar object stores a precomputed set of holidays, and uses it to step between business days
+#(weekdays that are not holidays) for whole arrays of dates at once.
+#
+#dateIndex is a utility class that is meant to be used together with businessCalendar.
+#
+#A dateIndex object maps each date in an array of dates (e.g. the dates of the columns of clean prices)
+#to its position in that array, using a lookup table keyed by date ordinal so that each lookup is O(1).
+
+
+
+class businessCalendar:
+
+	#Constructor
+	def __init__(self, holidays=()):
+		self.holidays = np.unique(np.asarray(holidays, dtype='datetime64[D]'))
+		self.busdaycal = np.busdaycalendar(holidays=self.holidays)
+
+
+	#Build a businessCalendar with the Canadian bond market holidays for the given years
+	@classmethod
+	def canada(cls, startYear, endYear):
+		return cls(canadaHolidays(startYear, endYear))
+
+
+
+	#Getter methods:
+
+	def getHolidays(self):
+		return self.holidays
+
+
+
+
+	def isBusinessDay(self, dates):
+		"""
+		Determine whether each date is a business day.
+
+		Parameters
+        ----------
+        dates : array_like of datetime64[D]
+            The dates
+
+        Returns
+        -------
+        numpy.ndarray of bool
+           True where the date is a business day
+		"""
+		return np.is_busday(np.asarray(dates, dtype='datetime64[D]'), busdaycal=self.busdaycal)
+
+
+	def offset(self, dates, days):
+		"""
+		Move each date forward (or backward) by a number of business days.
+		Dates that are not business days are first rolled forward to the next business day.
+
+		Parameters
+        ----------
+        dates : array_like of datetime64[D]
+            The dates
+        days : array_like of int
+            The number of business days to move each date by
+
+        Returns
+        -------
+        numpy.ndarray of datetime64[D]
+           The offset dates
+		"""
+		return np.busday_offset(np.asarray(dates, dtype='datetime64[D]'), days, roll='forward', busdaycal=self.busdaycal)
+
+
+	def dateRange(self, start, count):
+		"""
+		Given a start date, return the dates of a number of consecutive business days.
+
+		Parameters
+        ----------
+        start : datetime
+            The first date (rolled forward if it is not a business day)
+        count : int
+            The number of business days
+
+        Returns
+        -------
+        numpy.ndarray of datetime64[D]
+           The dates of the business days
+		"""
+		return self.offset(np.datetime64(start, 'D'), np.arange(count))
+
+
+	def count(self, start, end):
+		"""
+		Count the business days in [start, end).
+
+		Parameters
+        ----------
+        start : array_like of datetime64[D]
+            The first dates
+        end : array_like of datetime64[D]
+            The (excluded) last dates
+
+        Returns
+        -------
+        numpy.ndarray of int
+           The number of business days between each pair of dates
+		"""
+		return np.busday_count(np.asarray(start, dtype='datetime64[D]'), np.asarray(end, dtype='datetime64[D]'), busdaycal=self.busdaycal)
+
+
+
+
+class dateIndex:
+
+	#Constructor
+	def __init__(self, dates):
+		self.dates = np.asarray(dates, dtype='datetime64[D]')
+		ordinals = self.dates.astype(np.int64)
+		self.firstOrdinal = ordinals.min() if len(ordinals) else 0
+		self.rows = np.full(ordinals.max() - self.firstOrdinal + 1 if len(ordinals) else 0, -1, dtype=np.int64)	#-1 marks dates with no row
+		self.rows[ordinals - self.firstOrdinal] = np.arange(len(ordinals))
+
+
+	def __len__(self):
+		return len(self.dates)
+
+
+	#Getter methods:
+
+	def getDates(self):
+		return self.dates
+
+
+
+
+	def rowOf(self, dates):
+		"""
+		Find the row of each date.
+
+		Parameters
+        ----------
+        dates : array_like of datetime64[D]
+            The dates to look up
+
+        Returns
+        -------
+        numpy.ndarray of int
+           The row of each date, or -1 where the date is not in the index
+		"""
+		offsets = np.asarray(dates, dtype='datetime64[D]').astype(np.int64) - self.firstOrdinal
+		inRange = (offsets >= 0) & (offsets < len(self.rows))
+		if not len(self.rows):	#an empty index
+			return np.full(offsets.shape, -1, dtype=np.int64)
+		return np.where(inRange, self.rows[np.where(inRange, offsets, 0)], -1)
+
+
+
+
+def canadaHolidays(startYear, endYear):
+	"""
+	Generate the Canadian bond market holidays for a range of years.
+
+	Holidays that fall on a weekend (or on another holiday) are observed on the next business day.
+
+	Parameters
+	----------
+	startYear : int
+		The first year
+	endYear : int
+		The last year (inclusive)
+
+	Returns
+	-------
+	numpy.ndarray of datetime64[D]
+		The observed holidays
+	"""
+	holidays = []
+	for year in range(startYear, endYear + 1):
+		easter = _easter(year)
+		fixed = [date(year, 1, 1), date(year, 7, 1), date(year, 11, 11), date(year, 12, 25), date(year, 12, 26)]
+		if year >= 2021:
+			fixed.insert(2, date(year, 9, 30))		#National Day for Truth and Reconciliation
+		moving = [
+			_nthWeekday(year, 2, 0, 3),				#Family Day (3rd Monday of February)
+			easter - timedelta(days=2),				#Good Friday
+			_weekdayBefore(date(year, 5, 25), 0),	#Victoria Day (last Monday before May 25)
+			_nthWeekday(year, 8, 0, 1),				#Civic Holiday (1st Monday of August)
+			_nthWeekday(year, 9, 0, 1),				#Labour Day (1st Monday of September)
+			_nthWeekday(year, 10, 0, 2),			#Thanksgiving (2nd Monday of October)
+		]
+		for holiday in fixed:
+			observed = holiday
+			while observed.weekday() >= 5 or observed in holidays:
+				observed += timedelta(days=1)
+			holidays.append(observed)
+		holidays.extend(moving)
+	return np.array(sorted(holidays), dtype='datetime64[D]')
+
+
+#Return the n-th given weekday (Monday = 0) of a month
+def _nthWeekday(year, month, weekday, n):
+	first = date(year, month, 1)
+	return first + timedelta(days=(weekday - first.weekday()) % 7 + 7*(n - 1))
+
+
+#Return the last given weekday (Monday = 0) strictly before a date
+def _weekdayBefore(day, weekday):
+	day -= timedelta(days=1)
+	return day - timedelta(days=(day.weekday() - weekday) % 7)
+
+
+#Return the date of Easter Sunday (Anonymous Gregorian algorithm)
+def _easter(year):
+	a = year % 19
+	b, c = divmod(year, 100)
+	d, e = divmod(b, 4)
+	g = (8*b + 13) // 25
+	h = (19*a + b - d - g + 15) % 30
+	i, k = divmod(c, 4)
+	l = (32 + 2*e + 2*i - h - k) % 7
+	m = (a + 11*h + 22*l) // 451
+	month, day = divmod(h + l - 7*m + 114, 31)
+	return date(year, month, day + 1)
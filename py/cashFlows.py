@@ -0,0 +1,301 @@
+from collections import OrderedDict
+import numpy as np
+
+from batchYTM import cashFlowTerms, solveRows, MAX_ITERATIONS
+from conventions import ACT_365, dayCountCodes, frequencyCounts
+from forwardEngine import interpolateSpot
+
+
+
+#cashFlows is a utility module.
+#
+#A cashFlowSchedule object compiles the cash flows of a universe of bonds on one settlement date into a sparse
+#(bonds x times) matrix in CSR form, over a time grid shared by every bond:
+#	-times: the sorted, deduplicated times (in years) of every cash flow (bonds that pay on the same dates share them),
+#	-indptr: the entries of bond i are indptr[i]:indptr[i+1],
+#	-indices: the position in 'times' of each entry,
+#	-amounts: the amount of each entry.
+#Each bond's entries are its coupons (in date order) followed by its notional, laid out exactly as in
+#batchYTM.cashFlowMatrix (with each bond's own coupon frequency and day count convention), but without the padding.
+#
+#Pricing every bond under a discount curve is then one sparse matrix-vector product: the discount factors are only
+#calculated once per time on the grid, and the products are summed per bond. Pricing under many curves at once
+#(one column of discount factors per curve) is a sparse matrix-matrix product, done a group of bonds at a time so that
+#only CHUNK_ENTRIES products are held in memory at once (the matrix is never expanded to a dense (bonds x times) array,
+#which can be huge when the maturities are scattered over many dates).
+#The same matrix is used to solve for YTMs (see batchYTM.solveRows) and to boot-strap the spot curve.
+#
+#The matrix is built with NumPy alone (the row sums are np.add.reduceat over indptr).
+#forDate caches the schedules of recent settlement dates, so repeated pricing on the same date (e.g. intraday ticks)
+#only builds the schedule once.
+
+
+
+CACHE_SIZE = 32		#number of settlement dates whose schedules are kept by forDate
+CHUNK_ENTRIES = 2**18	#number of (entry, curve) products price holds in memory at a time
+_cache = OrderedDict()
+
+
+
+class cashFlowSchedule:
+
+	#Constructor
+	def __init__(self, coupons, maturities, date, frequencies=2, dayCounts=ACT_365):
+		coupons = np.asarray(coupons, dtype=float)
+		maturities = np.asarray(maturities, dtype='datetime64[D]')
+		self.date = np.datetime64(date, 'D')
+
+		accrual, timesToCoupon, self.timesToMaturity, numCoupons, frequencies = cashFlowTerms(maturities, self.date, frequencies, dayCounts)
+		self.accruedInterest = accrual*coupons
+		self.numCoupons = numCoupons
+		self.couponFlows = coupons/frequencies		#the amount of each coupon
+
+		#Each bond has its coupons followed by its notional
+		self.indptr = np.concatenate([[0], np.cumsum(numCoupons + 1)])
+		self.rows = np.repeat(np.arange(len(coupons)), numCoupons + 1)	#the bond of each entry
+		steps = np.arange(len(self.rows)) - self.indptr[self.rows]		#the position of each entry within its bond
+		isNotional = steps == numCoupons[self.rows]
+
+		times = np.where(isNotional, self.timesToMaturity[self.rows], timesToCoupon[self.rows] + (1/frequencies)[self.rows]*steps)
+		self.amounts = np.where(isNotional, 100, coupons[self.rows]/frequencies[self.rows])
+		self.times, self.indices = np.unique(times, return_inverse=True)
+
+
+
+	#Getter methods:
+
+	def getDate(self):
+		return self.date
+
+	def getTimes(self):
+		return self.times
+
+	def getIndptr(self):
+		return self.indptr
+
+	def getIndices(self):
+		return self.indices
+
+	def getAmounts(self):
+		return self.amounts
+
+	def getAccruedInterest(self):
+		return self.accruedInterest
+
+	def getTimesToMaturity(self):
+		return self.timesToMaturity
+
+	def __len__(self):
+		return len(self.indptr) - 1
+
+
+
+
+	def price(self, discountFactors):
+		"""
+		Price every bond with a sparse matrix-vector product (or a sparse matrix-matrix product for many curves).
+
+		Parameters
+		----------
+		discountFactors : array_like
+			The discount factor at each time of the grid (see getTimes), or a (times x curves) array with one column per curve
+
+		Returns
+		-------
+		numpy.ndarray
+			The dirty price of each bond, or a (bonds x curves) array
+		"""
+		discountFactors = np.asarray(discountFactors, dtype=float)
+		if discountFactors.ndim == 1:
+			return self._rowSums(self.amounts*discountFactors[self.indices])
+
+		#A group of bonds at a time, with at most CHUNK_ENTRIES products (or one bond) per group
+		prices = np.empty((len(self), discountFactors.shape[1]))
+		entriesPerGroup = max(1, CHUNK_ENTRIES // max(discountFactors.shape[1], 1))
+		first = 0
+		while first < len(self):
+			last = int(np.searchsorted(self.indptr, self.indptr[first] + entriesPerGroup, 'right')) - 1
+			last = min(max(last, first + 1), len(self))
+			entries = slice(self.indptr[first], self.indptr[last])
+			products = self.amounts[entries, None]*discountFactors[self.indices[entries]]
+			prices[first:last] = np.add.reduceat(products, self.indptr[first:last] - self.indptr[first], axis=0)
+			first = last
+		return prices
+
+
+	def priceCurves(self, spotArray):
+		"""
+		Price every bond under one or more spot curves given as point-estimates (interpolated as in forwardEngine.interpolateSpot).
+
+		Parameters
+		----------
+		spotArray : array_like
+			The (bonds x 2) point-estimates [r, T] for a spot curve, or a (curves x bonds x 2) array
+
+		Returns
+		-------
+		numpy.ndarray
+			The dirty price of each bond, or a (curves x bonds) array
+		"""
+		spotArray = np.asarray(spotArray, dtype=float)
+		rates = interpolateSpot(spotArray.reshape((-1,) + spotArray.shape[-2:]), self.times)
+		prices = self.price(np.exp(-rates*self.times).T).T
+		return prices[0] if spotArray.ndim == 2 else prices
+
+
+	def priceAtYields(self, r, rows=None):
+		"""
+		Calculate the DCF of each bond at its own yield, and the time-weighted DCF (= -dP/dr).
+
+		Parameters
+		----------
+		r : numpy.ndarray
+			The yield of each bond (or of each of 'rows')
+		rows : numpy.ndarray
+			The indices of the bonds to price (by default, all of them); only their entries are priced
+
+		Returns
+		-------
+		tuple of numpy.ndarray
+			(DCF, time-weighted DCF)
+		"""
+		if rows is None:
+			times = self.times[self.indices]
+			discounted = self.amounts*np.exp(-r[self.rows]*times)
+			return self._rowSums(discounted), self._rowSums(times*discounted)
+
+		#Gather the CSR segments of the rows (every bond has at least its notional, so no segment is empty)
+		rows = np.asarray(rows)
+		if len(rows) == 0:
+			return np.zeros(0), np.zeros(0)
+		starts = self.indptr[rows]
+		counts = self.indptr[rows+1] - starts
+		offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+		entries = np.repeat(starts - offsets, counts) + np.arange(counts.sum())
+		times = self.times[self.indices[entries]]
+		discounted = self.amounts[entries]*np.exp(-np.repeat(r, counts)*times)
+		return np.add.reduceat(discounted, offsets), np.add.reduceat(times*discounted, offsets)
+
+
+	def calcYTMs(self, cleanPrices, initialGuess=0, maxIterations=MAX_ITERATIONS, stats=None):
+		"""
+		Solve for the YTM of every bond (as in batchYTM.calcYTMBatch, with the same tolerance).
+
+		Parameters
+		----------
+		cleanPrices : array_like
+			The clean price of each bond
+		initialGuess : array_like
+			The initial guess(es) for the YTMs (NaN guesses are replaced by 0)
+		maxIterations : int
+			The largest number of iterations of Newton's method (and of the bisection fallback)
+		stats : solverStats
+			Where to record the solves (by default, yieldSolver.STATS)
+
+		Returns
+		-------
+		numpy.ndarray
+			The YTM of each bond (NaN where no yield could be found)
+		"""
+		dirtyPrices = np.asarray(cleanPrices, dtype=float) + self.accruedInterest
+		initialGuess = np.nan_to_num(np.broadcast_to(np.asarray(initialGuess, dtype=float), dirtyPrices.shape), nan=0, posinf=0, neginf=0)
+		return solveRows(lambda rows, r: self.priceAtYields(r, rows), dirtyPrices, initialGuess, maxIterations, stats)
+
+
+	def calcSpotPoints(self, cleanPrices):
+		"""
+		Boot-strap the spot curve from the clean prices of the bonds (sorted by maturity), as spotCurve.calcPointsArray does:
+		the coupon at maturity is part of the final flow, and the j-th coupon is interpolated between point-estimates j-2 and j-1.
+
+		Parameters
+		----------
+		cleanPrices : array_like
+			The clean price of each bond, or a (bonds x sets) array to boot-strap several sets of prices on this date at once
+
+		Returns
+		-------
+		numpy.ndarray
+			The (bonds x 2) point-estimates [r, T] for the spot curve, or a (sets x bonds x 2) array
+		"""
+		cleanPrices = np.asarray(cleanPrices, dtype=float)
+		prices = cleanPrices.reshape(len(self), -1).T
+		dirtyPrices = prices + self.accruedInterest
+		numSets, numBonds = dirtyPrices.shape
+
+		#Coupon j is interpolated between point-estimates j-2 and j-1, so bond i can only have i coupons before maturity
+		missing = self.numCoupons - 1 > np.arange(numBonds)
+		if missing.any():
+			i = int(np.argmax(missing))
+			raise IndexError('Bond ' + str(i) + ' has more coupons than there are point-estimates before it '
+				+ '(the bonds should be sorted by maturity, one per coupon period)')
+
+		#The point-estimates found so far, with a point at (r=0, T=0) in front for interpolating the first coupon
+		rPoints = np.zeros((numSets, numBonds + 1))
+		tPoints = np.zeros(numBonds + 1)
+		times = self.times[self.indices]
+
+		for i in range(numBonds):
+			start, end = self.indptr[i], self.indptr[i+1]
+			finalFlow = 100 + self.couponFlows[i]		#the notional and the coupon at maturity
+
+			#Coupon j (all but the one at maturity) is interpolated between point-estimates j-2 and j-1
+			couponsEnd = max(start, end - 2)		#the end of the coupons before maturity (none when only the notional is left)
+			j = np.arange(1, couponsEnd - start + 1)
+			timeToCoupon = times[start:couponsEnd]
+			rPrev, rNext = rPoints[:, j-1], rPoints[:, j]
+			tPrev, tNext = tPoints[j-1], tPoints[j]
+			rTime = rPrev + (rNext - rPrev)/(tNext - tPrev)*(timeToCoupon - tPrev)
+			DCF = (self.amounts[start:couponsEnd]*np.exp(-rTime*timeToCoupon)).sum(axis=1)
+
+			rPoints[:, i+1] = -np.log((dirtyPrices[:, i] - DCF)/finalFlow)/self.timesToMaturity[i]
+			tPoints[i+1] = self.timesToMaturity[i]
+
+		points = np.stack([rPoints[:, 1:], np.broadcast_to(tPoints[1:], rPoints[:, 1:].shape)], axis=-1)
+		return points[0] if cleanPrices.ndim == 1 else points
+
+
+	#Sum the entries of each bond (along the first axis)
+	def _rowSums(self, values):
+		if len(values) == 0:
+			return np.zeros((len(self),) + values.shape[1:])
+		return np.add.reduceat(values, self.indptr[:-1], axis=0)
+
+
+
+def forDate(coupons, maturities, date, frequencies=2, dayCounts=ACT_365):
+	"""
+	Return the cashFlowSchedule of the bonds on a settlement date, building it only if it isn't cached
+	(the CACHE_SIZE most recently used schedules are kept).
+
+	Parameters
+	----------
+	coupons : array_like
+		The coupon rates
+	maturities : array_like of datetime64[D]
+		The maturity dates
+	date : datetime64[D]
+		The settlement date
+	frequencies : array_like of int or str
+		The number of coupons per year of each bond, or its name (semi-annual by default, see conventions.FREQUENCIES)
+	dayCounts : array_like of int or str
+		The day count code or name of each bond (ACT/365 by default, see conventions.DAY_COUNTS)
+
+	Returns
+	-------
+	cashFlowSchedule
+	"""
+	coupons = np.ascontiguousarray(coupons, dtype=float)
+	maturities = np.ascontiguousarray(maturities, dtype='datetime64[D]')
+	date = np.datetime64(date, 'D')
+	frequencies = np.ascontiguousarray(np.broadcast_to(frequencyCounts(frequencies), coupons.shape))
+	dayCounts = np.ascontiguousarray(np.broadcast_to(dayCountCodes(dayCounts), coupons.shape))
+	key = (date, coupons.tobytes(), maturities.tobytes(), frequencies.tobytes(), dayCounts.tobytes())
+
+	if key in _cache:
+		_cache.move_to_end(key)
+		return _cache[key]
+	schedule = cashFlowSchedule(coupons, maturities, date, frequencies, dayCounts)
+	_cache[key] = schedule
+	if len(_cache) > CACHE_SIZE:
+		_cache.popitem(last=False)
+	return schedule
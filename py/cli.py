@@ -0,0 +1,236 @@
+import argparse
+import os
+import sys
+
+
+
+#cli is the command-line entry point for the calculations in main.py, one subcommand per result:
+#
+#	python py/cli.py ytm DATA			YTM of every bond on every day
+#	python py/cli.py spot DATA			point-estimates for the spot curve(s)
+#	python py/cli.py forward DATA		point-estimates for the 1-year forward curve(s)
+#	python py/cli.py pca DATA			eigenvalues and eigenvectors of the covariance of daily log-returns
+#	python py/cli.py plot DATA			YTM, spot, and forward plots, written to a directory
+#	python py/cli.py convert DATA DIR	convert a bond file into a directory of memory-mapped files
+#	python py/cli.py serve DATA			reprice the curves as price ticks arrive (see priceFeed)
+#
+#DATA is a bond file that loader can read (.csv, .parquet, .feather/.arrow/.ipc), or a directory written by convert.
+#Results are written to stdout (or to --output) as CSV by default, or as JSON or .npy with --format.
+#
+#Each subcommand only imports the modules it needs when it runs (pandas only for bond files, matplotlib only for plot),
+#so reading from a converted directory, 'ytm' starts in a fraction of a second.
+#Numba is likewise only imported with --backend numba.
+
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(prog='cli.py', description='YTM, spot, and forward curve calculations for a universe of bonds.')
+	parser.add_argument('--backend', choices=['numpy', 'numba'], help='compute backend (see kernels; by default, $YTM_BACKEND or numpy)')
+	commands = parser.add_subparsers(dest='command', required=True)
+
+	for name, help in [('ytm', 'YTM of every bond on every day'),
+			('spot', 'point-estimates for the spot curve(s)'),
+			('forward', 'point-estimates for the 1-year forward curve(s)'),
+			('pca', 'eigenvalues and eigenvectors of the covariance matrix of daily log-returns')]:
+		command = commands.add_parser(name, help=help)
+		_addData(command)
+		command.add_argument('--format', choices=['csv', 'json', 'npy'], default='csv', help='output format (npy needs --output)')
+		command.add_argument('--output', '-o', help='where to write the result (by default, stdout)')
+		if name == 'pca':
+			command.add_argument('--of', choices=['ytm', 'forward'], default='ytm', help='which rates to take the log-returns of')
+			command.add_argument('--bonds', type=int, nargs='+', help='rows of the bonds to include (for --of ytm; by default, all)')
+
+	command = commands.add_parser('plot', help='write the YTM, spot, and forward plots to a directory')
+	_addData(command)
+	command.add_argument('--directory', '-d', default='plots', help='where to write the plots')
+	command.add_argument('--file-format', default='png', help='image format (png, svg, pdf, ...)')
+
+	command = commands.add_parser('convert', help='convert a bond file into a directory of memory-mapped files (for fast loading)')
+	command.add_argument('data', help='the bond file')
+	command.add_argument('directory', help='the directory to write to')
+
+	command = commands.add_parser('serve', help='reprice the curves as price ticks "date,ISIN,price" arrive, writing each update as a JSON line')
+	_addData(command)
+	source = command.add_mutually_exclusive_group()
+	source.add_argument('--port', type=int, default=9999, help='local TCP port to read ticks from')
+	source.add_argument('--tail', help='file to follow for ticks instead of a socket')
+	command.add_argument('--coalesce', type=float, default=0.0, help='seconds to wait for more ticks before recalculating')
+	command.add_argument('--stop-after', type=float, help='stop once no ticks have arrived for this many seconds')
+
+	args = parser.parse_args(argv)
+	if args.backend:
+		import kernels
+		kernels.setBackend(args.backend)
+	COMMANDS[args.command](args)
+	return 0
+
+
+def _addData(command):
+	command.add_argument('data', help='a bond file (.csv, .parquet, .feather/.arrow/.ipc) or a directory written by convert')
+
+
+
+#Load the bonds and the date of each day
+def _load(path):
+	if os.path.isdir(path):
+		from mappedPipeline import openUniverse
+		return openUniverse(path)
+	import loader
+	return loader.load(path)
+
+
+def _startDate(dates):
+	return dates[0].astype('datetime64[us]').item()
+
+
+def _dateLabels(dates):
+	return [[date] for date in dates.astype(str)]
+
+
+def _spotArray(universe, dates):
+	from spotCurve import spotCurve
+	return spotCurve(universe, _startDate(dates), dates=dates).calcPointsArray()
+
+
+def _forwardArray(spotArray):
+	import numpy as np
+	from forwardCurve import forwardCurve
+	frwd = forwardCurve(spotArray)
+	frwd.calcRates()
+	return np.array(frwd.getForwardArray())
+
+
+
+def ytm(args):
+	universe, dates = _load(args.data)
+	ytms = universe.calcYTMs(dates)
+	_write(args, ytms.T, ['date'] + list(universe.getISINs()), _dateLabels(dates))
+
+
+def spot(args):
+	import numpy as np
+	universe, dates = _load(args.data)
+	points = _spotArray(universe, dates)
+	if args.format == 'npy':
+		_write(args, points)
+		return
+	#One row per (day, bond) point-estimate
+	numBonds = points.shape[1]
+	rows = np.column_stack([points[:, :, 0].ravel(), points[:, :, 1].ravel()])
+	labels = zip(np.repeat(dates, numBonds).astype(str), np.tile(universe.getISINs(), len(dates)))
+	_write(args, rows, ['date', 'isin', 'r', 'T'], labels)
+
+
+def forward(args):
+	from forwardCurve import START, TENORS
+	universe, dates = _load(args.data)
+	forwards = _forwardArray(_spotArray(universe, dates))
+	_write(args, forwards, ['date'] + [f'{START}y{START + tenor}y' for tenor in TENORS], _dateLabels(dates))
+
+
+def pca(args):
+	import numpy as np
+	from util import calcLogArray, calcPCA
+	universe, dates = _load(args.data)
+	if args.of == 'ytm':
+		rates = universe.calcYTMs(dates).T
+		if args.bonds:
+			rates = rates[:, args.bonds]
+	else:
+		rates = _forwardArray(_spotArray(universe, dates))
+
+	eigVals, eigVecs = calcPCA(np.cov(calcLogArray(rates), rowvar=False))
+	#One row per eigenvalue, followed by its eigenvector
+	rows = np.column_stack([eigVals, eigVecs.T])
+	_write(args, rows, ['eigenvalue'] + ['v' + str(i+1) for i in range(eigVecs.shape[0])])
+
+
+def plot(args):
+	universe, dates = _load(args.data)
+	from plotter import plotter
+	spotArray = _spotArray(universe, dates)
+	pltt = plotter(universe.calcYTMs(dates), universe.timesToMaturity(_startDate(dates)), spotArray, _forwardArray(spotArray))
+	for path in pltt.renderAll(args.directory, args.file_format):
+		print(path)
+
+
+def convert(args):
+	from mappedPipeline import convert
+	convert(args.data, args.directory)
+
+
+
+def serve(args):
+	import asyncio
+	import json
+	from priceFeed import curveService, readSocket, tailFile
+	universe, dates = _load(args.data)
+
+	async def run():
+		service = curveService.fromUniverse(universe, dates, coalesceDelay=args.coalesce)
+		updates = service.subscribe()
+
+		async def publish():
+			while True:
+				update = await updates.get()
+				print(json.dumps({'date': str(update['date']), 'forward': update['forward'].tolist(),
+					'ticks': update['ticks'], 'latency': update['latency']}), flush=True)
+
+		printer = asyncio.create_task(publish())
+		source = tailFile(args.tail, stopAfter=args.stop_after) if args.tail else readSocket(port=args.port, stopAfter=args.stop_after)
+		try:
+			await service.run(source)
+			while not updates.empty():
+				await asyncio.sleep(0)
+		finally:
+			printer.cancel()
+			print(json.dumps(service.getStats()), file=sys.stderr)
+
+	asyncio.run(run())
+
+
+#Write a (rows x columns) result as CSV, JSON, or .npy.
+#'labels' holds the label columns (e.g. the date) in front of each row, and 'header' names the label and value columns.
+def _write(args, rows, header=None, labels=None):
+	import numpy as np
+	rows = np.asarray(rows)
+	if args.format == 'npy':
+		if args.output is None:
+			raise SystemExit('--format npy needs --output')
+		np.save(args.output, rows)
+		return
+
+	values = [[None if v != v else v for v in row] for row in rows.tolist()]	#NaN is written as null/empty
+	if labels is not None:
+		values = [list(label) + row for label, row in zip(labels, values)]
+
+	out = open(args.output, 'w', newline='') if args.output else sys.stdout
+	try:
+		if args.format == 'json':
+			import json
+			json.dump(values if header is None else [dict(zip(header, row)) for row in values], out)
+			out.write('\n')
+		else:
+			import csv
+			writer = csv.writer(out)
+			if header is not None:
+				writer.writerow(header)
+			writer.writerows(values)
+	finally:
+		if out is not sys.stdout:
+			out.close()
+
+
+COMMANDS = {
+	'ytm': ytm,
+	'spot': spot,
+	'forward': forward,
+	'pca': pca,
+	'plot': plot,
+	'convert': convert,
+	'serve': serve,
+}
+
+
+if __name__ == '__main__':
+	sys.exit(main())
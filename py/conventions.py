@@ -0,0 +1,151 @@
+import numpy as np
+
+
+
+#conventions is a utility module for the coupon frequency and day count convention of each bond.
+#
+#The conventions are stored as small integers, one per bond (e.g. in a bondUniverse), so that a universe with
+#mixed conventions is handled by the same array operations as one with a single convention:
+#	-the coupon frequency is the number of coupons per year (1 = annual, 2 = semi-annual, 4 = quarterly),
+#	-the day count is one of the codes in DAY_COUNTS:
+#		ACT/365: actual days / 365 (the default, as in the rest of the calculations),
+#		ACT/ACT: actual days / (frequency x actual days in the coupon period), i.e. ACT/ACT ICMA,
+#		30/360: days counted with 30-day months / 360 (the 30/360 bond basis).
+#
+#yearFractions calculates the year fraction of every bond at once: the day counts of both kinds (actual and 30/360)
+#are calculated as whole arrays, and each bond picks its own numerator and basis with np.where, so there is no
+#per-bond Python branching. The 30/360 day counts are only calculated when some bond uses them.
+#For the default conventions, the year fractions are exactly days/365, as before.
+
+
+
+ACT_365 = 0
+ACT_ACT = 1
+THIRTY_360 = 2
+DAY_COUNTS = {'ACT/365': ACT_365, 'ACT/ACT': ACT_ACT, '30/360': THIRTY_360}
+FREQUENCIES = {'annual': 1, 'semi-annual': 2, 'quarterly': 4}
+
+
+
+def dayCountCodes(dayCounts):
+	"""
+	Convert day count conventions given by name (see DAY_COUNTS, e.g. 'ACT/365') or by code into codes.
+
+	Parameters
+	----------
+	dayCounts : array_like of str or int
+
+	Returns
+	-------
+	numpy.ndarray of int64
+	"""
+	values = np.asarray(dayCounts)
+	if values.dtype.kind in 'iu':
+		codes = values.astype(np.int64)
+	else:
+		names, inverse = np.unique(np.char.upper(np.char.strip(values.astype(str))), return_inverse=True)
+		unknown = [name for name in names if name not in DAY_COUNTS]
+		if unknown:
+			raise ValueError('Unknown day count convention(s): ' + ', '.join(unknown) + ' (choose from ' + ', '.join(DAY_COUNTS) + ')')
+		codes = np.array([DAY_COUNTS[name] for name in names], dtype=np.int64)[inverse].reshape(values.shape)
+	if not np.isin(codes, list(DAY_COUNTS.values())).all():
+		raise ValueError('Unknown day count code(s) in ' + str(np.unique(codes)))
+	return codes
+
+
+def frequencyCounts(frequencies):
+	"""
+	Convert coupon frequencies given by name (see FREQUENCIES, e.g. 'quarterly') or as coupons per year into coupons per year.
+
+	Parameters
+	----------
+	frequencies : array_like of str or int
+
+	Returns
+	-------
+	numpy.ndarray of int64
+	"""
+	values = np.asarray(frequencies)
+	if values.dtype.kind == 'f' and (values != np.round(values)).any():
+		raise ValueError('Coupon frequencies must be whole numbers of coupons per year, not ' + str(np.unique(values[values != np.round(values)])))
+	if values.dtype.kind in 'iuf':
+		counts = values.astype(np.int64)
+	else:
+		names, inverse = np.unique(np.char.lower(np.char.strip(values.astype(str))), return_inverse=True)
+		counts = np.array([FREQUENCIES[name] if name in FREQUENCIES else _parseCount(name) for name in names], dtype=np.int64)
+		counts = counts[inverse].reshape(values.shape)
+	if ((counts <= 0) | (12 % np.maximum(counts, 1) != 0)).any():
+		raise ValueError('Coupon frequencies must divide 12 months evenly, not ' + str(np.unique(counts)))
+	return counts
+
+
+#A frequency written as a number (e.g. "2" in a CSV column of names)
+def _parseCount(name):
+	try:
+		count = float(name)
+	except ValueError:
+		count = None
+	if count is None or not count.is_integer():
+		raise ValueError('Unknown coupon frequency: ' + name + ' (choose from ' + ', '.join(FREQUENCIES) + ', or whole coupons per year)')
+	return int(count)
+
+
+
+def days360(start, end):
+	"""
+	Count the days between two arrays of dates with 30-day months (the 30/360 bond basis):
+	a start on the 31st counts as the 30th, and so does an end on the 31st if the start is on the 30th or 31st.
+
+	Parameters
+	----------
+	start : array_like of datetime64[D]
+	end : array_like of datetime64[D]
+
+	Returns
+	-------
+	numpy.ndarray of int64
+	"""
+	start = np.asarray(start, dtype='datetime64[D]')
+	end = np.asarray(end, dtype='datetime64[D]')
+	startMonths, endMonths = start.astype('datetime64[M]'), end.astype('datetime64[M]')
+	startDay = np.minimum((start - startMonths.astype('datetime64[D]')).astype(np.int64) + 1, 30)
+	endDay = (end - endMonths.astype('datetime64[D]')).astype(np.int64) + 1
+	endDay = np.where(startDay == 30, np.minimum(endDay, 30), endDay)
+	return 30*(endMonths - startMonths).astype(np.int64) + endDay - startDay
+
+
+def yearFractions(start, end, dayCounts, periodStart, periodEnd, frequencies):
+	"""
+	Calculate the year fraction between two arrays of dates under each bond's day count convention.
+
+	Parameters
+	----------
+	start : array_like of datetime64[D]
+	end : array_like of datetime64[D]
+	dayCounts : array_like of int
+		The day count code of each bond (see DAY_COUNTS)
+	periodStart, periodEnd : array_like of datetime64[D]
+		The coupon period the dates fall in (the last and next coupon dates), used by ACT/ACT
+	frequencies : array_like of int
+		The number of coupons per year of each bond, used by ACT/ACT
+
+	Returns
+	-------
+	numpy.ndarray
+		The year fractions, with the broadcast shape of the inputs
+	"""
+	start = np.asarray(start, dtype='datetime64[D]')
+	end = np.asarray(end, dtype='datetime64[D]')
+	dayCounts = np.asarray(dayCounts)
+	days = (end - start).astype(np.int64)
+	basis = 365
+
+	is360 = dayCounts == THIRTY_360
+	if is360.any():
+		days = np.where(is360, days360(start, end), days)
+		basis = np.where(is360, 360, basis)
+	isActual = dayCounts == ACT_ACT
+	if isActual.any():
+		periodDays = (np.asarray(periodEnd, dtype='datetime64[D]') - np.asarray(periodStart, dtype='datetime64[D]')).astype(np.int64)
+		basis = np.where(isActual, np.asarray(frequencies)*periodDays, basis)
+	return days/basis
@@ -0,0 +1,134 @@
+import numpy as np
+
+from forwardCurve import forwardCurve
+import cashFlows
+from conventions import ACT_365, dayCountCodes, frequencyCounts
+
+
+
+#curveUpdater is a utility class.
+#
+#A curveUpdater object stores the terms of a fixed set of bonds (as in spotCurve, sorted by maturity),
+#and builds up the YTM(s), spot curve(s), and 1-year forward curve(s) one day at a time as new clean prices arrive.
+#
+#Each update only calculates the new day's YTMs, spot curve, and forward curve, so the time taken
+#by an update does not depend on how long the history is. The YTMs are solved starting from the previous day's YTMs.
+#The YTMs and the spot curve come from the day's cashFlows.cashFlowSchedule, which is cached, so updating
+#the same day again (e.g. with intraday prices) does not rebuild the cash flows.
+#
+#Updating the most recent day again (e.g. with intraday prices) replaces that day instead of adding a new one.
+
+
+
+class curveUpdater:
+
+	#Constructor
+	def __init__(self, coupons, issueDates, maturities, frequencies=2, dayCounts=ACT_365):
+		self.coupons = np.asarray(coupons, dtype=float)
+		self.issueDates = np.asarray(issueDates, dtype='datetime64[D]')
+		self.maturities = np.asarray(maturities, dtype='datetime64[D]')
+		self.frequencies = frequencyCounts(frequencies)	#coupons per year (see conventions)
+		self.dayCounts = dayCountCodes(dayCounts)		#day count codes (see conventions)
+		self.dates = []				#stores the date of each day
+		self.ytmArray = []			#stores the YTMs of the bonds on each day
+		self.pointsArray = []		#stores point-estimates for the spot curve on each day
+		self.forwardArray = []		#stores point-estimates for the forward curve on each day
+
+
+	#Build a curveUpdater for the bonds of a bondUniverse
+	@classmethod
+	def fromUniverse(cls, universe):
+		return cls(universe.getCoupons(), universe.getIssueDates(), universe.getMaturities(), universe.getFrequencies(), universe.getDayCounts())
+
+
+
+	#Getter methods:
+
+	def getDates(self):
+		return np.array(self.dates, dtype='datetime64[D]')
+
+	def getYTMArray(self):
+		return self.ytmArray
+
+	def getPointsArray(self):
+		return self.pointsArray
+
+	def getForwardArray(self):
+		return self.forwardArray
+
+
+
+
+	def update(self, date, cleanPrices):
+		"""
+		Given one day's clean prices of the bonds, calculate that day's YTMs, spot curve, and 1-year forward curve,
+		and add them to the history (or replace the most recent day if the date is the same).
+
+		Parameters
+        ----------
+        date : datetime
+            The date of the clean prices
+        cleanPrices : array_like
+            The clean price of each bond
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+           (the YTM of each bond, the point-estimates for the spot curve, the point-estimates for the forward curve)
+		"""
+		date = np.datetime64(date, 'D')
+		cleanPrices = np.asarray(cleanPrices, dtype=float)
+
+		if self.dates and date == self.dates[-1]:	#Same day: drop the old values for the day before recalculating it
+			self.dates.pop()
+			previousYTMs = self.ytmArray.pop()
+			self.pointsArray.pop()
+			self.forwardArray.pop()
+		elif self.dates and date < self.dates[-1]:
+			raise ValueError('Prices must arrive in date order: ' + str(date) + ' is before ' + str(self.dates[-1]))
+		else:
+			previousYTMs = self.ytmArray[-1] if self.ytmArray else 0
+
+		YTMs, points, forwards = calcDay(self.coupons, self.maturities, date, cleanPrices, previousYTMs,
+			self.frequencies, self.dayCounts)
+
+		self.dates.append(date)
+		self.ytmArray.append(YTMs)
+		self.pointsArray.append(points)
+		self.forwardArray.append(forwards)
+		return YTMs, points, forwards
+
+
+
+def calcDay(coupons, maturities, date, cleanPrices, initialGuess=0, frequencies=2, dayCounts=ACT_365):
+	"""
+	Calculate one day's YTMs, spot curve, and 1-year forward curve from the bonds' clean prices.
+	This is the calculation behind curveUpdater.update, without any state (so it can be run in a worker process).
+
+	Parameters
+	----------
+	coupons, maturities : array_like
+		The terms of the bonds (sorted by maturity; the coupon schedules run back from maturity)
+	date : datetime64[D]
+		The date of the clean prices
+	cleanPrices : array_like
+		The clean price of each bond
+	initialGuess : array_like
+		The initial guess(es) for the YTMs (e.g. the previous day's YTMs)
+	frequencies, dayCounts : array_like of int
+		The coupons per year and day count codes of the bonds (semi-annual and ACT/365 by default, see conventions)
+
+	Returns
+	-------
+	tuple of numpy.ndarray
+		(the YTM of each bond, the point-estimates for the spot curve, the point-estimates for the forward curve)
+	"""
+	date = np.datetime64(date, 'D')
+	cleanPrices = np.asarray(cleanPrices, dtype=float)
+	schedule = cashFlows.forDate(coupons, maturities, date, frequencies, dayCounts)
+	YTMs = schedule.calcYTMs(cleanPrices, initialGuess)
+	points = schedule.calcSpotPoints(cleanPrices)
+
+	frwd = forwardCurve([points])
+	frwd.calcRates()
+	return YTMs, points, np.array(frwd.getForwardArray()[0])
@@ -0,0 +1,139 @@
+from collections import OrderedDict
+import bisect
+import math
+
+
+
+#discountCurve is a utility class that is meant to be used together with the spotCurve class.
+#
+#A discountCurve object stores the point-estimates (r, T) for the spot curve on a single day,
+#and interpolates between them linearly (with r=0 at T=0), in the same way as the boot-strapping process.
+#
+#The interpolated zero rates and discount factors are cached by time point, so cash flows that fall on
+#the same time point (e.g. the coupons of bonds that pay on the same dates) are only interpolated and discounted once.
+#The cache holds at most 'maxSize' time points, dropping the least recently used ones first.
+#
+#Once the spot curve is built, a discountCurve object can also be used to price arbitrary cash flows.
+
+
+
+class discountCurve:
+
+	#Constructor
+	def __init__(self, maxSize=1024):
+		self.rates = []				#point-estimates for the spot rate
+		self.times = []				#times (in years) of the point-estimates, in increasing order
+		self.maxSize = maxSize
+		self.cache = OrderedDict()	#(segment, time) -> (zero rate, discount factor)
+
+
+	#Build a discountCurve from an array of point-estimates [r, T] (e.g. one day of a spotCurve's pointsArray)
+	@classmethod
+	def fromPoints(cls, points, maxSize=1024):
+		curve = cls(maxSize)
+		for r, t in points:
+			curve.addPoint(r, t)
+		return curve
+
+
+
+	#Getter methods:
+
+	def getRates(self):
+		return self.rates
+
+	def getTimes(self):
+		return self.times
+
+
+
+
+	#Add a point-estimate to the end of the curve
+	def addPoint(self, r, t):
+		self.rates.append(r)
+		self.times.append(t)
+
+
+	def zeroRate(self, t, segment=None):
+		"""
+		Interpolate the spot rate at time t.
+
+		Parameters
+        ----------
+        t : float
+            The time (in years)
+        segment : int
+            Interpolate between point-estimates segment-2 and segment-1 (where point-estimate -1 is r=0 at T=0),
+            as the boot-strapping process does for its j-th coupon. By default, the segment containing t is used.
+
+        Returns
+        -------
+        float
+           The interpolated spot rate
+		"""
+		return self._lookup(t, segment)[0]
+
+
+	def discountFactor(self, t, segment=None):
+		"""
+		Calculate the discount factor exp(-r*t) at time t, using the interpolated spot rate r.
+
+		Parameters
+        ----------
+        t : float
+            The time (in years)
+        segment : int
+            As in zeroRate
+
+        Returns
+        -------
+        float
+           The discount factor
+		"""
+		return self._lookup(t, segment)[1]
+
+
+	def price(self, times, flows):
+		"""
+		Calculate the present value of a set of cash flows.
+
+		Parameters
+        ----------
+        times : list of float
+            The time (in years) of each cash flow
+        flows : list of float
+            The amount of each cash flow
+
+        Returns
+        -------
+        float
+           The sum of the discounted cash flows
+		"""
+		return sum(flow*self.discountFactor(t) for t, flow in zip(times, flows))
+
+
+	#Find (or calculate and cache) the zero rate and discount factor at time t
+	def _lookup(self, t, segment):
+		if segment is None:
+			#The first segment whose end is at or after t (the last segment extrapolates beyond the curve)
+			segment = min(bisect.bisect_left(self.times, t), len(self.times) - 1) + 1
+
+		key = (segment, t)
+		if key in self.cache:
+			self.cache.move_to_end(key)
+			return self.cache[key]
+
+		rPrev = 0
+		tPrev = 0
+		if segment != 1:
+			rPrev = self.rates[segment-2]
+			tPrev = self.times[segment-2]
+		rNext = self.rates[segment-1]
+		tNext = self.times[segment-1]
+		rTime = rPrev + (rNext - rPrev)/(tNext - tPrev)*(t-tPrev)
+
+		value = (rTime, math.exp(-rTime*t))
+		self.cache[key] = value
+		if len(self.cache) > self.maxSize:
+			self.cache.popitem(last=False)
+		return value
@@ -0,0 +1,143 @@
+import numpy as np
+
+
+
+#forwardEngine is a utility module that is meant to be used together with the spotCurve class.
+#
+#It takes in an array of point-estimates for spot curve(s) generated by a spotCurve object (days x bonds x 2),
+#and calculates the forward rates for every combination of start time and tenor on every day at once:
+#	f(s, s+tau) = (r(s+tau)*(s+tau) - r(s)*s)/tau
+#where r(T) is the spot rate at time T, found by linear interpolation between the point-estimates
+#(with r=0 at T=0, and extrapolating past the last point-estimate), as in spotCurve and forwardCurve.
+#
+#The bracketing point-estimates for each time are located for all days at once (a binary search on every day's points),
+#and the result is a (days x starts x tenors) forward cube. The days are processed in chunks, and the end times
+#s+tau of each chunk in groups of start times, so that at most CHUNK_POINTS (day, time) pairs are interpolated at once
+#and memory use stays bounded however large the grid of start times and tenors is.
+
+
+
+CHUNK_POINTS = 2**20	#largest number of (day, time) pairs interpolated at once by iterForwardCube
+
+
+
+def interpolateSpot(spotArray, times):
+	"""
+	Linearly interpolate the spot rate at the given times on every day.
+
+	Parameters
+	----------
+	spotArray : array_like
+		The (days x bonds x 2) point-estimates [r, T] for the spot curve(s), with T increasing along each day
+	times : array_like
+		The times (in years) to interpolate at
+
+	Returns
+	-------
+	numpy.ndarray
+		The (days x times) interpolated spot rates
+	"""
+	spotArray = np.asarray(spotArray, dtype=float)
+	times = np.asarray(times, dtype=float)
+	numDays = spotArray.shape[0]
+
+	#Put the point r=0 at T=0 in front of each day's points
+	rates = np.concatenate([np.zeros((numDays, 1)), spotArray[:, :, 0]], axis=1)
+	knots = np.concatenate([np.zeros((numDays, 1)), spotArray[:, :, 1]], axis=1)
+
+	#For each day and time, the first point at or after the time (a row-wise searchsorted), kept inside the curve
+	nextIndex = _searchRows(knots, times)
+	nextIndex = np.clip(nextIndex, 1, knots.shape[1] - 1)
+	prevIndex = nextIndex - 1
+
+	rPrev = np.take_along_axis(rates, prevIndex, axis=1)
+	rNext = np.take_along_axis(rates, nextIndex, axis=1)
+	tPrev = np.take_along_axis(knots, prevIndex, axis=1)
+	tNext = np.take_along_axis(knots, nextIndex, axis=1)
+	return rPrev + (rNext - rPrev)/(tNext - tPrev)*(times-tPrev)
+
+
+#For each row of the sorted (days x knots) array and each time, count the knots before the time (np.searchsorted on
+#every row). When every row has the same knots (e.g. shocked copies of one curve), one searchsorted is enough.
+#Otherwise the binary search runs on all the rows at once, taking power-of-two steps, so it only needs (days x times) arrays
+#whatever the number of knots.
+def _searchRows(knots, times):
+	numDays, numKnots = knots.shape
+	if numDays == 0 or (knots == knots[0]).all():
+		return np.broadcast_to(np.searchsorted(knots[0] if numDays else knots.ravel(), times), (numDays, len(times)))
+	count = np.zeros((numDays, len(times)), dtype=np.int64)
+	step = 1 << (numKnots.bit_length() - 1)
+	while step:
+		candidate = count + step
+		isBefore = (np.take_along_axis(knots, np.minimum(candidate, numKnots) - 1, axis=1) < times) & (candidate <= numKnots)
+		count = np.where(isBefore, candidate, count)
+		step >>= 1
+	return count
+
+
+
+def iterForwardCube(spotArray, starts, tenors, chunkSize=1000):
+	"""
+	Calculate the forward cube one chunk of days at a time.
+
+	Parameters
+	----------
+	spotArray : array_like
+		The (days x bonds x 2) point-estimates for the spot curve(s)
+	starts : array_like
+		The start times s (in years)
+	tenors : array_like
+		The tenors tau (in years)
+	chunkSize : int
+		The (largest) number of days in each chunk (fewer for grids of more than CHUNK_POINTS/chunkSize end times)
+
+	Yields
+	------
+	tuple
+		(slice of the days in the chunk, (chunk days x starts x tenors) numpy.ndarray of forward rates)
+	"""
+	spotArray = np.asarray(spotArray, dtype=float)
+	starts = np.asarray(starts, dtype=float)
+	tenors = np.asarray(tenors, dtype=float)
+	ends = starts[:, None] + tenors[None, :]
+	chunkSize = max(1, min(chunkSize, CHUNK_POINTS // max(ends.size, 1)))
+	startsPerGroup = max(1, CHUNK_POINTS // (chunkSize*max(len(tenors), 1)))
+
+	for start in range(0, spotArray.shape[0], chunkSize):
+		days = slice(start, start + chunkSize)
+		rStart = interpolateSpot(spotArray[days], starts)[:, :, None]
+		rEnd = np.empty((len(rStart),) + ends.shape)
+		for first in range(0, len(starts), startsPerGroup):
+			group = slice(first, first + startsPerGroup)
+			rEnd[:, group] = interpolateSpot(spotArray[days], ends[group].ravel()).reshape(len(rStart), -1, len(tenors))
+		yield days, (rEnd*ends - rStart*starts[:, None])/tenors[None, :]
+
+
+
+def calcForwardCube(spotArray, starts, tenors, chunkSize=1000, out=None):
+	"""
+	Calculate the forward rate for every start time and tenor on every day.
+
+	Parameters
+	----------
+	spotArray : array_like
+		The (days x bonds x 2) point-estimates for the spot curve(s)
+	starts : array_like
+		The start times s (in years)
+	tenors : array_like
+		The tenors tau (in years)
+	chunkSize : int
+		The number of days to process at a time
+	out : numpy.ndarray
+		Where to write the (days x starts x tenors) result (e.g. a numpy.memmap); allocated if not given
+
+	Returns
+	-------
+	numpy.ndarray
+		The (days x starts x tenors) forward cube
+	"""
+	if out is None:
+		out = np.empty((len(spotArray), len(starts), len(tenors)))
+	for days, block in iterForwardCube(spotArray, starts, tenors, chunkSize):
+		out[days] = block
+	return out
@@ -0,0 +1,297 @@
+import functools
+import importlib
+import json
+import sys
+import time
+
+import yieldSolver
+
+
+
+#instrumentation is a utility module for finding out where the time goes in a run.
+#
+#It is opt-in: calling enable() wraps each of the hot-path functions listed in STAGES with a timer and
+#call counter, and disable() puts the original functions back. While disabled, nothing is wrapped,
+#so the instrumentation costs nothing.
+#
+#The functions are replaced everywhere they are referenced (on their class, in their module, and in any
+#module that imported them by name), so calls made through e.g. 'from batchYTM import calcYTMBatch' are counted too.
+#Nested stages are timed inclusively (e.g. bond.calcYTMs includes the time spent in bond.calcYTM).
+#
+#A profiler (cProfile.Profile by default, or any object with enable() and disable() methods, such as an
+#adapter for a sampling profiler) can be attached to a single stage with profile().
+#
+#The Newton iteration histogram is taken from yieldSolver.STATS (the solves recorded since enable() was called).
+#report() returns a summary that can be written as JSON (toJSON) or in the Prometheus text format (toPrometheus).
+
+
+
+#The instrumented functions, as (module, qualified name) pairs
+STAGES = [
+	('bond', 'bond.couponIndex'),
+	('bond', 'bond.lastCouponDate'),
+	('bond', 'bond.nextCouponDate'),
+	('bond', 'bond.calcYTM'),
+	('bond', 'bond.calcYTMs'),
+	('batchYTM', 'cashFlowMatrix'),
+	('batchYTM', 'calcYTMBatch'),
+	('spotCurve', 'spotCurve.calcFirstPoint'),
+	('spotCurve', 'spotCurve.calcNextPoint'),
+	('spotCurve', 'spotCurve.calcPoints'),
+	('spotCurve', 'spotCurve.calcPointsArray'),
+	('forwardCurve', 'forwardCurve.calcRates'),
+	('util', 'calcLogArray'),
+	('util', 'calcPCA'),
+]
+
+
+
+#stageTimer is a utility class that accumulates the calls and run time of one stage.
+
+class stageTimer:
+
+	#Constructor
+	def __init__(self):
+		self.calls = 0
+		self.seconds = 0.0
+		self.minSeconds = float('inf')
+		self.maxSeconds = 0.0
+
+
+	#Record one call
+	def add(self, seconds):
+		self.calls += 1
+		self.seconds += seconds
+		self.minSeconds = min(self.minSeconds, seconds)
+		self.maxSeconds = max(self.maxSeconds, seconds)
+
+
+	#Return the totals as a dictionary
+	def asDict(self):
+		return {
+			'calls': self.calls,
+			'seconds': self.seconds,
+			'meanSeconds': self.seconds/self.calls if self.calls else 0.0,
+			'minSeconds': self.minSeconds if self.calls else 0.0,
+			'maxSeconds': self.maxSeconds,
+		}
+
+
+
+_timers = {}		#stage name -> stageTimer
+_originals = {}		#stage name -> (owner, attribute name, original function)
+_profilers = {}		#stage name -> [profiler, depth of nested calls]
+_solverBaseline = None
+
+
+
+def isEnabled():
+	return bool(_originals)
+
+
+def enable(stages=None):
+	"""
+	Start timing and counting calls to the given stages.
+
+	Parameters
+	----------
+	stages : list of (str, str)
+		(module, qualified name) pairs of the functions to instrument (by default, STAGES)
+	"""
+	global _solverBaseline
+	if isEnabled():
+		disable()
+	_timers.clear()
+	_solverBaseline = yieldSolver.STATS.asDict()
+
+	for moduleName, qualName in (stages if stages is not None else STAGES):
+		owner = importlib.import_module(moduleName)
+		*path, attribute = qualName.split('.')
+		for name in path:
+			owner = getattr(owner, name)
+
+		original = owner.__dict__[attribute]
+		isStatic = isinstance(original, staticmethod)
+		func = original.__func__ if isStatic else original
+		_timers[qualName] = stageTimer()
+		_originals[qualName] = (owner, attribute, original)
+
+		wrapper = _wrap(qualName, func)
+		setattr(owner, attribute, staticmethod(wrapper) if isStatic else wrapper)
+		if not path:
+			_rebind(func, wrapper)
+
+
+def disable():
+	"""
+	Put the original functions back. The timers are kept until the next enable().
+	"""
+	for qualName, (owner, attribute, original) in _originals.items():
+		wrapper = owner.__dict__[attribute]
+		setattr(owner, attribute, original)
+		if owner is sys.modules.get(getattr(original, '__module__', None)):
+			_rebind(wrapper, original)
+	_originals.clear()
+
+
+def profile(stage, profiler=None):
+	"""
+	Attach a profiler to a single stage, so that it only runs while that stage is running.
+
+	Parameters
+	----------
+	stage : str
+		The qualified name of the stage (e.g. 'spotCurve.calcNextPoint')
+	profiler : object
+		Any object with enable() and disable() methods (by default, a new cProfile.Profile)
+
+	Returns
+	-------
+	object
+		The profiler (e.g. to call print_stats() or dump_stats() on it after the run)
+	"""
+	if profiler is None:
+		import cProfile
+		profiler = cProfile.Profile()
+	_profilers[stage] = [profiler, 0]
+	return profiler
+
+
+#Detach the profiler from a stage
+def unprofile(stage):
+	_profilers.pop(stage, None)
+
+
+
+#Wrap a function with a timer (and the stage's profiler, if any)
+def _wrap(stage, func):
+	timer = _timers[stage]
+	clock = time.perf_counter
+
+	@functools.wraps(func)
+	def wrapper(*args, **kwargs):
+		attached = _profilers.get(stage)
+		if attached is not None:
+			attached[1] += 1
+			if attached[1] == 1:
+				attached[0].enable()
+		start = clock()
+		try:
+			return func(*args, **kwargs)
+		finally:
+			timer.add(clock() - start)
+			if attached is not None:
+				attached[1] -= 1
+				if attached[1] == 0:
+					attached[0].disable()
+	return wrapper
+
+
+#Replace every module-level reference to 'old' with 'new' (e.g. names imported with 'from module import function')
+def _rebind(old, new):
+	for module in list(sys.modules.values()):
+		namespace = getattr(module, '__dict__', None)
+		if namespace is None:
+			continue
+		for name, value in list(namespace.items()):
+			if value is old:
+				namespace[name] = new
+
+
+
+def report():
+	"""
+	Summarize the timers and the yield solver counters.
+
+	Returns
+	-------
+	dict
+		{'stages': {stage: {'calls', 'seconds', ...}}, 'solver': counters of the solves since enable()}
+	"""
+	solver = yieldSolver.STATS.asDict()
+	if _solverBaseline is not None:
+		baseCounts = _solverBaseline['iterationCounts']
+		for key in ('solves', 'iterations', 'evaluations', 'fallbacks', 'failures'):
+			solver[key] -= _solverBaseline[key]
+		counts = {n: c - baseCounts.get(n, 0) for n, c in solver['iterationCounts'].items()}
+		solver['iterationCounts'] = {n: c for n, c in counts.items() if c}
+
+	return {
+		'stages': {stage: timer.asDict() for stage, timer in _timers.items() if timer.calls},
+		'solver': solver,
+	}
+
+
+def toJSON(path=None):
+	"""
+	Write the report as JSON.
+
+	Parameters
+	----------
+	path : str
+		The file to write to (by default, the JSON is only returned)
+
+	Returns
+	-------
+	str
+		The JSON text
+	"""
+	text = json.dumps(report(), indent=2)
+	if path is not None:
+		with open(path, 'w') as f:
+			f.write(text)
+	return text
+
+
+def toPrometheus(path=None, prefix='ytm'):
+	"""
+	Write the report in the Prometheus text exposition format.
+
+	Parameters
+	----------
+	path : str
+		The file to write to (by default, the text is only returned)
+	prefix : str
+		The prefix of every metric name
+
+	Returns
+	-------
+	str
+		The metrics text
+	"""
+	summary = report()
+	lines = []
+
+	def metric(name, kind, help, samples):
+		lines.append(f'# HELP {prefix}_{name} {help}')
+		lines.append(f'# TYPE {prefix}_{name} {kind}')
+		for labels, value in samples:
+			lines.append(f'{prefix}_{name}{labels} {value}')
+
+	stages = summary['stages']
+	metric('stage_calls_total', 'counter', 'Number of calls to each stage.',
+		[(f'{{stage="{s}"}}', t['calls']) for s, t in stages.items()])
+	metric('stage_seconds_total', 'counter', 'Total run time of each stage (inclusive of nested stages).',
+		[(f'{{stage="{s}"}}', repr(t['seconds'])) for s, t in stages.items()])
+	metric('stage_max_seconds', 'gauge', 'Longest single call to each stage.',
+		[(f'{{stage="{s}"}}', repr(t['maxSeconds'])) for s, t in stages.items()])
+
+	solver = summary['solver']
+	for key in ('solves', 'fallbacks', 'failures'):
+		metric(f'solver_{key}_total', 'counter', f'Number of yield solver {key}.', [('', solver[key])])
+
+	#Cumulative histogram of the number of iterations per solve
+	samples, cumulative = [], 0
+	for n, count in sorted(solver['iterationCounts'].items()):
+		cumulative += count
+		samples.append((f'{{le="{n}"}}', cumulative))
+	samples.append(('{le="+Inf"}', solver['solves']))
+	metric('solver_iterations', 'histogram', 'Number of iterations per yield solve.',
+		[('_bucket' + labels, value) for labels, value in samples] +
+		[('_sum', solver['iterations']), ('_count', solver['solves'])])
+
+	text = '\n'.join(lines) + '\n'
+	if path is not None:
+		with open(path, 'w') as f:
+			f.write(text)
+	return text
@@ -0,0 +1,257 @@
+import math
+import os
+import warnings
+import numpy as np
+
+
+
+#kernels is a utility module with compiled versions of the hot loops, as an optional acceleration backend.
+#
+#The backend is either:
+#	-'numpy' (the default): the vectorized NumPy implementations in batchYTM, spotCurve, and util,
+#	-'numba': the loops below, compiled with Numba's njit the first time the backend is selected.
+#It is selected with setBackend (or the YTM_BACKEND environment variable), and the NumPy implementations
+#ask for a kernel with get(name), which returns None when the NumPy path should be used.
+#If Numba isn't installed, selecting 'numba' warns and stays on 'numpy'. Numba is only imported when it is selected.
+#
+#The kernels run directly on the year fractions (see batchYTM.cashFlowTerms) and prices, one row (or day) at a time,
+#so they don't build the padded cash-flow matrix (or any other temporary array). They do the same calculations as the
+#NumPy path, but not bit for bit: the cash flows are summed in order (NumPy sums pairwise), and exp and log are Numba's,
+#i.e. the platform's libm ones (NumPy may use its own SIMD versions, which can differ by an ulp). The results match the
+#NumPy path to within RTOL and ATOL (see matches, which benchmark uses to check every backend against the first);
+#the solver counters can differ.
+#
+#	solveYTMs: batchYTM.solveRows (Newton's method with the bisection fallback) on the rows of batchYTM.cashFlowMatrix
+#	bootstrap: the boot-strapping loop of spotCurve.calcPointsArray (the compiled spotCurve.calcNextPoint)
+#	logReturns: util.calcLogArray
+
+
+
+BACKENDS = ('numpy', 'numba')
+KERNELS = ('solveYTMs', 'bootstrap', 'logReturns')
+RTOL = 1e-8		#relative tolerance the kernels' results match the NumPy path's to
+ATOL = 1e-12	#absolute tolerance (for results near zero, e.g. the log-returns of nearly equal yields)
+
+_backend = 'numpy'
+_compiled = {}		#name -> compiled kernel (once 'numba' has been selected)
+
+
+
+def setBackend(name):
+	"""
+	Select the backend used by the calculations from now on.
+
+	Parameters
+	----------
+	name : str
+		'numpy' or 'numba'
+
+	Returns
+	-------
+	str
+		The backend in effect ('numpy' if Numba was asked for but isn't installed)
+	"""
+	global _backend
+	if name not in BACKENDS:
+		raise ValueError('Unknown backend: ' + str(name) + ' (choose from ' + ', '.join(BACKENDS) + ')')
+	if name == 'numba' and not _compile():
+		warnings.warn('Numba is not installed, so the numpy backend is used instead')
+		name = 'numpy'
+	_backend = name
+	return _backend
+
+
+def getBackend():
+	return _backend
+
+
+def isAvailable():
+	"""
+	Returns
+	-------
+	bool
+		Whether the numba backend can be selected
+	"""
+	return _compile()
+
+
+def get(name):
+	"""
+	Return a compiled kernel if the numba backend is selected (None otherwise).
+	"""
+	return _compiled[name] if _backend == 'numba' else None
+
+
+def matches(result, expected):
+	"""
+	Check that a result of the compiled kernels matches the NumPy path's to within RTOL and ATOL.
+
+	Parameters
+	----------
+	result : array_like
+	expected : array_like
+
+	Returns
+	-------
+	bool
+		Whether the arrays have the same shape and every value matches (NaNs match NaNs)
+	"""
+	result, expected = np.asarray(result), np.asarray(expected)
+	return result.shape == expected.shape and bool(np.allclose(result, expected, rtol=RTOL, atol=ATOL, equal_nan=True))
+
+
+#Compile every kernel (once), returning False if Numba isn't installed
+def _compile():
+	if _compiled:
+		return True
+	try:
+		import numba
+	except ImportError:
+		return False
+
+	jit = numba.njit(cache=True, error_model='numpy')
+	global _priceRow
+	_priceRow = jit(_priceRow)
+	_compiled['solveYTMs'] = jit(_solveYTMs)
+	_compiled['bootstrap'] = jit(_bootstrap)
+	_compiled['logReturns'] = jit(_logReturns)
+	_warmUp()
+	return True
+
+
+#Call each kernel once on a tiny input of the types the calculations pass, so that selecting the backend compiles them
+#(or loads them from Numba's cache) instead of the first calculation
+def _warmUp():
+	ones, days = np.ones(1), np.ones(1, dtype=np.int64)
+	_compiled['solveYTMs'](ones, ones, ones, ones, days, days, ones, ones, 1, 0.1, -1.0, 1.0)
+	#spotCurve.calcPointsArray passes read-only views of the inputs that didn't need broadcasting
+	for grid, dayGrid in [(ones[:, None], days[:, None]), (np.broadcast_to(ones, (1, 1)), np.broadcast_to(days, (1, 1)))]:
+		_compiled['bootstrap'](ones, days, grid, grid, grid, dayGrid, np.zeros((1, 2)), np.zeros((1, 2)))
+	#util.calcLogArray passes C-ordered, F-ordered (e.g. transposed), or non-contiguous data, with a C- or F-ordered output
+	#(with at least two rows and columns, so that Numba doesn't see a C-ordered array as F-ordered or vice versa)
+	data = np.ones((3, 4))
+	for values in [data[:, :2].copy(), data[:, :2].copy(order='F'), data[:, ::2]]:
+		for order in 'CF':
+			_compiled['logReturns'](values, np.empty((2, 2), order=order))
+
+
+
+
+#The DCF and time-weighted DCF of one row of the cash-flow matrix at yield r
+def _priceRow(couponFlow, timeToCoupon, timeToMaturity, numCoupons, frequency, r):
+	DCF = 100*math.exp(-r*timeToMaturity)
+	deriv = timeToMaturity*DCF
+	for k in range(numCoupons):
+		time = timeToCoupon + k/frequency
+		discounted = couponFlow*math.exp(-r*time)
+		DCF += discounted
+		deriv += time*discounted
+	return DCF, deriv
+
+
+def _solveYTMs(coupons, accruedInterest, timesToCoupon, timesToMaturity, numCoupons, frequencies, cleanPrices, initialGuess,
+		maxIterations, tolerance, bracketLo, bracketHi):
+	"""
+	Solve for the YTM of every row of the cash-flow matrix, as batchYTM.solveRows does.
+
+	Returns
+	-------
+	tuple of numpy.ndarray
+		(YTMs, iterations, evaluations, whether each row fell back to bisection)
+	"""
+	numRows = len(coupons)
+	r = np.empty(numRows)
+	iterations = np.zeros(numRows, dtype=np.int64)
+	evaluations = np.zeros(numRows, dtype=np.int64)
+	isFallback = np.zeros(numRows, dtype=np.bool_)
+
+	for row in range(numRows):
+		couponFlow = coupons[row]/frequencies[row]
+		timeToCoupon = timesToCoupon[row]
+		timeToMaturity = timesToMaturity[row]
+		frequency = frequencies[row]
+		dirtyPrice = cleanPrices[row] + accruedInterest[row]
+
+		#Newton's method
+		yld = initialGuess[row]
+		converged = False
+		for _ in range(maxIterations):
+			DCF, deriv = _priceRow(couponFlow, timeToCoupon, timeToMaturity, numCoupons[row], frequency, yld)
+			error = dirtyPrice - DCF
+			if not math.isfinite(error) or deriv == 0:
+				break
+			if not abs(error) > tolerance:
+				converged = True
+				break
+			iterations[row] += 1
+			yld -= error/deriv
+		evaluations[row] = iterations[row] + 1
+		if converged:
+			r[row] = yld
+			continue
+
+		#Bisection on the bracket (widened if needed)
+		isFallback[row] = True
+		lo, hi = bracketLo, bracketHi
+		for _ in range(6):
+			if _priceRow(couponFlow, timeToCoupon, timeToMaturity, numCoupons[row], frequency, lo)[0] < dirtyPrice:
+				lo = 2*lo
+			if _priceRow(couponFlow, timeToCoupon, timeToMaturity, numCoupons[row], frequency, hi)[0] > dirtyPrice:
+				hi = 2*hi
+		yld = np.nan
+		bisections = maxIterations
+		for i in range(maxIterations):
+			mid = (lo + hi)/2
+			DCF = _priceRow(couponFlow, timeToCoupon, timeToMaturity, numCoupons[row], frequency, mid)[0]
+			if abs(DCF - dirtyPrice) <= tolerance:
+				yld = mid
+				bisections = i + 1
+				break
+			if DCF > dirtyPrice:
+				lo = mid
+			else:
+				hi = mid
+		r[row] = yld
+		iterations[row] += bisections
+		evaluations[row] += bisections + 2
+
+	return r, iterations, evaluations, isFallback
+
+
+def _bootstrap(coupons, frequencies, dirtyPrices, timesToMaturity, timesToCoupon, numCoupons, rPoints, tPoints):
+	"""
+	Boot-strap the spot curve on every day (filling in rPoints and tPoints, which have a point at (r=0, T=0) in front),
+	as spotCurve.calcPointsArray does.
+	"""
+	numBonds, numDays = dirtyPrices.shape
+	for day in range(numDays):
+		for i in range(numBonds):
+			couponFlow = coupons[i]/frequencies[i]
+			finalFlow = 100 + couponFlow
+
+			#Coupon j is interpolated between point-estimates j-2 and j-1
+			DCF = 0.0
+			timeToCoupon = timesToCoupon[i, day]
+			for j in range(1, numCoupons[i, day] + 1):
+				rPrev, rNext = rPoints[day, j-1], rPoints[day, j]
+				tPrev, tNext = tPoints[day, j-1], tPoints[day, j]
+				rTime = rPrev + (rNext - rPrev)/(tNext - tPrev)*(timeToCoupon-tPrev)
+				DCF += couponFlow*math.exp(-rTime*timeToCoupon)
+				timeToCoupon = timeToCoupon + 1/frequencies[i]
+
+			rPoints[day, i+1] = -math.log((dirtyPrices[i, day] - DCF)/finalFlow)/timesToMaturity[i, day]
+			tPoints[day, i+1] = timesToMaturity[i, day]
+
+
+def _logReturns(data, out):
+	"""
+	Fill in the log-returns log(data[t+1]/data[t]) of each column of a 2D array.
+	"""
+	for t in range(data.shape[0] - 1):
+		for j in range(data.shape[1]):
+			out[t, j] = math.log(data[t+1, j]/data[t, j])
+
+
+
+if os.environ.get('YTM_BACKEND'):
+	setBackend(os.environ['YTM_BACKEND'])
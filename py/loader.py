@@ -0,0 +1,203 @@
+import numpy as np
+
+from bondUniverse import bondUniverse
+from conventions import ACT_365
+
+
+
+#loader is a utility module.
+#
+#It reads bond data into a bondUniverse, together with the date of each column of clean prices.
+#
+#Two layouts are supported:
+#	-The wide CSV layout of data/bonds.csv: the columns coupon, ISIN, issue_date, and maturity_date,
+#		a blank separator column, and then one column of clean prices per day with headers like "Jan. 10, 2022".
+#		The columns frequency (e.g. "quarterly" or 4) and day_count (e.g. "30/360") are optional: bonds without them
+#		are semi-annual and ACT/365 (see conventions).
+#	-A columnar binary copy of the same table (Parquet, or Arrow IPC/Feather) for fast repeat runs,
+#		written by save() with ISO dates ("2022-01-10") as the headers of the clean price columns.
+#
+#Files are read in chunks of bonds, so a file never needs to fit in memory all at once when it is streamed with readChunks().
+#pandas (and pyarrow) are only imported when a file is read or written, so importing loader itself is cheap.
+
+
+
+TERM_DATE_FORMAT = '%m/%d/%Y'
+DEFAULT_CONVENTIONS = {'frequency': ('semi-annual', 2), 'day_count': ('ACT/365', ACT_365)}	#(name, code) for bonds without the optional columns
+PRICE_DATE_FORMATS = ('%b %d, %Y', '%B %d, %Y')		#abbreviated ("Jan. 10, 2022") and full ("March 1, 2022") month names
+TERM_COLUMNS = ('coupon', 'ISIN', 'issue_date', 'maturity_date', 'frequency', 'day_count')
+ARROW_SUFFIXES = ('.feather', '.arrow', '.ipc')
+
+
+
+def parsePriceDates(labels):
+	"""
+	Parse the headers of the clean price columns into dates, all at once.
+
+	Headers like "Jan. 10, 2022", "Sept. 1, 2022", or "March 1, 2022" (from the CSV layout) and ISO dates like
+	"2022-01-10" (from the binary layouts) are all understood. Headers that are not dates are returned as NaT.
+
+	Parameters
+	----------
+	labels : array_like of str
+		The column headers
+
+	Returns
+	-------
+	numpy.ndarray of datetime64[D]
+		The date of each column
+	"""
+	import pandas as pd
+	labels = pd.Series(labels, dtype=str)
+	written = labels.str.replace('.', '', regex=False).str.replace('Sept ', 'Sep ', regex=False).str.strip()
+	dates = pd.to_datetime(labels, format='%Y-%m-%d', errors='coerce')
+	for dateFormat in PRICE_DATE_FORMATS:
+		dates = dates.fillna(pd.to_datetime(written, format=dateFormat, errors='coerce'))
+	return dates.to_numpy(dtype='datetime64[D]')
+
+
+
+def readChunks(path, chunkSize=10000):
+	"""
+	Stream the bonds in a file as a sequence of bondUniverse objects.
+
+	Parameters
+	----------
+	path : str
+		The path to a .csv, .parquet, or Arrow IPC (.feather/.arrow/.ipc) file
+	chunkSize : int
+		The (maximum) number of bonds in each chunk
+
+	Yields
+	------
+	tuple
+		(bondUniverse of the bonds in the chunk, numpy.ndarray of the date of each column of clean prices)
+	"""
+	if path.endswith('.parquet'):
+		import pyarrow.parquet as pq
+		batches = pq.ParquetFile(path).iter_batches(batch_size=chunkSize)
+		frames = (batch.to_pandas() for batch in batches)
+	elif path.endswith(ARROW_SUFFIXES):
+		import pyarrow as pa
+		reader = pa.ipc.open_file(path)
+		frames = (reader.get_batch(i).to_pandas() for i in range(reader.num_record_batches))
+	else:
+		import pandas as pd
+		frames = pd.read_csv(path, chunksize=chunkSize, dtype={'ISIN': str})
+
+	dates = None
+	for frame in frames:
+		if dates is None:
+			dates = parsePriceDates(frame.columns)
+			priceColumns = ~np.isnat(dates)
+			_checkHeaders(frame.columns[~priceColumns])
+			dates = dates[priceColumns]
+		yield _buildUniverse(frame, priceColumns), dates
+
+
+#Every column must be a term column, a blank separator, or a clean price column with a date as its header
+#(so a price column whose header can't be parsed is an error, rather than being left out)
+def _checkHeaders(labels):
+	unknown = [str(label) for label in labels
+		if label not in TERM_COLUMNS and str(label).strip() and not str(label).startswith('Unnamed: ')]
+	if unknown:
+		raise ValueError('Column header(s) are neither bond terms nor dates: ' + ', '.join(unknown))
+
+
+#Build a bondUniverse from one chunk of rows
+def _buildUniverse(frame, priceColumns):
+	return bondUniverse(frame['coupon'].to_numpy(dtype=float),
+		_parseTermDates(frame['issue_date']),
+		_parseTermDates(frame['maturity_date']),
+		frame.loc[:, priceColumns].to_numpy(dtype=float),
+		isins=frame['ISIN'].to_numpy(dtype=str),
+		frequencies=_conventionColumn(frame, 'frequency'),
+		dayCounts=_conventionColumn(frame, 'day_count'))
+
+
+#Read one of the optional convention columns, given by name or by code (missing columns and blank cells get the default)
+def _conventionColumn(frame, name):
+	import pandas as pd
+	defaultName, defaultCode = DEFAULT_CONVENTIONS[name]
+	if name not in frame.columns:
+		return defaultCode
+	column = frame[name]
+	if pd.api.types.is_numeric_dtype(column):
+		return column.fillna(defaultCode).to_numpy(dtype=np.int64)
+	return column.fillna(defaultName).to_numpy(dtype=str)
+
+
+#Parse a whole column of issue or maturity dates at once (binary files already store them as dates)
+def _parseTermDates(column):
+	import pandas as pd
+	if not pd.api.types.is_datetime64_any_dtype(column):
+		column = pd.to_datetime(column, format=TERM_DATE_FORMAT)
+	return column.to_numpy(dtype='datetime64[D]')
+
+
+
+def load(path, chunkSize=10000):
+	"""
+	Load all the bonds in a file into a single bondUniverse.
+
+	Parameters
+	----------
+	path : str
+		The path to a .csv, .parquet, or Arrow IPC (.feather/.arrow/.ipc) file
+	chunkSize : int
+		The number of bonds to parse at a time
+
+	Returns
+	-------
+	tuple
+		(bondUniverse of all the bonds, numpy.ndarray of the date of each column of clean prices)
+	"""
+	chunks = list(readChunks(path, chunkSize))
+	if len(chunks) == 1:
+		return chunks[0]
+	universes = [universe for universe, _ in chunks]
+	universe = bondUniverse(np.concatenate([u.getCoupons() for u in universes]),
+		np.concatenate([u.getIssueDates() for u in universes]),
+		np.concatenate([u.getMaturities() for u in universes]),
+		np.concatenate([u.getCleanPrices() for u in universes]),
+		isins=np.concatenate([u.getISINs() for u in universes]),
+		frequencies=np.concatenate([u.getFrequencies() for u in universes]),
+		dayCounts=np.concatenate([u.getDayCounts() for u in universes]))
+	return universe, chunks[0][1]
+
+
+
+def save(universe, dates, path, chunkSize=10000):
+	"""
+	Save a bondUniverse to a columnar binary file, for fast loading on repeat runs.
+
+	Parameters
+	----------
+	universe : bondUniverse
+		The bonds to save
+	dates : array_like of datetime64[D]
+		The date of each column of clean prices
+	path : str
+		The path to a .parquet or Arrow IPC (.feather/.arrow/.ipc) file
+	chunkSize : int
+		The number of bonds in each row group/record batch of the file
+	"""
+	import pandas as pd
+	terms = pd.DataFrame({
+		'coupon': universe.getCoupons(),
+		'ISIN': universe.getISINs(),
+		'issue_date': universe.getIssueDates().astype('datetime64[s]'),
+		'maturity_date': universe.getMaturities().astype('datetime64[s]'),
+		'frequency': universe.getFrequencies(),
+		'day_count': universe.getDayCounts(),
+	})
+	labels = np.datetime_as_string(np.asarray(dates, dtype='datetime64[D]'))
+	prices = pd.DataFrame(universe.getCleanPrices(), columns=labels)
+	table = pd.concat([terms, prices], axis=1)
+
+	if path.endswith('.parquet'):
+		table.to_parquet(path, index=False, row_group_size=chunkSize)
+	elif path.endswith(ARROW_SUFFIXES):
+		table.to_feather(path, chunksize=chunkSize)
+	else:
+		raise ValueError('Unsupported file type (expected .parquet, .feather, .arrow, or .ipc): ' + path)
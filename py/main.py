@@ -1,39 +1,49 @@
+import os
 import numpy as np
-import pandas as pd
-from numpy import linalg as LA
-import matplotlib.pyplot as plt
-from datetime import datetime
 
-from bond import bond
 from spotCurve import spotCurve
 from forwardCurve import forwardCurve
 from plotter import plotter
-from util import calcLogArray
-
-
-
-# Load the bond data
-df = pd.read_csv('data/bonds.csv').set_index('ISIN')
-clean_prices_df = df.iloc[:, 5:]
-bonds_df = df[['coupon', 'issue_date', 'maturity_date']]
-
-bonds_df['issue_date'] = bonds_df['issue_date'].apply(
-	lambda x: datetime.strptime(x, '%m/%d/%Y')
-)
-bonds_df['maturity_date'] = bonds_df['maturity_date'].apply(
-	lambda x: datetime.strptime(x, '%m/%d/%Y')
-)
-
-# Read in the data for the 11 selected bonds, storing each as a bond object in the list 'bonds'
-bonds = []
-for i in bonds_df.index:
-	issue_date = bonds_df.loc[i, 'issue_date']
-	maturity_date = bonds_df.loc[i, 'maturity_date']
-	coupon = bonds_df.loc[i, 'coupon']
-	clean_prices = clean_prices_df.loc[i, :].tolist()
-	bonds.append(bond(issue_date, maturity_date, coupon, clean_prices))
+from util import calcLogArray, calcPCA
+from resultCache import resultCache
+import loader
+import instrumentation
+
+
+
+# Setting the YTM_INSTRUMENT environment variable to a file name times the hot paths of this run,
+# and writes a summary to that file at the end (in the Prometheus text format if it ends in .prom, as JSON otherwise).
+instrumentReport = os.environ.get('YTM_INSTRUMENT')
+if instrumentReport:
+	instrumentation.enable()
+
+# Load the bond data for the 11 selected bonds, storing them column by column in the bondUniverse 'bonds'.
+# 'days' holds the date of each column of clean prices.
+bonds, days = loader.load('data/bonds.csv')
 	
-start_day = datetime(2022, 1, 10)	# Date that data collection began = Jan. 10, 2022
+start_day = days[0].astype('datetime64[us]').item()	# Date that data collection began = Jan. 10, 2022
+
+
+# Calculate the YTM matrix, spot curve point-estimates, and 1-year forward curve point-estimates for some of the days of data.
+# 'dayIndices' are indices into 'days'. Each result has one row per day.
+def calcCurves(dayIndices):
+	dayBonds = bonds.withCleanPrices(bonds.getCleanPrices()[:, dayIndices])
+	spt = spotCurve(dayBonds, start_day, dates=days[dayIndices])
+	frwd = forwardCurve(spt.calcPointsArray())
+	frwd.calcRates()
+	return {
+		'ytm': dayBonds.calcYTMs(days[dayIndices]).T,
+		'spot': spt.getPointsArray(),
+		'forward': np.array(frwd.getForwardArray()),
+	}
+
+# The results are cached on disk (keyed by a hash of the bond data and of the code), so they are only recalculated for days whose data has changed.
+cache = resultCache('.cache')
+results = cache.getOrCompute('curves',
+	{'coupons': bonds.getCoupons(), 'maturities': bonds.getMaturities(),
+		'frequencies': bonds.getFrequencies(), 'dayCounts': bonds.getDayCounts()},
+	[bonds.getCleanPrices(), days],
+	calcCurves)
 
 
 # Calculations for Q4(a):
@@ -41,10 +51,8 @@ print('\nQ4(a):\n')
 
 # For each bond, calculate its YTM for each day of data,
 # and then store all the YTMs in a matrix.
-YTMs = []	
-for i in range(len(bonds)):
-	YTMs.append(bonds[i].calcYTMs(start_day))
-ytmMatrix = np.array(YTMs)		
+# All the YTMs are solved at once (one row per bond, one column per business day).
+ytmMatrix = results['ytm'].T
 
 # Output the YTM matrix
 print('YTM matrix:\n')
@@ -52,18 +60,14 @@ print(ytmMatrix.T*100)
 print('Each row corresponds to a day of data.\nEach column corresponds to a bond.\n')
 
 # Store the time to maturity of each bond (used when plotting the YTM curve)
-times = []
-for i in range(len(bonds)):
-	times.append(bonds[i].timeToMaturity(start_day))
+times = bonds.timesToMaturity(start_day)
 
 
 #Calculations for Q4(b):
 print('\n\n\nQ4(b):\n')
 
 #Generate a 3D matrix of point-estimates for spot curves for each day of data
-spt = spotCurve(bonds, start_day)
-spt.calcPoints()
-spotMatrix = np.array(spt.getPointsArray())
+spotMatrix = results['spot']
 
 #Output the spot curve point-estimate matrix
 print('\nSpot curve point-estimate matrix:\n')
@@ -75,9 +79,7 @@ print('Each row corresponds to a bond.\nEach 2D matrix corresponds to a day of d
 print('\n\n\nQ4(c):\n')
 
 #Generate a matrix of point-estimates for 1-year forward curves for each day of data
-frwd = forwardCurve(spt.getPointsArray())
-frwd.calcRates()
-forwardMatrix = np.array(frwd.getForwardArray())
+forwardMatrix = results['forward']
 
 #Output the forward curve point-estimate matrix
 print('\n1-year - T-year forward curve point-estimate matrix:\n')
@@ -86,26 +88,12 @@ print('Each row corresponds to a day of data.')
 print('Starting from T=2, each column corresponds to a year, T.\n')
 
 
-#For quick debugging of the plotter:
-
-#np.save('ytmMatrix', ytmMatrix)	
-#np.save('times', times)	
-#np.save('spotPoints', spotMatrix) 
-#np.save('forwardPoints', forwardMatrix)
-
-#ytmMatrix = np.load('ytmMatrix.npy') 
-#times = np.load('times.npy')
-#spotMatrix = np.load('spotPoints.npy')
-#forwardMatrix = np.load('forwardPoints.npy')
-
-
 #Plots for Q4:
 
 #Generate plots for the YTM curve, spot curve, and 1-year forward curve, with each day of data superimposed on-top of each other
+#The plots are written to the 'plots' directory (each one drawn in a separate worker process)
 pltt = plotter(ytmMatrix, times, spotMatrix, forwardMatrix)
-pltt.buildYTMPlot()
-pltt.buildSpotPlot()
-pltt.buildForwardPlot()
+pltt.renderAll('plots')
 
 
 
@@ -168,16 +156,22 @@ print('Starting from i=1, column/row i corresponds the 1-year - (i+1)-year forwa
 print('\n\n\nQ6:\n')
 
 #Calculate and output the eigenvalues and eigenvectors of the covariance matrix for the time series of daily log-returns of yields
-ytmEigVals, ytmEigVecs = LA.eig(ytmCov)	
+ytmEigVals, ytmEigVecs = calcPCA(ytmCov)	
 print('YTM daily log-return covariance matrix eigenvalues and eigenvectors:')
 for i in range(len(ytmEigVals)):
 	print('\neigenvalue: ' + str(ytmEigVals[i]) + '\neigenvector: ' + str(ytmEigVecs[:,i]))
 
 
 #Calculate and output the eigenvalues and eigenvectors of the covariance matrix for the time series of daily log-returns of of 1-year forward rates
-forwardEigVals, forwardEigVecs = LA.eig(forwardCov)	
+forwardEigVals, forwardEigVecs = calcPCA(forwardCov)	
 print('\n\n1-year - T-year forward rate daily log-return covariance matrix eigenvalues and eigenvectors:')
 for i in range(len(forwardEigVals)):
 	print('\neigenvalue: ' + str(forwardEigVals[i]) + '\neigenvector: ' + str(forwardEigVecs[:,i]))
 
 
+if instrumentReport:
+	instrumentation.disable()
+	if instrumentReport.endswith('.prom'):
+		instrumentation.toPrometheus(instrumentReport)
+	else:
+		instrumentation.toJSON(instrumentReport)
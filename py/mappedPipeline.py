@@ -0,0 +1,141 @@
+import os
+import numpy as np
+
+from bondUniverse import bondUniverse
+from conventions import ACT_365
+from spotCurve import spotCurve
+from forwardCurve import START, TENORS
+from forwardEngine import calcForwardCube
+
+
+
+#mappedPipeline is a utility module.
+#
+#It runs the YTM, boot-strapping, and forward rate calculations on price histories that are too large to fit in memory.
+#
+#The data lives in a directory of memory-mapped files:
+#	-coupons.npy, issueDates.npy, maturities.npy, isins.npy, frequencies.npy, dayCounts.npy, dates.npy:
+#	 the bond terms and the date of each day (small),
+#	-cleanPrices.npy: the (bonds x days) clean price matrix,
+#and the results are written next to them:
+#	-ytm.npy: the (bonds x days) YTM matrix,
+#	-spot.npy: the (days x bonds x 2) point-estimates for the spot curve(s),
+#	-forward.npy: the (days x 4) point-estimates for the 1-year forward curve(s).
+#
+#The days are processed in blocks, with each block's results written straight into the memory-mapped outputs.
+
+
+
+def convert(path, directory, chunkSize=10000):
+	"""
+	Convert a bond file (anything loader can read) into a directory of memory-mapped files,
+	streaming it one chunk of bonds at a time.
+
+	Parameters
+	----------
+	path : str
+		The path to the bond file
+	directory : str
+		The directory to write to
+	chunkSize : int
+		The number of bonds to read at a time
+	"""
+	import loader
+	os.makedirs(directory, exist_ok=True)
+	rawPath = os.path.join(directory, 'cleanPrices.bin')
+	terms = {'coupons': [], 'issueDates': [], 'maturities': [], 'isins': [], 'frequencies': [], 'dayCounts': []}
+
+	#The number of bonds isn't known until the whole file is read, so the prices are appended to a raw file first
+	dates = None
+	with open(rawPath, 'wb') as raw:
+		for universe, dates in loader.readChunks(path, chunkSize):
+			universe.getCleanPrices().astype(float).tofile(raw)
+			terms['coupons'].append(universe.getCoupons())
+			terms['issueDates'].append(universe.getIssueDates())
+			terms['maturities'].append(universe.getMaturities())
+			terms['isins'].append(universe.getISINs())
+			terms['frequencies'].append(universe.getFrequencies())
+			terms['dayCounts'].append(universe.getDayCounts())
+	numBonds = sum(len(c) for c in terms['coupons'])
+	if dates is None or numBonds == 0:
+		os.remove(rawPath)
+		raise ValueError('No bonds in ' + str(path))
+
+	for name, parts in terms.items():
+		np.save(os.path.join(directory, name + '.npy'), np.concatenate(parts))
+	np.save(os.path.join(directory, 'dates.npy'), dates)
+
+	#Copy the raw prices into an .npy file (so the shape is stored with it), one block of bonds at a time
+	raw = np.memmap(rawPath, dtype=float, mode='r', shape=(numBonds, len(dates)))
+	cleanPrices = np.lib.format.open_memmap(os.path.join(directory, 'cleanPrices.npy'), mode='w+', shape=raw.shape)
+	for start in range(0, numBonds, chunkSize):
+		cleanPrices[start:start + chunkSize] = raw[start:start + chunkSize]
+	cleanPrices.flush()
+	del raw, cleanPrices
+	os.remove(rawPath)
+
+
+
+def openUniverse(directory):
+	"""
+	Open a directory of memory-mapped files as a bondUniverse (the clean prices are not read into memory).
+
+	Parameters
+	----------
+	directory : str
+		The directory written by convert
+
+	Returns
+	-------
+	tuple
+		(bondUniverse backed by the memory-mapped clean prices, numpy.ndarray of the date of each day)
+	"""
+	load = lambda name: np.load(os.path.join(directory, name + '.npy'))
+	loadOptional = lambda name, default: load(name) if os.path.exists(os.path.join(directory, name + '.npy')) else default
+	cleanPrices = np.load(os.path.join(directory, 'cleanPrices.npy'), mmap_mode='r')
+	universe = bondUniverse(load('coupons'), load('issueDates'), load('maturities'), cleanPrices, isins=load('isins'),
+		frequencies=loadOptional('frequencies', 2), dayCounts=loadOptional('dayCounts', ACT_365))	#Older directories have neither
+	return universe, load('dates')
+
+
+
+def calcMapped(directory, blockDays=250):
+	"""
+	Calculate the YTMs, spot curve(s), and 1-year forward curve(s) for every day of a directory of memory-mapped files,
+	one block of days at a time, writing the results into memory-mapped ytm.npy, spot.npy, and forward.npy.
+
+	Parameters
+	----------
+	directory : str
+		The directory written by convert
+	blockDays : int
+		The number of days to process at a time
+
+	Returns
+	-------
+	tuple of numpy.memmap
+		(the YTM matrix, the spot curve point-estimates, the forward curve point-estimates)
+	"""
+	universe, dates = openUniverse(directory)
+	numBonds, numDays = universe.getCleanPrices().shape
+	ytm = _createOutput(directory, 'ytm', (numBonds, numDays))
+	spot = _createOutput(directory, 'spot', (numDays, numBonds, 2))
+	forward = _createOutput(directory, 'forward', (numDays, len(TENORS)))
+
+	for start in range(0, numDays, blockDays):
+		days = slice(start, start + blockDays)
+		block = universe.withCleanPrices(universe.getCleanPrices()[:, days])
+
+		ytm[:, days] = block.calcYTMs(dates[days])
+		spt = spotCurve(block, dates[start].astype('datetime64[us]').item(), dates=dates[days])
+		spot[days] = spt.calcPointsArray()
+		calcForwardCube(spot[days], [START], TENORS, out=forward[days, None, :])
+
+	for array in (ytm, spot, forward):
+		array.flush()
+	return ytm, spot, forward
+
+
+#Create a memory-mapped .npy output file
+def _createOutput(directory, name, shape):
+	return np.lib.format.open_memmap(os.path.join(directory, name + '.npy'), mode='w+', shape=shape)
@@ -0,0 +1,106 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import os
+import traceback
+import numpy as np
+
+from bondUniverse import bondUniverse
+from spotCurve import spotCurve
+from forwardCurve import forwardCurve
+
+
+
+#parallelCurves is a utility module.
+#
+#It builds the spot curve(s) and 1-year forward curve(s) of a bondUniverse over a long price history
+#by splitting the days into shards and boot-strapping each shard in a separate worker process.
+#
+#The clean price matrix and the output arrays live in shared memory, so the workers read the prices and
+#write their results in place instead of having bond objects and results pickled back and forth.
+#The results are the same as running spotCurve.calcPointsArray and forwardCurve.calcRates on the whole history.
+
+
+
+NUM_FORWARDS = 4	#forwardCurve generates the 1yr-1yr, 1yr-2yr, 1yr-3yr, and 1yr-4yr forward rates
+
+
+
+def calcCurvesParallel(universe, dates, chunkSize=None, workers=None):
+	"""
+	Calculate the point-estimates for the spot curve(s) and 1-year forward curve(s)
+	of a bondUniverse on every day, using a pool of worker processes.
+
+	Parameters
+	----------
+	universe : bondUniverse
+		The bonds, with one column of clean prices per day
+	dates : array_like of datetime64[D]
+		The date of each column of clean prices
+	chunkSize : int
+		The number of days in each shard (by default, the days are split evenly between the workers)
+	workers : int
+		The number of worker processes (by default, one per CPU)
+
+	Returns
+	-------
+	tuple of numpy.ndarray
+		(the (days x bonds x 2) pointsArray, the (days x 4) forwardArray)
+	"""
+	dates = np.asarray(dates, dtype='datetime64[D]')
+	numBonds, numDays = universe.getCleanPrices().shape
+	workers = workers or os.cpu_count()
+	chunkSize = chunkSize or max(1, -(-numDays // workers))
+
+	shapes = {
+		'cleanPrices': (numBonds, numDays),
+		'points': (numDays, numBonds, 2),
+		'forwards': (numDays, NUM_FORWARDS),
+	}
+	blocks = {name: shared_memory.SharedMemory(create=True, size=max(1, 8*int(np.prod(shape)))) for name, shape in shapes.items()}
+	try:
+		np.ndarray(shapes['cleanPrices'], buffer=blocks['cleanPrices'].buf)[:] = universe.getCleanPrices()
+		layout = {name: (blocks[name].name, shape) for name, shape in shapes.items()}
+		terms = (universe.getCoupons(), universe.getIssueDates(), universe.getMaturities(), universe.getFrequencies(), universe.getDayCounts())
+
+		shards = [(start, min(start + chunkSize, numDays)) for start in range(0, numDays, chunkSize)]
+		with ProcessPoolExecutor(max_workers=workers) as pool:
+			jobs = [pool.submit(_calcShard, layout, terms, dates[start:end], start, end) for start, end in shards]
+			for job in jobs:
+				job.result()	#Re-raise any error from a worker
+
+		points = np.ndarray(shapes['points'], buffer=blocks['points'].buf).copy()
+		forwards = np.ndarray(shapes['forwards'], buffer=blocks['forwards'].buf).copy()
+	finally:
+		for block in blocks.values():
+			block.close()
+			block.unlink()
+
+	return points, forwards
+
+
+#Attach to the shared arrays and boot-strap the days [start, end) of them
+def _calcShard(layout, terms, dates, start, end):
+	blocks = {name: shared_memory.SharedMemory(name=blockName) for name, (blockName, _) in layout.items()}
+	arrays = {}
+	try:
+		arrays.update({name: np.ndarray(shape, buffer=blocks[name].buf) for name, (_, shape) in layout.items()})
+		_bootstrap(arrays, terms, dates, start, end)
+	except BaseException as error:
+		traceback.clear_frames(error.__traceback__)	#The frames of the error hold views (e.g. the shard's prices) too
+		raise
+	finally:
+		arrays.clear()		#Release the views before closing the shared memory, so closing it can't hide an error
+		for block in blocks.values():
+			block.close()
+
+
+#Boot-strap the spot and forward curves for the days [start, end), reading and writing the shared arrays in place
+def _bootstrap(arrays, terms, dates, start, end):
+	coupons, issueDates, maturities, frequencies, dayCounts = terms
+	shard = bondUniverse(coupons, issueDates, maturities, arrays['cleanPrices'][:, start:end], frequencies=frequencies, dayCounts=dayCounts)
+	spt = spotCurve(shard, dates[0].astype('datetime64[us]').item(), dates=dates)
+	arrays['points'][start:end] = spt.calcPointsArray()
+
+	frwd = forwardCurve(spt.getPointsArray())
+	frwd.calcRates()
+	arrays['forwards'][start:end] = frwd.getForwardArray()
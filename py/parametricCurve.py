@@ -0,0 +1,425 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import numpy as np
+
+from batchYTM import cashFlowMatrix, calcYTMBatch
+from conventions import ACT_365, dayCountCodes, frequencyCounts
+
+
+
+#parametricCurve is a utility class, and an alternative to spotCurve for large bond universes.
+#
+#Instead of boot-strapping one bond per six-month bucket, a parametricCurve object fits a smooth spot curve to the
+#prices of all the bonds on each day (any number of them, with overlapping maturities). The spot curve is either:
+#	-'nelsonSiegel':	r(T) = b0 + b1*f1(T/t1) + b2*f2(T/t1)						(parameters b0, b1, b2, log t1)
+#	-'svensson':		r(T) = b0 + b1*f1(T/t1) + b2*f2(T/t1) + b3*f2(T/t2)		(parameters b0, b1, b2, b3, log t1, log t2)
+#where f1(x) = (1-exp(-x))/x and f2(x) = f1(x) - exp(-x), and r is continuously compounded (as in spotCurve).
+#
+#The parameters are fitted by Levenberg-Marquardt, minimizing the squared errors between the dirty prices and the
+#discounted cash flows, weighted by 1/T^2 (so the errors are roughly in yield terms). The cash flows come from the
+#padded cash-flow matrix of batchYTM (with each bond's own coupon frequency and day count convention), the Jacobian is
+#calculated analytically, and many days are solved together as one batch of NumPy operations.
+#The decay times t1 and t2 are kept within TAU_BOUNDS (a step that leaves them is clipped back to the bounds), and
+#the cost includes a small ridge penalty on b1, b2, and b3 (see RIDGE). The prices barely constrain the curve outside the
+#bonds' maturities (e.g. before the shortest one), so without it, the fitted curve could swing far from the yields there.
+#
+#Each day is warm-started from the fitted parameters of the day before it. The days are split into blocks of consecutive
+#days, and the blocks are fitted side by side: the first days of all the blocks are solved as one batch, then their
+#second days (each starting from its block's first day), and so on. The first day of a block starts from the block's
+#seed, a fit of the day before the block (which starts from the previous block's seed, see blockSeeds). The seeds are
+#found serially first, so the blocks can then be split into shards fitted in separate worker processes, with the same
+#results whatever the number of workers.
+#
+#calcPointsArray samples the fitted curves on a grid of times as a (days x times x 2) array of [r, T] point-estimates,
+#the same layout as spotCurve's pointsArray, so the result can be passed straight to forwardCurve.
+
+
+
+MODELS = {
+	'nelsonSiegel': 4,
+	'svensson': 6,
+}
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-4		#a day has converged once a step improves its weighted squared error by less than this fraction
+TAU_BOUNDS = (0.05, 30)	#the range (in years) of the decay times t1 and t2
+RIDGE = 1e-2			#the penalty on the squared slope and curvature parameters (b1, b2, b3), per price
+
+
+
+class parametricCurve:
+
+	#Constructor
+	def __init__(self, bonds, dates, model='svensson'):
+		if model not in MODELS:
+			raise ValueError('Unknown curve model: ' + str(model))
+		self.bonds = bonds
+		self.dates = np.asarray(dates, dtype='datetime64[D]')
+		self.model = model
+		self.params = None			#stores the fitted parameters of each day (days x parameters)
+		self.errors = None			#stores the root-mean-square price error of each day
+		self.pointsArray = []
+
+
+
+	#Getter methods:
+
+	def getBonds(self):
+		return self.bonds
+
+	def getDates(self):
+		return self.dates
+
+	def getModel(self):
+		return self.model
+
+	def getParams(self):
+		return self.params
+
+	def getErrors(self):
+		return self.errors
+
+	def getPointsArray(self):
+		return self.pointsArray
+
+
+
+
+	def fit(self, blockDays=50, workers=1, maxIterations=MAX_ITERATIONS):
+		"""
+		Fit the curve parameters on every day.
+
+		Parameters
+		----------
+		blockDays : int
+			The number of consecutive days in each block (the blocks are fitted side by side, see fitDays)
+		workers : int
+			The number of worker processes (each fits a contiguous shard of the blocks); 1 fits them in this process
+		maxIterations : int
+			The largest number of Levenberg-Marquardt iterations for each day
+
+		Returns
+		-------
+		numpy.ndarray
+			The (days x parameters) fitted parameters
+		"""
+		bonds = self.getBonds()
+		terms = (bonds.getCoupons(), bonds.getMaturities())
+		conventions = {'frequencies': bonds.getFrequencies(), 'dayCounts': bonds.getDayCounts()}
+		cleanPrices = bonds.getCleanPrices()
+
+		seeds = blockSeeds(*terms, self.dates, cleanPrices, self.model, blockDays, maxIterations, **conventions)
+
+		if workers is None or workers > 1:
+			#Each shard is a run of whole blocks, fitted from the same seeds as in a serial fit
+			workers = workers or os.cpu_count()
+			shardBlocks = -(-len(seeds) // workers)
+			shards = [slice(block*blockDays, (block + shardBlocks)*blockDays) for block in range(0, len(seeds), shardBlocks)]
+			with ProcessPoolExecutor(max_workers=workers) as pool:
+				jobs = [pool.submit(fitDays, *terms, self.dates[days], cleanPrices[:, days], self.model, blockDays, maxIterations,
+					seeds[days.start // blockDays:days.stop // blockDays], **conventions) for days in shards]
+				results = [job.result() for job in jobs]
+			self.params = np.concatenate([params for params, _ in results])
+			self.errors = np.concatenate([errors for _, errors in results])
+		else:
+			self.params, self.errors = fitDays(*terms, self.dates, cleanPrices, self.model, blockDays, maxIterations, seeds, **conventions)
+		return self.params
+
+
+	def zeroRates(self, times):
+		"""
+		Returns
+		-------
+		numpy.ndarray
+			The (days x times) fitted spot rates at the given times (in years)
+		"""
+		return zeroRates(self.getParams(), times, self.model)
+
+
+	#Sample the fitted spot curve(s) as a (days x times x 2) array of point-estimates [r, T] (by default, every six months up to 5 years)
+	def calcPointsArray(self, times=None):
+		times = np.arange(0.5, 5.5, 0.5) if times is None else np.asarray(times, dtype=float)
+		rates = self.zeroRates(times)
+		self.pointsArray = np.stack([rates, np.broadcast_to(times, rates.shape)], axis=-1)
+		return self.pointsArray
+
+
+
+def zeroRates(params, times, model='svensson'):
+	"""
+	Evaluate the spot curve(s) with the given parameters.
+
+	Parameters
+	----------
+	params : array_like
+		The (days x parameters) curve parameters
+	times : array_like
+		The times (in years)
+	model : str
+		'nelsonSiegel' or 'svensson'
+
+	Returns
+	-------
+	numpy.ndarray
+		The (days x times) spot rates
+	"""
+	params = np.asarray(params, dtype=float)
+	times = np.asarray(times, dtype=float)
+	return _curve(params[:, None, :], times[None, :], model)
+
+
+
+def fitDays(coupons, maturities, dates, cleanPrices, model='svensson', blockDays=50, maxIterations=MAX_ITERATIONS,
+		seeds=None, frequencies=2, dayCounts=ACT_365):
+	"""
+	Fit the curve parameters on every day of clean prices, with each day starting from the fitted parameters of the day before it.
+
+	The days are split into blocks of blockDays consecutive days, which are fitted side by side: the first days of all
+	the blocks are solved together as one batch, then their second days, and so on. The first day of each block starts
+	from the block's seed (see blockSeeds), so the blocks can be fitted in any order, or in separate calls.
+
+	Parameters
+	----------
+	coupons : array_like
+		The coupon rate of each bond
+	maturities : array_like of datetime64[D]
+		The maturity date of each bond
+	dates : array_like of datetime64[D]
+		The date of each day
+	cleanPrices : array_like
+		The (bonds x days) clean prices (NaN for missing prices)
+	model : str
+		'nelsonSiegel' or 'svensson'
+	blockDays : int
+		The number of consecutive days in each block
+	maxIterations : int
+		The largest number of Levenberg-Marquardt iterations for each day
+	seeds : array_like
+		The (blocks x parameters) parameters the first day of each block starts from (by default, from blockSeeds)
+	frequencies : array_like of int or str
+		The number of coupons per year of each bond (semi-annual by default, see conventions.frequencyCounts)
+	dayCounts : array_like of int or str
+		The day count convention of each bond (ACT/365 by default, see conventions.dayCountCodes)
+
+	Returns
+	-------
+	tuple of numpy.ndarray
+		(the (days x parameters) fitted parameters, the root-mean-square price error of each day)
+	"""
+	coupons, maturities, dates, cleanPrices, frequencies, dayCounts = _fitInputs(coupons, maturities, dates, cleanPrices, frequencies, dayCounts)
+	if seeds is None:
+		seeds = blockSeeds(coupons, maturities, dates, cleanPrices, model, blockDays, maxIterations, frequencies, dayCounts)
+	numDays = len(dates)
+
+	params = np.empty((numDays, MODELS[model]))
+	errors = np.empty(numDays)
+	previous = np.asarray(seeds, dtype=float)
+	for step in range(min(blockDays, numDays)):
+		days = np.arange(step, numDays, blockDays)		#the day at this step of each block (the last block may be shorter)
+		batch = _batchData(coupons, maturities, dates[days], cleanPrices[:, days], frequencies, dayCounts)
+		params[days], errors[days] = _levenbergMarquardt(batch, previous[:len(days)], model, maxIterations)
+		previous = params[days]
+	return params, errors
+
+
+def blockSeeds(coupons, maturities, dates, cleanPrices, model='svensson', blockDays=50, maxIterations=MAX_ITERATIONS,
+		frequencies=2, dayCounts=ACT_365):
+	"""
+	Find the parameters the first day of each block of days starts from in fitDays.
+
+	The first block starts from a guess from the YTMs on the first day, and every other block from a fit of the day
+	before it, which starts from the previous block's seed. The seeds are chained serially, so blocks fitted separately
+	(e.g. in worker processes) get the same seeds as in one fit.
+
+	Parameters
+	----------
+	coupons, maturities, dates, cleanPrices, model, blockDays, maxIterations, frequencies, dayCounts
+		As in fitDays
+
+	Returns
+	-------
+	numpy.ndarray
+		The (blocks x parameters) seeds
+	"""
+	coupons, maturities, dates, cleanPrices, frequencies, dayCounts = _fitInputs(coupons, maturities, dates, cleanPrices, frequencies, dayCounts)
+	seeds = [_initialGuess(coupons, maturities, dates[0], cleanPrices[:, 0], model, frequencies, dayCounts)]
+	for start in range(blockDays, len(dates), blockDays):
+		day = slice(start - 1, start)
+		batch = _batchData(coupons, maturities, dates[day], cleanPrices[:, day], frequencies, dayCounts)
+		seeds.append(_levenbergMarquardt(batch, seeds[-1][None, :], model, maxIterations)[0][0])
+	return np.array(seeds)
+
+
+#The inputs of fitDays as arrays, with the conventions broadcast to one per bond
+def _fitInputs(coupons, maturities, dates, cleanPrices, frequencies, dayCounts):
+	coupons = np.asarray(coupons, dtype=float)
+	frequencies = np.broadcast_to(frequencyCounts(frequencies), coupons.shape)
+	dayCounts = np.broadcast_to(dayCountCodes(dayCounts), coupons.shape)
+	return (coupons, np.asarray(maturities, dtype='datetime64[D]'), np.asarray(dates, dtype='datetime64[D]'),
+		np.asarray(cleanPrices, dtype=float), frequencies, dayCounts)
+
+
+#The cash flows of every (day, bond) in a batch of days, laid out for _batchCurve, together with the dirty prices and weights
+def _batchData(coupons, maturities, dates, cleanPrices, frequencies, dayCounts):
+	numBonds, numDays = cleanPrices.shape
+	c, m, d, f, dc = np.broadcast_arrays(coupons[None, :], maturities[None, :], dates[:, None], frequencies[None, :], dayCounts[None, :])
+	flows, times, accruedInterest = cashFlowMatrix(c.ravel(), m.ravel(), d.ravel(), f.ravel(), dc.ravel())
+	flows = flows.reshape(numDays, numBonds, -1)
+	times = times.reshape(numDays, numBonds, -1)
+	dirtyPrices = cleanPrices.T + accruedInterest.reshape(numDays, numBonds)
+
+	#Weight the price errors by 1/T^2, and leave out missing prices and matured bonds (with harmless placeholder cash flows)
+	timesToMaturity = times[:, :, -1]
+	usable = np.isfinite(dirtyPrices) & (timesToMaturity > 0)
+	weights = np.where(usable, 1/np.maximum(timesToMaturity, 0.25)**2, 0)
+	flows[~usable] = 0
+	times[~usable] = 1
+	return {
+		'flows': flows,
+		'times': times,
+		'inverseTimes': 1/times,
+		'dirtyPrices': np.where(usable, dirtyPrices, 0),
+		'weights': weights,
+		'spacing': 1/f,		#the time between each bond's coupons
+	}
+
+
+#Select some days of a batch
+def _batchDays(batch, days):
+	return {name: array[days] for name, array in batch.items()}
+
+
+#A starting point for the first day: a flat curve at the longest bond's YTM, sloping to the shortest bond's YTM
+def _initialGuess(coupons, maturities, date, cleanPrices, model, frequencies, dayCounts):
+	usable = np.isfinite(cleanPrices) & (maturities > date)
+	YTMs = calcYTMBatch(coupons[usable], maturities[usable], date, cleanPrices[usable],
+		frequencies=frequencies[usable], dayCounts=dayCounts[usable])
+	order = np.argsort(maturities[usable])
+	long, short = YTMs[order[-1]], YTMs[order[0]]
+	if model == 'nelsonSiegel':
+		return np.array([long, short - long, 0, np.log(1.5)])
+	return np.array([long, short - long, 0, 0, np.log(1.5), np.log(5)])
+
+
+#Clip the log decay times of some parameters (in place) to TAU_BOUNDS
+def _clipTaus(params, model):
+	columns = [4, 5] if model == 'svensson' else [3]
+	params[..., columns] = np.clip(params[..., columns], *np.log(TAU_BOUNDS))
+	return params
+
+
+#Fit every day of a batch at once, with a separate damping factor per day.
+#Only the days that haven't converged are evaluated, and the Jacobian is only recalculated for the days whose step was accepted.
+def _levenbergMarquardt(batch, params, model, maxIterations):
+	weights = batch['weights']
+	params = params.copy()
+	numParams = params.shape[1]
+	damping = np.full(len(params), 1e-3)
+	#The ridge penalty of each day on each parameter (only b1, b2, and b3 are penalized)
+	isShape = np.arange(numParams) < numParams - (2 if model == 'svensson' else 1)
+	isShape[0] = False
+	ridge = RIDGE*(weights > 0).sum(axis=1)[:, None]*isShape
+
+	with np.errstate(all='ignore'):
+		cost, residuals, jacobian = _evaluate(batch, params, model)
+		cost = cost + (ridge*params**2).sum(axis=1)
+		active = np.arange(len(params))
+		for _ in range(maxIterations):
+			if len(active) == 0:
+				break
+			weightedJ = jacobian[active]*weights[active, :, None]
+			A = np.einsum('dbp,dbq->dpq', weightedJ, jacobian[active])
+			g = np.einsum('dbp,db->dp', weightedJ, residuals[active])
+			A = A + ridge[active, :, None]*np.eye(numParams)
+			g = g + ridge[active]*params[active]
+			A = A + damping[active, None, None]*(A*np.eye(numParams)) + 1e-12*np.eye(numParams)
+			trial = _clipTaus(params[active] - np.linalg.solve(A, g[:, :, None])[:, :, 0], model)
+
+			trialCost, trialResiduals, _ = _evaluate(_batchDays(batch, active), trial, model, gradient=False)
+			trialCost = trialCost + (ridge[active]*trial**2).sum(axis=1)
+			better = trialCost < cost[active]
+			improvement = np.where(better, (cost[active] - trialCost)/np.maximum(cost[active], 1e-300), 0)
+
+			accepted = active[better]
+			params[accepted] = trial[better]
+			residuals[accepted] = trialResiduals[better]
+			cost[accepted] = trialCost[better]
+			jacobian[accepted] = _evaluate(_batchDays(batch, accepted), params[accepted], model)[2]
+			damping[active] = np.where(better, damping[active]/3, damping[active]*3)
+
+			converged = (better & (improvement < TOLERANCE)) | (damping[active] > 1e10)
+			active = active[~converged]
+
+	numPrices = np.maximum((weights > 0).sum(axis=1), 1)
+	errors = np.sqrt((np.where(weights > 0, residuals, 0)**2).sum(axis=1)/numPrices)
+	return params, errors
+
+
+#The weighted squared error, the residuals (discounted cash flows - dirty price), and the Jacobian (d residual/d parameter) of every day
+def _evaluate(batch, params, model, gradient=True):
+	rates, parts = _batchCurve(batch, params, model, gradient)
+	discounted = batch['flows']*np.exp(-rates*batch['times'])
+	residuals = discounted.sum(axis=2) - batch['dirtyPrices']
+	cost = (batch['weights']*residuals**2).sum(axis=1)
+	cost = np.where(np.isfinite(cost), cost, np.inf)
+	if not gradient:
+		return cost, residuals, None
+
+	weighted = discounted*batch['times']
+	jacobian = -np.stack([(weighted*part).sum(axis=2) for part in parts], axis=-1)
+	return cost, residuals, jacobian
+
+
+#The spot rate at every cash flow of a batch (and the gradient of the rate with respect to each parameter).
+#exp(-T/t) is evaluated as a geometric sequence along each bond's coupons (which are 1/frequency years apart).
+def _batchCurve(batch, params, model, gradient=True):
+	times, inverseTimes = batch['times'], batch['inverseTimes']
+	b = [params[:, i, None, None] for i in range(params.shape[1])]
+	t1 = np.exp(b[-2] if model == 'svensson' else b[-1])
+	e1 = _decay(times, 1/t1, batch['spacing'])
+	f1 = (1 - e1)*t1*inverseTimes
+	f2 = f1 - e1
+	rates = b[0] + b[1]*f1 + b[2]*f2
+	if model == 'svensson':
+		t2 = np.exp(b[-1])
+		e2 = _decay(times, 1/t2, batch['spacing'])
+		g1 = (1 - e2)*t2*inverseTimes
+		g2 = g1 - e2
+		rates = rates + b[3]*g2
+	if not gradient:
+		return rates, None
+
+	#With x = T/t: x*df1/dx = e - f1 and x*df2/dx = e - f1 + x*e, and dx/d(log t) = -x
+	dLogT1 = -(b[1]*(e1 - f1) + b[2]*(e1 - f1 + times/t1*e1))
+	if model == 'svensson':
+		dLogT2 = -b[3]*(e2 - g1 + times/t2*e2)
+		return rates, [1, f1, f2, g2, dLogT1, dLogT2]
+	return rates, [1, f1, f2, dLogT1]
+
+
+#exp(-T/t) for every cash flow of a batch, where the coupon times of each bond are T0, T0 + s, T0 + 2s, ...
+#(s = 'spacing', the bond's 1/frequency) and the last column is the notional
+def _decay(times, inverseTau, spacing):
+	steps = np.arange(times.shape[2] - 1)
+	ratio = np.exp(-spacing[:, :, None]*inverseTau)**steps
+	decay = np.empty(times.shape)
+	decay[:, :, :-1] = np.exp(-times[:, :, :1]*inverseTau)*ratio
+	decay[:, :, -1] = np.exp(-times[:, :, -1]*inverseTau[:, :, 0])
+	return decay
+
+
+#The spot rate at the given times ('params' broadcasts against 'times')
+def _curve(params, times, model):
+	times = np.maximum(times, 1e-12)
+	rates = params[..., 0] + params[..., 1]*_f1(times/np.exp(params[..., 4 if model == 'svensson' else 3]))
+	rates = rates + params[..., 2]*_f2(times/np.exp(params[..., 4 if model == 'svensson' else 3]))
+	if model == 'svensson':
+		rates = rates + params[..., 3]*_f2(times/np.exp(params[..., 5]))
+	return rates
+
+
+#f1(x) = (1-exp(-x))/x and f2(x) = f1(x) - exp(-x)
+def _f1(x):
+	return -np.expm1(-x)/x
+
+def _f2(x):
+	return _f1(x) - np.exp(-x)
@@ -1,5 +1,13 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+from matplotlib import colormaps
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import Normalize
 
 
 
@@ -23,17 +31,27 @@ import matplotlib.pyplot as plt
 #		superimposed on-top of each other.
 #
 #All the plots above are drawn using linear interpolation between points.
+#
+#The plots are drawn headless (on an Agg canvas, without pyplot), so they never block, and can be written to files.
+#The curves from all the days are drawn as a single LineCollection. With up to 'maxLegendDays' days, each day
+#gets its own colour, markers, and legend entry; with more days, the days are shaded along a colour map instead.
+#renderAll writes all the plots at once, drawing each one in a separate worker process.
+
+
+
+MAX_LEGEND_DAYS = 10
 
 
 
 class plotter:
 	
 	#Constructor
-	def __init__(self, ytmMatrix, times, spotPoints, forwardPoints):
+	def __init__(self, ytmMatrix, times, spotPoints, forwardPoints, maxLegendDays=MAX_LEGEND_DAYS):
 		self.ytmMatrix = ytmMatrix
 		self.times = times
 		self.spotPoints = spotPoints
 		self.forwardPoints = forwardPoints
+		self.maxLegendDays = maxLegendDays
 		
 
 	
@@ -55,44 +73,164 @@ class plotter:
 		
 
 	#Using ytmMatrix and times, generate a plot with the YTM curve from from each day superimposed on-top of each other.
-	def buildYTMPlot(self):
-		ytmMatrix = self.getYTMs()
-		times = self.getTimes()
-		for i in range(len(ytmMatrix[0,:])):
-			plt.plot(times,  ytmMatrix[:,i]*100, linestyle=':', linewidth=2.0, marker='o', label='Day '+str(i+1))
-		plt.xlabel('Time to maturity (years)', fontsize=15)
-		plt.xticks(times, fontsize=13)
-		plt.yticks(fontsize=13)
-		plt.ylabel('YTM', fontsize=15)
-		plt.title('5-year YTM curves from 10 days of data', fontsize=25)
-		plt.legend(loc=2, prop={'size': 13})
-		plt.show()
+	#The figure is written to 'path' if one is given.
+	def buildYTMPlot(self, path=None):
+		return _save(ytmFigure(self.getYTMs(), self.getTimes(), self.maxLegendDays), path)
 		
 		
 	#Using spotPoints, generate a plot with the spot curve from each day superimposed on-top of each other.
-	def buildSpotPlot(self):
-		spotPoints = self.getSpotMatrix()
-		for i in range(len(spotPoints)):
-			plt.plot(spotPoints[i,:,1], spotPoints[i,:,0]*100, linestyle=':', linewidth=2.0, marker='o', label='Day '+str(i+1))
-		plt.xlabel('Time to maturity, T (years)', fontsize=15)
-		plt.xticks(np.arange(0.0, 5.5, 0.5), fontsize=13)
-		plt.yticks(fontsize=13)
-		plt.ylabel('Spot rate, r(T)', fontsize=15)
-		plt.title('5-year spot curves from 10 days of data', fontsize=25)
-		plt.legend(loc=2, prop={'size': 13})
-		plt.show()
+	def buildSpotPlot(self, path=None):
+		return _save(spotFigure(self.getSpotMatrix(), self.maxLegendDays), path)
 	
 	#Using forwardPoints, generate a plot with the 1-year forward curve from each day superimposed on-top of each other.	
-	def buildForwardPlot(self):
-		forwardPoints = self.getForwardMatrix()
-		for i in range(len(forwardPoints)):
-			plt.plot(range(1,5), forwardPoints[i,:]*100, linestyle=':', linewidth=2.0, marker='o', label='Day '+str(i+1))
-		plt.xlabel('T (years)', fontsize=15)
-		plt.ylabel('1year-Tyear forward rate', fontsize=15)
-		plt.xticks(range(1,5), fontsize=13)
-		plt.yticks(fontsize=13)
-		plt.title('1-year forward curves from 10 days of data', fontsize=25)
-		plt.legend(loc=2, prop={'size': 13})
-		plt.show()
+	def buildForwardPlot(self, path=None):
+		return _save(forwardFigure(self.getForwardMatrix(), self.maxLegendDays), path)
+		
 		
-		
\ No newline at end of file
+	def renderAll(self, directory, fileFormat='png', workers=None):
+		"""
+		Write the YTM, spot, and forward plots to files, drawing them in parallel worker processes.
+
+		Parameters
+		----------
+		directory : str
+			Where to write the plots (created if it does not exist)
+		fileFormat : str
+			Any format supported by matplotlib's savefig (e.g. 'png', 'svg', 'pdf')
+		workers : int
+			The number of worker processes (by default, one per plot); 1 draws them in this process
+
+		Returns
+		-------
+		list of str
+			The paths of the plots
+		"""
+		os.makedirs(directory, exist_ok=True)
+		jobs = [
+			(ytmFigure, (self.getYTMs(), self.getTimes(), self.maxLegendDays), os.path.join(directory, 'ytm.' + fileFormat)),
+			(spotFigure, (self.getSpotMatrix(), self.maxLegendDays), os.path.join(directory, 'spot.' + fileFormat)),
+			(forwardFigure, (self.getForwardMatrix(), self.maxLegendDays), os.path.join(directory, 'forward.' + fileFormat)),
+		]
+		return renderFigures(jobs, workers)
+
+
+
+def ytmFigure(ytmMatrix, times, maxLegendDays=MAX_LEGEND_DAYS):
+	"""
+	Draw the YTM curves of every day (one column of ytmMatrix per day, one row per bond).
+
+	Returns
+	-------
+	matplotlib.figure.Figure
+	"""
+	ytmMatrix = np.asarray(ytmMatrix, dtype=float)
+	times = np.asarray(times, dtype=float)
+	fig, ax = _curves(times, ytmMatrix.T*100, maxLegendDays)
+	ax.set_xlabel('Time to maturity (years)', fontsize=15)
+	ax.set_xticks(times)
+	ax.set_ylabel('YTM', fontsize=15)
+	ax.set_title(f'5-year YTM curves from {ytmMatrix.shape[1]} days of data', fontsize=25)
+	return fig
+
+
+def spotFigure(spotPoints, maxLegendDays=MAX_LEGEND_DAYS):
+	"""
+	Draw the spot curves of every day (one (bonds x 2) matrix of [r, T] point-estimates per day).
+
+	Returns
+	-------
+	matplotlib.figure.Figure
+	"""
+	spotPoints = np.asarray(spotPoints, dtype=float)
+	fig, ax = _curves(spotPoints[:, :, 1], spotPoints[:, :, 0]*100, maxLegendDays)
+	ax.set_xlabel('Time to maturity, T (years)', fontsize=15)
+	ax.set_xticks(np.arange(0.0, 5.5, 0.5))
+	ax.set_ylabel('Spot rate, r(T)', fontsize=15)
+	ax.set_title(f'5-year spot curves from {len(spotPoints)} days of data', fontsize=25)
+	return fig
+
+
+def forwardFigure(forwardPoints, maxLegendDays=MAX_LEGEND_DAYS):
+	"""
+	Draw the 1-year forward curves of every day (one row of forwardPoints per day).
+
+	Returns
+	-------
+	matplotlib.figure.Figure
+	"""
+	forwardPoints = np.asarray(forwardPoints, dtype=float)
+	terms = np.arange(1, forwardPoints.shape[1] + 1)
+	fig, ax = _curves(terms, forwardPoints*100, maxLegendDays)
+	ax.set_xlabel('T (years)', fontsize=15)
+	ax.set_ylabel('1year-Tyear forward rate', fontsize=15)
+	ax.set_xticks(terms)
+	ax.set_title(f'1-year forward curves from {len(forwardPoints)} days of data', fontsize=25)
+	return fig
+
+
+def renderFigures(jobs, workers=None):
+	"""
+	Draw and write a list of figures, each in a separate worker process.
+
+	Parameters
+	----------
+	jobs : list of tuple
+		(figure function, tuple of arguments, path) for each figure, where the figure function is a
+		module-level function returning a Figure (e.g. ytmFigure)
+	workers : int
+		The number of worker processes (by default, one per figure up to one per CPU); 1 draws them in this process
+
+	Returns
+	-------
+	list of str
+		The paths of the figures
+	"""
+	workers = workers or min(len(jobs), os.cpu_count() or 1)
+	if workers <= 1:
+		return [_renderFigure(function, args, path) for function, args, path in jobs]
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		futures = [pool.submit(_renderFigure, function, args, path) for function, args, path in jobs]
+		return [future.result() for future in futures]
+
+
+
+#Draw a figure and write it to a file (run in a worker process by renderFigures)
+def _renderFigure(function, args, path):
+	_save(function(*args), path)
+	return path
+
+
+def _save(fig, path):
+	if path is not None:
+		fig.savefig(path)
+	return fig
+
+
+#Draw one curve per day as a single LineCollection ('x' is broadcast against the (days x points) 'y')
+def _curves(x, y, maxLegendDays):
+	x, y = np.broadcast_arrays(x, y)
+	numDays = len(y)
+
+	fig = Figure(figsize=(16, 9))
+	FigureCanvasAgg(fig)
+	ax = fig.add_subplot()
+
+	legend = numDays <= maxLegendDays
+	if legend:
+		colors = colormaps['tab10'](np.arange(numDays) % 10)
+	else:
+		colors = colormaps['viridis'](np.linspace(0, 1, numDays))
+
+	ax.add_collection(LineCollection(np.stack([x, y], axis=-1), colors=colors, linestyles=':', linewidths=2.0))
+	ax.autoscale()
+
+	if legend:
+		ax.scatter(x.ravel(), y.ravel(), c=np.repeat(colors, x.shape[1], axis=0), marker='o', zorder=3)
+		handles = [Line2D([], [], color=colors[i], linestyle=':', linewidth=2.0, marker='o') for i in range(numDays)]
+		ax.legend(handles, ['Day ' + str(i+1) for i in range(numDays)], loc=2, prop={'size': 13})
+	else:
+		days = ScalarMappable(Normalize(1, numDays), colormaps['viridis'])
+		fig.colorbar(days, ax=ax).set_label('Day', fontsize=15)
+
+	ax.tick_params(labelsize=13)
+	return fig, ax
@@ -0,0 +1,307 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import os
+import time
+import numpy as np
+
+from curveUpdater import calcDay
+from conventions import ACT_365, dayCountCodes, frequencyCounts
+
+
+
+#priceFeed is a utility module for running the curve calculations as a long-lived service.
+#
+#A curveService object holds the latest clean price of every bond, and consumes a stream of price updates ("ticks"),
+#each a line of text "date,ISIN,clean price" (e.g. "2022-01-24,CA135087ZU15,99.75"), from either:
+#	-readSocket: a local TCP socket that any number of clients can write lines to, or
+#	-tailFile: a file that is followed as lines are appended to it (a stand-in for a real feed).
+#
+#Ticks are coalesced: while a recalculation is running (or during the short 'coalesceDelay' after the first tick),
+#further ticks only overwrite the pending price of their bond, so a burst of ticks costs one recalculation.
+#Each recalculation prices only the current day (with curveUpdater.calcDay, warm-started from the last YTMs)
+#on a worker pool, so the event loop keeps receiving ticks in the meantime.
+#A tick with a later date than the current day starts a new day (the other bonds keep their latest prices),
+#and ticks for earlier days are dropped. Pending ticks are grouped by date, and each date is recalculated and published in order.
+#If a recalculation fails, run stops and re-raises the error.
+#
+#Every recalculation is published to the subscribers' queues, and the service counts the ticks per second
+#and the end-to-end latency (from receiving the oldest tick of a batch to publishing its curves).
+
+
+
+LATENCY_WINDOW = 10000		#number of recent latencies kept for the percentiles
+YIELD_EVERY = 256			#number of ticks handled before giving the event loop a turn
+
+
+
+class curveService:
+
+	#Constructor
+	def __init__(self, coupons, issueDates, maturities, isins, date, cleanPrices, executor=None, coalesceDelay=0.0,
+			frequencies=2, dayCounts=ACT_365):
+		self.coupons = np.asarray(coupons, dtype=float)
+		self.issueDates = np.asarray(issueDates, dtype='datetime64[D]')
+		self.maturities = np.asarray(maturities, dtype='datetime64[D]')
+		self.frequencies = frequencyCounts(frequencies)	#coupons per year (see conventions)
+		self.dayCounts = dayCountCodes(dayCounts)		#day count codes (see conventions)
+		self.rowOf = {isin: row for row, isin in enumerate(isins)}
+		self.date = np.datetime64(date, 'D')
+		self.cleanPrices = np.array(cleanPrices, dtype=float)
+		self.YTMs = 0
+		self.executor = executor or ThreadPoolExecutor(max_workers=1)
+		self.coalesceDelay = coalesceDelay
+
+		self.pending = {}			#date -> {row: clean price} of the ticks waiting for the next recalculation
+		self.oldestPending = None	#time the oldest pending tick was received
+		self.ready = asyncio.Event()
+		self.recalculating = False
+		self.subscribers = []
+		self.latest = None
+
+		self.startTime = time.perf_counter()
+		self.ticks = 0
+		self.coalesced = 0
+		self.rejected = 0
+		self.recalculations = 0
+		self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+
+	#Build a curveService for the bonds of a bondUniverse, starting from the prices on its last day
+	@classmethod
+	def fromUniverse(cls, universe, dates, executor=None, coalesceDelay=0.0):
+		return cls(universe.getCoupons(), universe.getIssueDates(), universe.getMaturities(), universe.getISINs(),
+			dates[-1], universe.getCleanPrices()[:, -1], executor, coalesceDelay, universe.getFrequencies(), universe.getDayCounts())
+
+
+
+	#Getter methods:
+
+	def getDate(self):
+		return self.date
+
+	def getCleanPrices(self):
+		return self.cleanPrices
+
+	def getLatest(self):
+		return self.latest
+
+
+
+
+	def subscribe(self, maxSize=100):
+		"""
+		Register a subscriber to the published curves.
+
+		Parameters
+		----------
+		maxSize : int
+			The number of updates the subscriber can fall behind by (older updates are dropped first)
+
+		Returns
+		-------
+		asyncio.Queue
+			Receives a dict with the 'date', 'ytm', 'spot', and 'forward' of every recalculation,
+			the number of 'ticks' it includes, and its 'latency' (in seconds)
+		"""
+		queue = asyncio.Queue(maxsize=maxSize)
+		self.subscribers.append(queue)
+		return queue
+
+
+	def unsubscribe(self, queue):
+		self.subscribers.remove(queue)
+
+
+	def onTick(self, line, received=None):
+		"""
+		Handle one tick "date,ISIN,clean price". Malformed ticks, unknown ISINs, and ticks for past days are counted as rejected.
+		"""
+		received = received if received is not None else time.perf_counter()
+		self.ticks += 1
+		try:
+			date, isin, price = line.strip().split(',')
+			date, row, price = np.datetime64(date, 'D'), self.rowOf[isin], float(price)
+		except (ValueError, KeyError):
+			self.rejected += 1
+			return
+		if date < self.date:
+			self.rejected += 1
+			return
+
+		prices = self.pending.setdefault(date, {})
+		if row in prices:
+			self.coalesced += 1
+		prices[row] = price
+		if self.oldestPending is None:
+			self.oldestPending = received
+		self.ready.set()
+
+
+	async def run(self, source):
+		"""
+		Consume the ticks from a source (an async iterator of lines, e.g. readSocket or tailFile)
+		and publish the recalculated curves until the source ends (or a recalculation fails, re-raising its error).
+		"""
+		runner = asyncio.current_task()
+		stopping = False
+
+		#Interrupt the source as soon as the recalculations fail, rather than when the next line arrives
+		def onWorkerDone(task):
+			if not stopping and not task.cancelled() and task.exception() is not None:
+				runner.cancel()
+
+		worker = asyncio.create_task(self._recalculate())
+		worker.add_done_callback(onWorkerDone)
+		try:
+			async for line in source:
+				self.onTick(line)
+				if self.ticks % YIELD_EVERY == 0:
+					await asyncio.sleep(0)	#Let the recalculations run while a source has lines queued up
+			#Publish whatever is still pending before stopping
+			while (self.pending or self.recalculating) and not worker.done():
+				await asyncio.sleep(0.001)
+		except asyncio.CancelledError:
+			if not worker.done() or worker.cancelled():
+				raise
+			runner.uncancel()		#Cancelled by onWorkerDone: raise the worker's error instead (below)
+		finally:
+			stopping = True
+			worker.cancel()
+			try:
+				await worker		#Re-raises any error from the recalculations
+			except asyncio.CancelledError:
+				pass
+
+
+	#Wait for ticks, then recalculate and publish each of their dates in order, until cancelled
+	async def _recalculate(self):
+		loop = asyncio.get_running_loop()
+		while True:
+			await self.ready.wait()
+			if self.coalesceDelay:
+				await asyncio.sleep(self.coalesceDelay)
+			self.ready.clear()
+			pending, self.pending = self.pending, {}
+			oldest, self.oldestPending = self.oldestPending, None
+			if not pending:
+				continue
+
+			self.recalculating = True
+			try:
+				for date in sorted(pending):
+					numTicks = self._apply(date, pending[date])
+					YTMs, points, forwards = await loop.run_in_executor(self.executor, calcDay,
+						self.coupons, self.maturities, self.date, self.cleanPrices.copy(), self.YTMs, self.frequencies, self.dayCounts)
+					self.YTMs = YTMs
+					self.recalculations += 1
+
+					self.latest = {'date': self.date, 'ytm': YTMs, 'spot': points, 'forward': forwards,
+						'ticks': numTicks, 'latency': time.perf_counter() - oldest}
+					self.latencies.append(self.latest['latency'])
+					for queue in self.subscribers:
+						if queue.full():
+							queue.get_nowait()
+						queue.put_nowait(self.latest)
+			finally:
+				self.recalculating = False
+
+
+	#Apply the pending ticks of one date to the clean prices (moving on to that date if it is a later day)
+	def _apply(self, date, prices):
+		if date > self.date:
+			self.date = date
+		rows = np.fromiter(prices.keys(), dtype=np.int64, count=len(prices))
+		self.cleanPrices[rows] = np.fromiter(prices.values(), dtype=float, count=len(prices))
+		return len(prices)
+
+
+	def getStats(self):
+		"""
+		Returns
+		-------
+		dict
+			The number of ticks received, coalesced, and rejected, the number of recalculations,
+			the ticks and recalculations per second since the service started, and the latency percentiles (in seconds)
+		"""
+		elapsed = time.perf_counter() - self.startTime
+		latencies = np.array(self.latencies)
+		stats = {
+			'ticks': self.ticks,
+			'coalesced': self.coalesced,
+			'rejected': self.rejected,
+			'recalculations': self.recalculations,
+			'ticksPerSecond': self.ticks/elapsed,
+			'recalculationsPerSecond': self.recalculations/elapsed,
+		}
+		if len(latencies) > 0:
+			stats.update({
+				'latencyMean': float(latencies.mean()),
+				'latencyP50': float(np.percentile(latencies, 50)),
+				'latencyP99': float(np.percentile(latencies, 99)),
+				'latencyMax': float(latencies.max()),
+			})
+		return stats
+
+
+
+async def readSocket(host='127.0.0.1', port=9999, stopAfter=None):
+	"""
+	Listen on a local TCP socket and yield each line written to it by any client.
+
+	Parameters
+	----------
+	host : str
+		The address to listen on
+	port : int
+		The port to listen on
+	stopAfter : float
+		Stop once no lines have arrived for this many seconds (by default, never)
+	"""
+	lines = asyncio.Queue()
+
+	async def client(reader, writer):
+		while line := await reader.readline():
+			await lines.put(line.decode())
+		writer.close()
+
+	server = await asyncio.start_server(client, host, port)
+	async with server:
+		while True:
+			try:
+				yield await asyncio.wait_for(lines.get(), stopAfter)
+			except asyncio.TimeoutError:
+				return
+
+
+async def tailFile(path, interval=0.05, fromStart=True, stopAfter=None):
+	"""
+	Yield each line of a file, then keep following it as lines are appended.
+
+	Parameters
+	----------
+	path : str
+		The file to follow
+	interval : float
+		How often to check for new lines (in seconds)
+	fromStart : bool
+		Whether to yield the lines already in the file (otherwise, only new lines)
+	stopAfter : float
+		Stop once no new lines have been appended for this many seconds (by default, never)
+	"""
+	with open(path) as f:
+		if not fromStart:
+			f.seek(0, os.SEEK_END)
+		idle = 0.0
+		partial = ''
+		while stopAfter is None or idle < stopAfter:
+			line = f.readline()
+			if line:
+				idle = 0.0
+				partial += line
+				if partial.endswith('\n'):
+					yield partial
+					partial = ''
+			else:
+				await asyncio.sleep(interval)
+				idle += interval
@@ -0,0 +1,214 @@
+import functools
+import hashlib
+import os
+import shutil
+import numpy as np
+
+
+
+#resultCache is a utility class.
+#
+#A resultCache object stores calculated arrays (e.g. the YTM, spot, and forward matrices) on disk as .npy files,
+#keyed by a content hash of the inputs they were calculated from, so that re-running on unchanged inputs
+#loads the results (memory-mapped) instead of recalculating them.
+#
+#The inputs are split into:
+#	-the 'terms': inputs shared by every day (e.g. the coupons and maturities of the bonds, and any parameters),
+#	-the 'columns': inputs with one column per day (e.g. the clean prices and the date of each day).
+#Each day is hashed separately, so when only some days have changed (or days have been added), the days
+#that are unchanged are copied from the closest cached entry and only the other days are recalculated.
+#The results must have one row per day (days along the first axis).
+#
+#The keys also include FORMAT_VERSION and a hash of the source code of the package (see codeVersion), so results
+#calculated by a different version of the code (or stored in a different layout) are never returned.
+#
+#Each entry is a sub-directory of the cache directory. When the cache grows past 'maxBytes',
+#the least recently used entries are deleted.
+
+
+
+FORMAT_VERSION = 2		#the layout of the entries (bump it when _store changes)
+
+
+
+class resultCache:
+
+	#Constructor
+	def __init__(self, directory, maxBytes=2**30):
+		self.directory = directory
+		self.maxBytes = maxBytes
+		os.makedirs(directory, exist_ok=True)
+
+
+
+	#Getter methods:
+
+	def getDirectory(self):
+		return self.directory
+
+
+
+
+	def getOrCompute(self, name, terms, columns, compute):
+		"""
+		Load the results for the given inputs from the cache, calculating (and caching) any days that are missing.
+
+		Parameters
+		----------
+		name : str
+			The name of the calculation
+		terms : dict
+			The inputs shared by every day (arrays or plain values, e.g. parameters)
+		columns : list of numpy.ndarray
+			The inputs with one column (along the last axis) per day
+		compute : function
+			Takes an array of day indices and returns a dict of result arrays with one row per day
+
+		Returns
+		-------
+		dict
+			The result arrays (read-only and memory-mapped when loaded from the cache)
+		"""
+		family = _digest(str(FORMAT_VERSION).encode(), codeVersion().encode(), name.encode(), *_hashTerms(terms))
+		dayHashes = _hashDays(columns)
+		key = _digest(family.encode(), dayHashes.tobytes())
+
+		entry = os.path.join(self.directory, key)
+		if os.path.isdir(entry):
+			os.utime(entry)		#Mark as recently used
+			return self._load(entry)
+
+		results = self._computeMissing(family, dayHashes, compute)
+		self._store(entry, family, dayHashes, results)
+		self.evict()
+		return results
+
+
+	#Calculate the days that aren't in any cached entry of the same family, reusing the rest from the closest entry
+	def _computeMissing(self, family, dayHashes, compute):
+		best, bestRows = None, np.full(len(dayHashes), -1)
+		for entry in self._entries():
+			with open(os.path.join(entry, 'family.txt')) as f:
+				if f.read() != family:
+					continue
+			cachedHashes = np.load(os.path.join(entry, 'days.npy'))
+			rowOf = {h.tobytes(): i for i, h in enumerate(cachedHashes)}
+			rows = np.array([rowOf.get(h.tobytes(), -1) for h in dayHashes])
+			if (rows >= 0).sum() > (bestRows >= 0).sum():
+				best, bestRows = entry, rows
+
+		missing = np.flatnonzero(bestRows < 0)
+		if best is None:
+			return compute(missing)
+
+		os.utime(best)
+		cached = self._load(best)
+		computed = compute(missing) if len(missing) > 0 else {}
+		results = {}
+		for name, array in cached.items():
+			result = np.empty((len(dayHashes),) + array.shape[1:], dtype=array.dtype)
+			reused = bestRows >= 0
+			result[reused] = array[bestRows[reused]]
+			if len(missing) > 0:
+				result[missing] = computed[name]
+			results[name] = result
+		return results
+
+
+	def evict(self):
+		"""
+		Delete the least recently used entries until the cache is no larger than maxBytes.
+		"""
+		entries = sorted(self._entries(), key=os.path.getmtime)
+		sizes = [sum(e.stat().st_size for e in os.scandir(entry)) for entry in entries]
+		total = sum(sizes)
+		for entry, size in zip(entries, sizes):
+			if total <= self.maxBytes:
+				break
+			shutil.rmtree(entry)
+			total -= size
+
+
+	#Delete every entry
+	def clear(self):
+		for entry in self._entries():
+			shutil.rmtree(entry)
+
+
+	def _entries(self):
+		return [e.path for e in os.scandir(self.directory) if e.is_dir() and '.tmp' not in e.name]
+
+
+	def _load(self, entry):
+		return {
+			f.name[:-len('.npy')]: np.load(f.path, mmap_mode='r')
+			for f in os.scandir(entry) if f.name.endswith('.npy') and f.name != 'days.npy'
+		}
+
+
+	#Write an entry to a temporary directory first, so a partly written entry is never read
+	def _store(self, entry, family, dayHashes, results):
+		temp = entry + '.tmp' + str(os.getpid())
+		os.makedirs(temp, exist_ok=True)
+		for name, array in results.items():
+			np.save(os.path.join(temp, name + '.npy'), np.asarray(array))
+		np.save(os.path.join(temp, 'days.npy'), dayHashes)
+		with open(os.path.join(temp, 'family.txt'), 'w') as f:
+			f.write(family)
+		try:
+			os.rename(temp, entry)
+		except OSError:		#Another process stored the same entry first
+			shutil.rmtree(temp)
+
+
+
+#Hash a dict of inputs (arrays or plain values) in key order
+def _hashTerms(terms):
+	parts = []
+	for key in sorted(terms):
+		value = np.asarray(terms[key])
+		parts.append(key.encode())
+		parts.append(str((value.dtype.str, value.shape)).encode())
+		parts.append(value.tobytes() if value.dtype != object else repr(terms[key]).encode())
+	return parts
+
+
+#Hash the inputs of each day (one column along the last axis of each array) into a 16-byte digest per day
+def _hashDays(columns):
+	columns = [np.asarray(c) for c in columns]
+	numDays = columns[0].shape[-1]
+	hashes = np.empty(numDays, dtype='V16')
+	for day in range(numDays):
+		h = hashlib.blake2b(digest_size=16)
+		for c in columns:
+			h.update(np.ascontiguousarray(c[..., day]).tobytes())
+		hashes[day] = h.digest()
+	return hashes
+
+
+@functools.lru_cache(maxsize=None)
+def codeVersion():
+	"""
+	Hash the source code of the package (the .py files next to this module), so that cached results
+	are recalculated whenever the code that calculated them changes.
+
+	Returns
+	-------
+	str
+		The hex digest of the source files
+	"""
+	directory = os.path.dirname(os.path.abspath(__file__))
+	h = hashlib.sha256()
+	for name in sorted(os.listdir(directory)):
+		if name.endswith('.py'):
+			h.update(name.encode())
+			with open(os.path.join(directory, name), 'rb') as f:
+				h.update(f.read())
+	return h.hexdigest()
+
+
+def _digest(*parts):
+	h = hashlib.sha256()
+	for part in parts:
+		h.update(part)
+	return h.hexdigest()
@@ -0,0 +1,114 @@
+from collections import deque
+import numpy as np
+
+from util import calcPCA, alignSigns
+
+
+
+#rollingCovariance is a utility class.
+#
+#A rollingCovariance object keeps the covariance matrix of the last 'window' observations of a time series
+#(e.g. daily log-returns of yields or forward rates, with one column per variable).
+#
+#Each new observation is added, and the oldest one dropped, with a rank-one update of a running mean and
+#sum of centered outer products (Welford's method), so the cost of an update does not depend on the window length.
+#Each update adds a little rounding error, so every 'recomputeEvery' updates (by default, once per window)
+#the mean and outer products are recalculated from the observations in the window. This keeps the error bounded however
+#long the series is, and the average cost of an update still does not depend on the window length.
+#
+#rollingPCA uses a rollingCovariance object to calculate the principal components of each window,
+#flipping eigenvector signs between windows so that the factor loadings are comparable over time.
+
+
+
+class rollingCovariance:
+
+	#Constructor
+	def __init__(self, window, numVars, recomputeEvery=None):
+		self.window = window
+		self.recomputeEvery = recomputeEvery or window
+		self.observations = deque()				#the observations in the current window
+		self.updates = 0						#the number of updates since the last recalculation
+		self.mean = np.zeros(numVars)
+		self.comoments = np.zeros((numVars, numVars))	#sum of outer products of deviations from the mean
+
+
+
+	#Getter methods:
+
+	def getMean(self):
+		return self.mean
+
+	def getCount(self):
+		return len(self.observations)
+
+
+
+
+	#Add an observation, dropping the oldest one if the window is full
+	def update(self, x):
+		x = np.array(x, dtype=float)
+		self.observations.append(x)
+		n = len(self.observations)
+		delta = x - self.mean
+		self.mean += delta/n
+		self.comoments += np.outer(delta, x - self.mean)
+
+		if n > self.window:
+			old = self.observations.popleft()
+			delta = old - self.mean
+			self.mean -= delta/(n - 1)
+			self.comoments -= np.outer(delta, old - self.mean)
+
+		self.updates += 1
+		if self.updates >= self.recomputeEvery:
+			self.recompute()
+
+
+	#Recalculate the mean and outer products from the observations in the window (discarding the accumulated rounding error)
+	def recompute(self):
+		data = np.array(self.observations)
+		self.mean = data.mean(axis=0)
+		deviations = data - self.mean
+		self.comoments = deviations.T @ deviations
+		self.updates = 0
+
+
+	#Return the (sample) covariance matrix of the current window, as np.cov(..., rowvar=False) would
+	def cov(self):
+		return self.comoments/(len(self.observations) - 1)
+
+
+
+def rollingPCA(data, window, recomputeEvery=None):
+	"""
+	Calculate the covariance matrix and its principal components for every full window of a time series.
+
+	Parameters
+	----------
+	data : numpy.ndarray
+		The time series, with one row per observation and one column per variable
+	window : int
+		The number of observations in each window
+	recomputeEvery : int
+		The number of updates between recalculations of the covariance matrix from the window (by default, window)
+
+	Yields
+	------
+	tuple
+		(index of the last observation in the window, covariance matrix, eigenvalues, eigenvectors),
+		with the eigenvalues in decreasing order and the eigenvectors as columns
+	"""
+	data = np.asarray(data, dtype=float)
+	rolling = rollingCovariance(window, data.shape[1], recomputeEvery)
+	prevEigVecs = None
+	for i, x in enumerate(data):
+		rolling.update(x)
+		if rolling.getCount() < window:
+			continue
+		cov = rolling.cov()
+		eigVals, eigVecs = calcPCA(cov)
+		if prevEigVecs is not None:
+			eigVecs = alignSigns(eigVecs, prevEigVecs)
+		prevEigVecs = eigVecs
+		yield i, cov, eigVals, eigVecs
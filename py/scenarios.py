@@ -0,0 +1,241 @@
+import numpy as np
+
+import cashFlows
+from conventions import ACT_365
+from forwardEngine import calcForwardCube
+from forwardCurve import START, TENORS
+
+
+
+#scenarios is a utility module for stress testing.
+#
+#A scenarioEngine object stores the boot-strapped spot curve (the point-estimates [r, T] of a spotCurve) of one day,
+#and revalues a book of bonds under many shocked versions of that curve at once.
+#A shock moves the spot rate of each point-estimate, either:
+#	-additively (r + shock), for shocks in rate units (0.0001 = 1 basis point), e.g. parallel and twist shocks, or
+#	-relatively (r*exp(shock)), for shocks to the log of the rates, e.g. shocks built from the eigenvectors of the
+#	 covariance matrix of daily log-returns (the ytmCov and forwardCov of main.py).
+#The shocks are a (scenarios x points) matrix, and the module functions build the usual ones:
+#	parallelShocks, twistShocks, and factorShocks.
+#
+#The scenarios are revalued a chunk at a time: the shocked curves are interpolated onto the book's cash-flow grid
+#(a cashFlows.cashFlowSchedule, cached per date), the book is priced under all of them with one matrix product,
+#and their 1-year forward rates are calculated with forwardEngine. Only one chunk of shocked curves and discount factors
+#is held in memory at a time. The results are (scenarios x bonds) dirty prices and (scenarios x tenors) forward rates.
+#
+#Bonds maturing after the last point-estimate of the curve are rejected (the curve would be extrapolated to price them),
+#unless extrapolate=True is given.
+
+
+
+class scenarioEngine:
+
+	#Constructor
+	def __init__(self, spotPoints, date):
+		self.spotPoints = np.asarray(spotPoints, dtype=float)	#the (points x 2) point-estimates [r, T] of the base curve
+		self.date = np.datetime64(date, 'D')
+
+
+	#Build a scenarioEngine for one day (the last one by default) of an array of spot curves (e.g. spotCurve.calcPointsArray)
+	@classmethod
+	def fromSpotArray(cls, spotArray, dates, day=-1):
+		return cls(np.asarray(spotArray)[day], np.asarray(dates, dtype='datetime64[D]')[day])
+
+
+
+	#Getter methods:
+
+	def getSpotPoints(self):
+		return self.spotPoints
+
+	def getDate(self):
+		return self.date
+
+	def getTimes(self):
+		return self.spotPoints[:, 1]
+
+
+
+
+	def shockCurves(self, shocks, relative=False):
+		"""
+		Apply shocks to the base curve.
+
+		Parameters
+		----------
+		shocks : array_like
+			The (scenarios x points) shocks to the spot rate of each point-estimate
+		relative : bool
+			Whether the shocks are to the log of the rates (r*exp(shock)) rather than to the rates (r + shock)
+
+		Returns
+		-------
+		numpy.ndarray
+			The (scenarios x points x 2) point-estimates [r, T] of the shocked curves
+		"""
+		shocks = np.atleast_2d(np.asarray(shocks, dtype=float))
+		rates = self.spotPoints[:, 0]
+		curves = np.empty(shocks.shape + (2,))
+		curves[:, :, 0] = rates*np.exp(shocks) if relative else rates + shocks
+		curves[:, :, 1] = self.spotPoints[:, 1]
+		return curves
+
+
+	def iterRevalue(self, coupons, maturities, shocks, relative=False, chunkSize=1000, frequencies=2, dayCounts=ACT_365, extrapolate=False):
+		"""
+		Revalue a book of bonds under the shocked curves, one chunk of scenarios at a time.
+
+		Parameters
+		----------
+		coupons : array_like
+			The coupon rates of the bonds in the book
+		maturities : array_like of datetime64[D]
+			The maturity dates of the bonds in the book
+		shocks : array_like
+			The (scenarios x points) shocks (see shockCurves)
+		relative : bool
+			Whether the shocks are to the log of the rates
+		chunkSize : int
+			The number of scenarios to revalue at a time
+		frequencies : array_like of int or str
+			The number of coupons per year of each bond (semi-annual by default, see cashFlows.forDate)
+		dayCounts : array_like of int or str
+			The day count convention of each bond (ACT/365 by default, see cashFlows.forDate)
+		extrapolate : bool
+			Whether to price bonds maturing after the last point-estimate (by extrapolating the curves) instead of raising ValueError
+
+		Yields
+		------
+		tuple
+			(slice of the scenarios, (scenarios x bonds) dirty prices, (scenarios x tenors) 1-year forward rates)
+		"""
+		schedule = self._schedule(coupons, maturities, frequencies, dayCounts, extrapolate)
+		shocks = np.atleast_2d(np.asarray(shocks, dtype=float))
+		for start in range(0, len(shocks), chunkSize):
+			scenarios = slice(start, start + chunkSize)
+			curves = self.shockCurves(shocks[scenarios], relative)
+			yield scenarios, schedule.priceCurves(curves), calcForwardCube(curves, [START], TENORS, chunkSize)[:, 0, :]
+
+
+	def revalue(self, coupons, maturities, shocks, relative=False, chunkSize=1000, frequencies=2, dayCounts=ACT_365, extrapolate=False):
+		"""
+		Revalue a book of bonds under the shocked curves.
+
+		Parameters
+		----------
+		coupons, maturities, shocks, relative, chunkSize, frequencies, dayCounts, extrapolate
+			As in iterRevalue
+
+		Returns
+		-------
+		dict
+			'dirtyPrice': the (scenarios x bonds) dirty prices,
+			'forward': the (scenarios x tenors) 1-year forward rates (for forwardCurve.TENORS),
+			'baseDirtyPrice' and 'baseForward': the same under the base curve
+		"""
+		shocks = np.atleast_2d(np.asarray(shocks, dtype=float))
+		dirtyPrices = np.empty((len(shocks), len(np.atleast_1d(coupons))))
+		forwards = np.empty((len(shocks), len(TENORS)))
+		for scenarios, prices, rates in self.iterRevalue(coupons, maturities, shocks, relative, chunkSize, frequencies, dayCounts, extrapolate):
+			dirtyPrices[scenarios] = prices
+			forwards[scenarios] = rates
+
+		base = self.spotPoints[None]
+		return {
+			'dirtyPrice': dirtyPrices,
+			'forward': forwards,
+			'baseDirtyPrice': self._schedule(coupons, maturities, frequencies, dayCounts, extrapolate).priceCurves(base[0]),
+			'baseForward': calcForwardCube(base, [START], TENORS)[0, 0],
+		}
+
+
+	#The cash-flow schedule of a book on the curve's date, checking that no bond matures after the last point-estimate
+	def _schedule(self, coupons, maturities, frequencies, dayCounts, extrapolate):
+		schedule = cashFlows.forDate(coupons, maturities, self.date, frequencies, dayCounts)
+		lastTime = self.getTimes().max(initial=0)
+		beyond = schedule.getTimesToMaturity() > lastTime
+		if beyond.any() and not extrapolate:
+			i = int(np.argmax(beyond))
+			raise ValueError('Bond ' + str(i) + ' matures ' + str(round(float(schedule.getTimesToMaturity()[i]), 2)) + ' years after '
+				+ str(self.date) + ', beyond the last point-estimate of the curve (' + str(round(float(lastTime), 2)) + ' years); '
+				+ 'pass extrapolate=True to extrapolate the curve')
+		return schedule
+
+
+
+def parallelShocks(sizes, times):
+	"""
+	Build parallel shocks: every point-estimate moves by the same amount.
+
+	Parameters
+	----------
+	sizes : array_like
+		The size of each scenario's shock (e.g. np.linspace(-0.02, 0.02, 401) for -200bp to +200bp)
+	times : array_like
+		The times (in years) of the point-estimates (see scenarioEngine.getTimes)
+
+	Returns
+	-------
+	numpy.ndarray
+		The (scenarios x points) shocks
+	"""
+	return np.outer(np.asarray(sizes, dtype=float), np.ones(len(times)))
+
+
+def twistShocks(sizes, times, pivot=None):
+	"""
+	Build twist shocks: the shock grows linearly with time, and is zero at the pivot.
+	A positive size steepens the curve, and the spread between the last and first point-estimates changes by the size.
+
+	Parameters
+	----------
+	sizes : array_like
+		The size of each scenario's shock
+	times : array_like
+		The times (in years) of the point-estimates
+	pivot : float
+		The time (in years) the curve twists around (by default, halfway between the first and last point-estimates)
+
+	Returns
+	-------
+	numpy.ndarray
+		The (scenarios x points) shocks
+	"""
+	times = np.asarray(times, dtype=float)
+	if pivot is None:
+		pivot = (times[0] + times[-1])/2
+	return np.outer(np.asarray(sizes, dtype=float), (times - pivot)/(times[-1] - times[0]))
+
+
+def factorShocks(eigVals, eigVecs, factorTimes, times, scores):
+	"""
+	Build shocks from principal components (e.g. util.calcPCA of the covariance matrix of daily log-returns):
+	each scenario moves along each factor by its score, in standard deviations of that factor.
+	The eigenvectors are interpolated linearly from the times they are measured at onto the point-estimates
+	(and held flat beyond them). For log-return factors, revalue with relative=True.
+
+	Parameters
+	----------
+	eigVals : array_like
+		The eigenvalues (the variance of each factor), largest first
+	eigVecs : array_like
+		The eigenvectors, one per column
+	factorTimes : array_like
+		The time (in years) of each row of the eigenvectors (e.g. the maturities of the bonds whose YTMs were used)
+	times : array_like
+		The times (in years) of the point-estimates
+	scores : array_like
+		The (scenarios x factors) moves along the first factors, in standard deviations
+		(e.g. rng.standard_normal((10000, 3)) for random scenarios; multiply by sqrt(days) for a multi-day horizon)
+
+	Returns
+	-------
+	numpy.ndarray
+		The (scenarios x points) shocks
+	"""
+	scores = np.atleast_2d(np.asarray(scores, dtype=float))
+	numFactors = scores.shape[1]
+	eigVecs = np.asarray(eigVecs, dtype=float)[:, :numFactors]
+	factorTimes = np.asarray(factorTimes, dtype=float)
+	loadings = np.array([np.interp(times, factorTimes, eigVecs[:, k]) for k in range(numFactors)])
+	return scores @ (np.sqrt(np.asarray(eigVals, dtype=float)[:numFactors, None])*loadings)
@@ -1,30 +1,50 @@
-from datetime import datetime, timedelta
-import math
 import numpy as np
 
+from businessCalendar import businessCalendar, dateIndex
+from batchYTM import cashFlowTerms
+from discountCurve import discountCurve
+from bondUniverse import bondUniverse
+import kernels
+
 
 
 #spotCurve is a utility class.
 #
 #A spotCurve object stores a list of bond objects, together with a start date.
+#A bondUniverse can be used in place of the list, in which case the bonds are read straight from its columns.
 #
 #It assumes that each bond has a list of clean price(s) corresponding to consecutive business day(s).
 #Each bond should have the same number of clean price(s), and the clean price(s) should all start from the same start date.
+#The date of each clean price can instead be given directly, otherwise the dates are the consecutive business days of a
+#businessCalendar (weekdays by default).
 #
 #A spotCurve object is used to perform the boot-strapping process and can return an array of point-estimates for spot curve(s).
 #The boot-strapping process is done using linear interpolation.
+#Each bond's coupons follow its own coupon frequency and day count convention (see conventions), but the interpolation
+#still assumes one bond per coupon period: the j-th coupon of a bond is interpolated between the point-estimates of bonds j-2 and j-1.
+#
+#The boot-strapping process can either be done one day at a time (calcPoints), or for every day at once (calcPointsArray).
+#calcPointsArray is only sequential across bonds: each bond is processed as one NumPy column operation over all the days.
+#With the numba backend (see kernels), calcPointsArray runs the same loop compiled, one day at a time.
+#
+#The spot curve on each day is also available as a discountCurve object, which caches interpolated rates and discount factors
+#and can be used to price arbitrary cash flows. calcPoints uses these to discount coupons while boot-strapping.
 
 
 
 class spotCurve:
 	
 	#Constructor
-	def __init__(self, bonds, startDate):
+	def __init__(self, bonds, startDate, dates=None, businessDays=None):
+		if dates is None:
+			dates = (businessDays or businessCalendar()).dateRange(startDate, len(bonds[0].clean_prices))
 		self.bonds = bonds
 		self.startDate = startDate
-		self.currentDate = startDate
 		self.pointsArray = []			#stores point-estimates for the spot curve(s)
-		self.weekDay = 0				#used for tracking day of week
+		self.discountCurves = []		#stores a discountCurve for each day (built on demand after calcPointsArray)
+		self.dates = dateIndex(dates)	#the date of each day of clean prices
+		self.day = 0					#used for tracking the current day of clean prices
+		self.currentDate = self.getDates()[0].astype('datetime64[us]').item() if len(self.dates) else startDate	#the date of the first day of clean prices
 		
 
 
@@ -42,6 +62,14 @@ class spotCurve:
 	def getPointsArray(self):
 		return self.pointsArray
 		
+	def getDates(self):
+		return self.dates.getDates()
+		
+	def getDiscountCurve(self, day):
+		if self.discountCurves[day] is None:
+			self.discountCurves[day] = discountCurve.fromPoints(self.getPointsArray()[day])
+		return self.discountCurves[day]
+		
 		
 		
 	#Setter methods:
@@ -54,26 +82,19 @@ class spotCurve:
 	
 
 
-	#Take in a coupon date, add 6 months to it, and return the incremented date
-	@staticmethod
-	def incrementCoupon(couponDate):
-		newYear = couponDate.year + ((couponDate.month + 6) // 12)
-		newMonth = (couponDate.month + 6) % 12
-		if newMonth == 0:
-			newMonth = 12
-		nextCouponDate = couponDate.replace(newYear, newMonth)
-		return nextCouponDate
-		
-				
-				
-				
-		
-	#Increment the value of currentDay by one business day
+	#Increment the value of currentDay to the date of the next day of clean prices
 	def incrementDate(self):
-		if (self.weekDay%5)==4:	#If it's currently a Friday, add 2 extra days to the current date
-			self.setCurrentDate(self.getCurrentDate() + timedelta(days=2))
-		self.setCurrentDate(self.getCurrentDate() + timedelta(days=1))
-		self.weekDay += 1
+		self.day += 1
+		if self.day < len(self.dates):
+			self.setCurrentDate(self.getDates()[self.day].astype('datetime64[us]').item())
+		
+		
+	#Given a date, return the point-estimates for the spot curve on that date (or None if there is no data for it)
+	def getPointsOn(self, date):
+		day = self.dates.rowOf(np.datetime64(date, 'D'))
+		if day < 0 or day >= len(self.getPointsArray()):
+			return None
+		return self.getPointsArray()[day]
 		
 
 
@@ -100,13 +121,12 @@ class spotCurve:
 		firstBond = self.getBonds()[0]
 		
 		#Calc dirty price
-		n = firstBond.daysSinceCoupon(currentDate)
-		accruedInterest = n/365*firstBond.coupon
+		accruedInterest = firstBond.accruedInterest(currentDate)
 		cleanPrice = firstBond.clean_prices[day]
 		dirtyPrice = cleanPrice + accruedInterest
 		
 		#Setup cashflows
-		couponFlow = firstBond.coupon/2
+		couponFlow = firstBond.coupon/firstBond.frequency
 		finalFlow = 100 + couponFlow
 		
 		#Calc time until cashflows
@@ -116,6 +136,8 @@ class spotCurve:
 		r = -np.log(dirtyPrice/finalFlow)/timeToMaturity	# r = -ln(P/N)/T
 		
 		self.pointsArray[-1].append([r, timeToMaturity])
+		self.discountCurves.append(discountCurve())
+		self.discountCurves[-1].addPoint(r, timeToMaturity)
 		
 		
 	#Calculate a point-estimate for a spot curve on a given day
@@ -126,13 +148,12 @@ class spotCurve:
 		nextBond = self.getBonds()[i]
 		
 		#Calc dirty price
-		n = nextBond.daysSinceCoupon(currentDate)
-		accuredInterest = n/365*nextBond.coupon
+		accuredInterest = nextBond.accruedInterest(currentDate)
 		cleanPrice = nextBond.clean_prices[day]
 		dirtyPrice = cleanPrice + accuredInterest
 		
 		#Setup cashflows
-		couponFlow = nextBond.coupon/2
+		couponFlow = nextBond.coupon/nextBond.frequency
 		finalFlow = 100 + couponFlow
 		
 		#Calc time until cashflows
@@ -142,36 +163,93 @@ class spotCurve:
 		#Initialize loop variables:
 		DCF = 0
 		timeToCoupon = initialTimeToCoupon
-		loopDate = nextBond.nextCouponDate(currentDate)
-		j=1
-			
-		#Sum up coupon cash flows (using interpolated yield values from boot-strapping)
-		while loopDate < nextBond.maturity:
-		
-			#Get nearby spot curve point-estimates (for linear interpolation)
-			rPrev = 0
-			tPrev = 0
-			if j!=1:
-				rPrev = self.getPointsArray()[-1][j-2][0]
-				tPrev = self.getPointsArray()[-1][j-2][1]
-			rNext = self.getPointsArray()[-1][j-1][0]
-			tNext = self.getPointsArray()[-1][j-1][1]	
-			
-			#Interpolate yield at time = loopDate
-			rTime = rPrev + (rNext - rPrev)/(tNext - tPrev)*(timeToCoupon-tPrev)
+		numCoupons = nextBond.couponsRemaining(currentDate) - 1	#The coupon at maturity is part of finalFlow
+		
+		curve = self.discountCurves[-1]
+		
+		#Sum up coupon cash flows (using interpolated yield values from boot-strapping).
+		#The j-th coupon is interpolated between point-estimates j-2 and j-1 (see discountCurve.zeroRate).
+		for j in range(1, numCoupons + 1):
 		
 			#Add discounted coupon cash flow
-			DCF += couponFlow*math.exp(-rTime*timeToCoupon)	
+			DCF += couponFlow*curve.discountFactor(timeToCoupon, j)
 			
-			#Increment loop variables:
-			timeToCoupon += 0.5
-			loopDate = spotCurve.incrementCoupon(loopDate)
-			j += 1
+			#Increment loop variable:
+			timeToCoupon += 1/nextBond.frequency
 
 		#Calc yield
 		r = -np.log((dirtyPrice - DCF)/finalFlow)/timeToMaturity	
 		
 		self.pointsArray[-1].append([r, timeToMaturity])
+		curve.addPoint(r, timeToMaturity)
+		
+		
+		
+		
+	#Calculate the array of point-estimates for the spot curve(s) for every day at once.
+	#The result is a (days x bonds x 2) array, identical to the pointsArray built by calcPoints.
+	def calcPointsArray(self):
+		bonds = self.getBonds()
+		if isinstance(bonds, bondUniverse):		#Read the columns directly
+			coupons = bonds.getCoupons()[:, None]
+			maturities = bonds.getMaturities()[:, None]
+			cleanPrices = bonds.getCleanPrices()
+			frequencies = bonds.getFrequencies()[:, None]
+			dayCounts = bonds.getDayCounts()[:, None]
+		else:
+			coupons = np.array([b.coupon for b in bonds])[:, None]
+			maturities = np.array([b.maturity for b in bonds], dtype='datetime64[D]')[:, None]
+			cleanPrices = np.array([b.clean_prices for b in bonds], dtype=float)
+			frequencies = np.array([b.frequency for b in bonds], dtype=np.int64)[:, None]
+			dayCounts = np.array([b.dayCount for b in bonds], dtype=np.int64)[:, None]
+		dates = self.getDates()[None, :]
+		numBonds, numDays = cleanPrices.shape
+		
+		#Calc dirty prices and time until cashflows of every bond on every day
+		accrual, timesToCoupon, timesToMaturity, numCoupons, _ = cashFlowTerms(maturities, dates, frequencies, dayCounts)
+		dirtyPrices = cleanPrices + accrual*coupons
+		numCoupons = numCoupons - 1		#The coupon at maturity is part of finalFlow
+		frequencies = frequencies[:, 0]
+		
+		#Coupon j is interpolated between point-estimates j-2 and j-1, so bond i can only have i coupons before maturity
+		#(as in calcNextPoint, which raises IndexError when the point-estimates don't exist yet)
+		missing = (numCoupons > np.arange(numBonds)[:, None]).any(axis=1)
+		if missing.any():
+			i = int(np.argmax(missing))
+			raise IndexError('Bond ' + str(i) + ' has more coupons than there are point-estimates before it '
+				+ '(the bonds should be sorted by maturity, one per coupon period)')
+		
+		#The point-estimates found so far, with a point at (r=0, T=0) in front for interpolating the first coupon
+		rPoints = np.zeros((numDays, numBonds + 1))
+		tPoints = np.zeros((numDays, numBonds + 1))
+		
+		kernel = kernels.get('bootstrap')
+		if kernel is not None:		#The same loop, compiled (see kernels)
+			kernel(coupons[:, 0].copy(), frequencies.copy(), *(np.ascontiguousarray(np.broadcast_to(x, (numBonds, numDays)))
+				for x in (dirtyPrices, timesToMaturity, timesToCoupon, numCoupons)), rPoints, tPoints)
+		else:
+			for i in range(numBonds):
+				couponFlow = coupons[i, 0]/frequencies[i]
+				finalFlow = 100 + couponFlow
+			
+				#Sum up coupon cash flows for every day at once (using interpolated yield values from boot-strapping).
+				#Coupon j is interpolated between point-estimates j-2 and j-1, exactly as in calcNextPoint.
+				DCF = np.zeros(numDays)
+				timeToCoupon = timesToCoupon[i]
+				for j in range(1, numCoupons[i].max(initial=0) + 1):
+					rPrev, rNext = rPoints[:, j-1], rPoints[:, j]
+					tPrev, tNext = tPoints[:, j-1], tPoints[:, j]
+					rTime = rPrev + (rNext - rPrev)/(tNext - tPrev)*(timeToCoupon-tPrev)
+					DCF += np.where(j <= numCoupons[i], couponFlow*np.exp(-rTime*timeToCoupon), 0)
+					timeToCoupon = timeToCoupon + 1/frequencies[i]
+			
+				#Calc yields
+				rPoints[:, i+1] = -np.log((dirtyPrices[i] - DCF)/finalFlow)/timesToMaturity[i]
+				tPoints[:, i+1] = timesToMaturity[i]
+			
+		self.pointsArray = np.stack([rPoints[:, 1:], tPoints[:, 1:]], axis=-1)
+		self.discountCurves = [None]*numDays
+		return self.pointsArray
 		
 		
 		
@@ -1,10 +1,14 @@
 import numpy as np
 
+import kernels
+
 def calcLogArray(data):
 		"""
         Take in an array of data and return a corresponding array of 
 		log-returns for that data.
 
+		The input array is not modified.
+
         Parameters
         ----------
         data : numpy.ndarray
@@ -14,9 +18,50 @@ def calcLogArray(data):
         numpy.ndarray
            array of log-returns
         """
-		log_data = data[0:-1,:]
-		for j in range(len(data) - 1):
-			for i in range(len(data[0])):
-				log_data[j][i] = np.log(data[j+1][i]/data[j][i])
-		return log_data
-		
\ No newline at end of file
+		data = np.asarray(data, dtype=float)
+		kernel = kernels.get('logReturns')
+		if kernel is not None and data.ndim <= 2 and len(data) > 1:
+			out = np.empty_like(data[1:])	#Laid out in memory like NumPy's result (e.g. F-ordered for a transposed input)
+			kernel(data.reshape(len(data), -1), out.reshape(len(out), -1))
+			return out
+		return np.log(data[1:]/data[:-1])
+
+
+def calcPCA(cov):
+		"""
+        Take in a covariance matrix and return its eigenvalues and 
+		eigenvectors, largest eigenvalue first.
+
+        Parameters
+        ----------
+        cov : numpy.ndarray
+           symmetric covariance matrix
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+           (eigenvalues, matrix with one eigenvector per column)
+        """
+		eigVals, eigVecs = np.linalg.eigh(cov)
+		eigVecs = eigVecs*np.where(eigVecs.sum(axis=0) < 0, -1.0, 1.0)
+		return eigVals[::-1], eigVecs[:, ::-1]
+
+
+def alignSigns(eigVecs, prevEigVecs):
+		"""
+        Flip the sign of each eigenvector (column) that points away from 
+		the corresponding eigenvector of a previous window, so that factor 
+		loadings are comparable over time.
+
+        Parameters
+        ----------
+        eigVecs : numpy.ndarray
+        prevEigVecs : numpy.ndarray
+
+        Returns
+        -------
+        numpy.ndarray
+           eigenvectors with aligned signs
+        """
+		signs = np.where(np.sum(eigVecs*prevEigVecs, axis=0) < 0, -1.0, 1.0)
+		return eigVecs*signs
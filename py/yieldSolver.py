@@ -0,0 +1,170 @@
+import math
+import numpy as np
+
+
+
+#yieldSolver is a utility module.
+#
+#It finds the yield r at which the discounted cash flows of a bond add up to its dirty price.
+#The cash flows are given as a function priceFunc(r) returning (DCF, deriv), where DCF is the sum of the
+#discounted cash flows and deriv is the sum of the time-weighted discounted cash flows (= -dDCF/dr).
+#
+#Two methods are available:
+#	-'newton': Newton's method from an initial guess. If it fails to converge within maxIterations
+#		(or diverges), the yield is found by bisection instead.
+#	-'bisection': bisection on a bracket of yields, which always converges for positive cash flows.
+#
+#Every solve is recorded in a solverStats object (by default the module-level STATS), which counts
+#the iterations, evaluations of priceFunc, fallbacks to bisection, and failures.
+
+
+
+TOLERANCE = 0.0000001
+MAX_ITERATIONS = 50
+BRACKET = (-1.0, 1.0)
+
+
+
+class solverStats:
+
+	#Constructor
+	def __init__(self):
+		self.reset()
+
+
+	#Set all the counters back to zero
+	def reset(self):
+		self.solves = 0
+		self.iterations = 0
+		self.evaluations = 0
+		self.fallbacks = 0
+		self.failures = 0
+		self.iterationCounts = {}	#histogram: number of iterations -> number of solves
+
+
+	#Record one solve
+	def record(self, iterations, evaluations, fallback=False, failed=False):
+		self.solves += 1
+		self.iterations += iterations
+		self.evaluations += evaluations
+		self.fallbacks += fallback
+		self.failures += failed
+		self.iterationCounts[iterations] = self.iterationCounts.get(iterations, 0) + 1
+
+
+	#Record a batch of solves (arrays with one entry per solve)
+	def recordBatch(self, iterations, evaluations, fallbacks, failures):
+		self.solves += len(iterations)
+		self.iterations += int(iterations.sum())
+		self.evaluations += int(evaluations.sum())
+		self.fallbacks += int(fallbacks.sum())
+		self.failures += int(failures.sum())
+		counts = np.bincount(iterations)
+		for n in np.flatnonzero(counts):
+			self.iterationCounts[int(n)] = self.iterationCounts.get(int(n), 0) + int(counts[n])
+
+
+	#Return the counters as a dictionary
+	def asDict(self):
+		return {
+			'solves': self.solves,
+			'iterations': self.iterations,
+			'evaluations': self.evaluations,
+			'fallbacks': self.fallbacks,
+			'failures': self.failures,
+			'iterationCounts': dict(sorted(self.iterationCounts.items())),
+		}
+
+
+STATS = solverStats()
+
+
+
+def solve(priceFunc, dirtyPrice, initialGuess=0, method='newton', tolerance=TOLERANCE, maxIterations=MAX_ITERATIONS, stats=None):
+	"""
+	Find the yield at which the discounted cash flows of a bond equal its dirty price.
+
+	Parameters
+	----------
+	priceFunc : function
+		Takes a yield r and returns (DCF, deriv)
+	dirtyPrice : float
+		The dirty price of the bond
+	initialGuess : float
+		The initial guess for the yield (used by 'newton')
+	method : str
+		'newton' or 'bisection'
+	tolerance : float
+		The largest accepted difference between the DCF and the dirty price
+	maxIterations : int
+		The largest number of iterations of each method
+	stats : solverStats
+		Where to record the solve (by default, STATS)
+
+	Returns
+	-------
+	float
+		The yield, or NaN if no yield could be found
+	"""
+	if method not in METHODS:
+		raise ValueError('Unknown solver method: ' + str(method))
+	stats = stats if stats is not None else STATS
+	r, iterations, evaluations, fallback = METHODS[method](priceFunc, dirtyPrice, initialGuess, tolerance, maxIterations)
+	stats.record(iterations, evaluations, fallback, math.isnan(r))
+	return r
+
+
+#Newton's method, falling back to bisection if it does not converge
+def _newton(priceFunc, dirtyPrice, r, tolerance, maxIterations):
+	i = -1
+	for i in range(maxIterations):
+		DCF, deriv = _evaluate(priceFunc, r)
+		if not math.isfinite(DCF) or deriv == 0:
+			break
+		if abs(DCF - dirtyPrice) <= tolerance:
+			return r, i, i + 1, False
+		r = r - (dirtyPrice - DCF)/deriv
+
+	r, iterations, evaluations, _ = _bisection(priceFunc, dirtyPrice, r, tolerance, maxIterations)
+	return r, i + 1 + iterations, i + 1 + evaluations, True
+
+
+#Bisection on BRACKET (widened if the yield lies outside it)
+def _bisection(priceFunc, dirtyPrice, initialGuess, tolerance, maxIterations):
+	lo, hi = BRACKET
+	evaluations = 2
+	#The DCF decreases as the yield increases, so the yield is bracketed when DCF(lo) >= dirtyPrice >= DCF(hi)
+	while _evaluate(priceFunc, lo)[0] < dirtyPrice and lo > -64:
+		lo *= 2
+		evaluations += 1
+	while _evaluate(priceFunc, hi)[0] > dirtyPrice and hi < 64:
+		hi *= 2
+		evaluations += 1
+
+	for i in range(maxIterations):
+		r = (lo + hi)/2
+		DCF, _ = _evaluate(priceFunc, r)
+		evaluations += 1
+		if abs(DCF - dirtyPrice) <= tolerance:
+			return r, i + 1, evaluations, False
+		if DCF > dirtyPrice:
+			lo = r
+		else:
+			hi = r
+	return math.nan, maxIterations, evaluations, False
+
+
+
+#Evaluate priceFunc, treating an overflow (a very negative yield) as an infinite DCF
+def _evaluate(priceFunc, r):
+	try:
+		return priceFunc(r)
+	except OverflowError:
+		return math.inf, math.inf
+
+
+
+METHODS = {
+	'newton': _newton,
+	'bisection': _bisection,
+}
@@ -0,0 +1,47 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+#The modules in py/ import each other by name (as when main.py is run from the repository root)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'py'))
+
+from batchYTM import cashFlowMatrix
+from bondUniverse import bondUniverse
+from businessCalendar import businessCalendar
+import loader
+
+
+
+BONDS_CSV = os.path.join(ROOT, 'data', 'bonds.csv')
+
+
+
+#The 11 bonds of data/bonds.csv and the date of each of their 10 days of clean prices
+@pytest.fixture(scope='session')
+def bondData():
+	return loader.load(BONDS_CSV)
+
+
+#A universe of bonds with mixed coupon frequencies and day counts, priced at known yields:
+#(bondUniverse, date of each day, bonds x days yields)
+@pytest.fixture(scope='session')
+def mixedBonds():
+	rng = np.random.default_rng(0)
+	numBonds, numDays = 60, 15
+	dates = businessCalendar().dateRange(np.datetime64('2022-01-10'), numDays)
+	coupons = rng.choice([0.25, 1.0, 2.75, 5.5], numBonds)
+	maturities = dates[-1] + rng.integers(30, 30*365, numBonds).astype('timedelta64[D]')
+	frequencies = rng.choice([1, 2, 4], numBonds)
+	dayCounts = rng.choice([0, 1, 2], numBonds)
+	yields = rng.uniform(0.005, 0.05, (numBonds, numDays))
+
+	terms = np.broadcast_arrays(coupons[:, None], maturities[:, None], dates[None, :], frequencies[:, None], dayCounts[:, None])
+	flows, times, accrued = cashFlowMatrix(*(x.ravel() for x in terms))
+	dirty = (flows*np.exp(-yields.reshape(-1, 1)*times)).sum(axis=1)
+	cleanPrices = (dirty - accrued).reshape(numBonds, numDays)
+
+	universe = bondUniverse(coupons, np.full(numBonds, np.datetime64('2010-01-01')), maturities, cleanPrices,
+		frequencies=frequencies, dayCounts=dayCounts)
+	return universe, dates, yields
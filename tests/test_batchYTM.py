@@ -0,0 +1,64 @@
+import numpy as np
+
+from batchYTM import calcYTMBatch, cashFlowMatrix, RISK_MEASURES
+
+
+
+def scalarYTMs(bonds, dates):
+	days = dates.astype('datetime64[us]').tolist()
+	return np.array([[b.calcYTM(day, price) for day, price in zip(days, b.clean_prices)] for b in bonds])
+
+
+def batchYTMs(bonds, dates, **kwargs):
+	coupons = np.array([b.coupon for b in bonds])
+	maturities = np.array([b.maturity for b in bonds], dtype='datetime64[D]')
+	frequencies = np.array([b.frequency for b in bonds])
+	dayCounts = np.array([b.dayCount for b in bonds])
+	return calcYTMBatch(coupons[:, None], maturities[:, None], dates[None, :], [b.clean_prices for b in bonds],
+		frequencies=frequencies[:, None], dayCounts=dayCounts[:, None], **kwargs)
+
+
+def test_matchesScalarYTMs(bondData):
+	bonds, days = bondData
+	np.testing.assert_allclose(batchYTMs(bonds, days), scalarYTMs(bonds, days), rtol=0, atol=2e-9)
+
+
+def test_matchesScalarYTMsWithMixedConventions(mixedBonds):
+	universe, dates, yields = mixedBonds
+	ytms = batchYTMs(universe, dates)
+	np.testing.assert_allclose(ytms, scalarYTMs(universe, dates), rtol=0, atol=2e-9)
+	np.testing.assert_allclose(ytms, yields, rtol=0, atol=1e-8)
+	np.testing.assert_array_equal(universe.calcYTMs(dates), ytms)
+
+
+def test_broadcastsAndChunks(bondData):
+	bonds, days = bondData
+	whole = batchYTMs(bonds, days)
+	chunked = batchYTMs(bonds, days, chunkSize=7)
+	assert whole.shape == (len(bonds), len(days))
+	np.testing.assert_allclose(chunked, whole, rtol=0, atol=1e-15)		#the chunks are padded to their own widths
+
+
+#Every risk measure against central finite differences of the DCF at the converged yields
+def test_riskMeasuresMatchFiniteDifferences(bondData):
+	bonds, days = bondData
+	risk = bonds.calcRisk(days)
+	assert tuple(risk) == RISK_MEASURES
+	np.testing.assert_array_equal(risk['ytm'], bonds.calcYTMs(days))
+	chunked = calcYTMBatch(bonds.getCoupons()[:, None], bonds.getMaturities()[:, None], days[None, :], bonds.getCleanPrices(), chunkSize=7, risk=True)
+	for name in RISK_MEASURES:
+		np.testing.assert_allclose(chunked[name], risk[name], rtol=1e-14, atol=0)
+
+	terms = np.broadcast_arrays(bonds.getCoupons()[:, None], bonds.getMaturities()[:, None], days[None, :])
+	flows, times, accruedInterest = cashFlowMatrix(*(x.ravel() for x in terms))
+	price = lambda r: (flows*np.exp(-r.reshape(-1, 1)*times)).sum(axis=1).reshape(risk['ytm'].shape)
+	r, h = risk['ytm'], 0.00005
+	P, up, down = price(r), price(r + h), price(r - h)
+
+	np.testing.assert_array_equal(risk['accruedInterest'], accruedInterest.reshape(r.shape))
+	np.testing.assert_array_equal(risk['dirtyPrice'], bonds.getCleanPrices() + risk['accruedInterest'])
+	np.testing.assert_allclose(P, risk['dirtyPrice'], rtol=1e-9)
+	np.testing.assert_allclose((down - up)/(2*h)/P, risk['macaulayDuration'], rtol=1e-7)
+	np.testing.assert_array_equal(risk['modifiedDuration'], risk['macaulayDuration'])		#continuously compounded
+	np.testing.assert_allclose((up - 2*P + down)/h**2/P, risk['convexity'], rtol=1e-4)
+	np.testing.assert_allclose(down - up, risk['dv01'], rtol=1e-6)
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+import numpy as np
+
+from bond import bond
+
+
+
+#The coupon dates of a bond found by walking back from its maturity date one coupon at a time (as before the schedule was cached):
+#the most recent coupon date on or before the date, the coupon date after it (if any), and the number of coupon dates after it
+def walkedCoupons(b, date):
+	couponDates = [b.maturity]
+	while couponDates[-1] > date:
+		couponDates.append(bond.decrementCoupon(couponDates[-1]))
+	nextCoupon = couponDates[-2] if len(couponDates) > 1 else None
+	return couponDates[-1], nextCoupon, len(couponDates) - 1
+
+
+
+#The price days, and dates around each bond's issue date, maturity date, and last coupon date before maturity
+def sampleDates(b, days):
+	dates = [datetime.combine(d.astype(object), datetime.min.time()) for d in days]
+	for anchor in (b.issue_date, b.maturity, bond.decrementCoupon(b.maturity)):
+		dates += [anchor + timedelta(days=offset) for offset in (-400, -1, 0, 1, 400)]
+	return dates
+
+
+
+def test_matchesWalkedSchedule(bondData):
+	bonds, days = bondData
+	for b in bonds:
+		for date in sampleDates(b, days):
+			lastCoupon, nextCoupon, count = walkedCoupons(b, date)
+			assert b.lastCouponDate(date) == lastCoupon
+			assert b.couponsRemaining(date) == count
+			if nextCoupon is not None:
+				assert b.nextCouponDate(date) == nextCoupon
+
+
+
+#A date before the start of the cached schedule extends it back, keeping it sorted and ending at maturity
+def test_extendsSchedule(bondData):
+	first = bondData[0][0]
+	b = bond(first.issue_date, first.maturity, first.coupon, first.clean_prices)
+	schedule = b.couponSchedule.copy()
+	early = b.issue_date - timedelta(days=1000)
+	lastCoupon, _, count = walkedCoupons(b, early)
+	assert b.lastCouponDate(early) == lastCoupon
+	assert b.couponsRemaining(early) == count
+	assert len(b.couponSchedule) > len(schedule)
+	assert np.all(np.diff(b.couponSchedule) > 0)
+	assert np.array_equal(b.couponSchedule[-len(schedule):], schedule)
@@ -0,0 +1,46 @@
+from datetime import datetime
+import numpy as np
+
+from businessCalendar import businessCalendar, dateIndex, canadaHolidays
+from spotCurve import spotCurve
+
+
+
+def test_canadaHolidays():
+	expected = np.array(['2022-01-03', '2022-02-21', '2022-04-15', '2022-05-23', '2022-07-01', '2022-08-01',
+		'2022-09-05', '2022-09-30', '2022-10-10', '2022-11-11', '2022-12-26', '2022-12-27'], dtype='datetime64[D]')
+	np.testing.assert_array_equal(canadaHolidays(2022, 2022), expected)		#New Year's Day, Christmas, and Boxing Day roll to weekdays
+
+
+def test_dateRangeSkipsWeekendsAndHolidays():
+	calendar = businessCalendar.canada(2022, 2022)
+	np.testing.assert_array_equal(calendar.dateRange(np.datetime64('2022-04-14'), 4),
+		np.array(['2022-04-14', '2022-04-18', '2022-04-19', '2022-04-20'], dtype='datetime64[D]'))
+	np.testing.assert_array_equal(calendar.dateRange(datetime(2022, 1, 1), 2),			#a Saturday rolls forward past the holiday
+		np.array(['2022-01-04', '2022-01-05'], dtype='datetime64[D]'))
+	assert calendar.count(np.datetime64('2022-04-14'), np.datetime64('2022-04-21')) == 4
+
+
+def test_dateIndexRows():
+	dates = np.array(['2022-01-10', '2022-01-12', '2022-01-11', '2022-01-17'], dtype='datetime64[D]')
+	index = dateIndex(dates)
+	np.testing.assert_array_equal(index.rowOf(dates), np.arange(4))
+	missing = np.array(['2022-01-09', '2022-01-13', '2022-01-18', '2021-01-10'], dtype='datetime64[D]')
+	np.testing.assert_array_equal(index.rowOf(missing), np.full(4, -1))
+	assert index.rowOf(np.datetime64('2022-01-17')) == 3
+	np.testing.assert_array_equal(dateIndex([]).rowOf(dates), np.full(4, -1))
+
+
+#The current date of a spotCurve starts on its first day of clean prices, and steps through the day of each column
+def test_spotCurveDates(bondData):
+	bonds, days = bondData
+	saturday = datetime(2022, 1, 8)
+	spt = spotCurve(bonds, saturday)
+	assert spt.getCurrentDate() == datetime(2022, 1, 10)
+	np.testing.assert_array_equal(spt.getDates(), days)
+
+	given = spotCurve(bonds, saturday, dates=days[::-1])
+	assert given.getCurrentDate() == datetime(2022, 1, 21)
+	given.incrementDate()
+	assert given.getCurrentDate() == datetime(2022, 1, 20)
+	assert given.getPointsOn(datetime(2022, 1, 15)) is None
@@ -0,0 +1,71 @@
+from collections import OrderedDict
+import numpy as np
+
+import cashFlows
+from cashFlows import cashFlowSchedule
+from batchYTM import cashFlowMatrix
+from spotCurve import spotCurve
+
+
+
+def schedules(bonds, days):
+	return [cashFlowSchedule(bonds.getCoupons(), bonds.getMaturities(), day) for day in days]
+
+
+def test_calcSpotPointsMatchesBootstrap(bondData):
+	bonds, days = bondData
+	spotArray = spotCurve(bonds, days[0].astype('datetime64[us]').item(), dates=days).calcPointsArray()
+	points = np.array([schedule.calcSpotPoints(bonds.getCleanPrices()[:, j]) for j, schedule in enumerate(schedules(bonds, days))])
+	np.testing.assert_array_equal(points, spotArray)
+
+
+def test_calcSpotPointsOfSeveralPriceSets(bondData):
+	bonds, days = bondData
+	schedule = schedules(bonds, days[:1])[0]
+	prices = bonds.getCleanPrices()[:, 0]
+	sets = schedule.calcSpotPoints(np.stack([prices, prices + 0.1], axis=1))
+	assert sets.shape == (2, len(bonds), 2)
+	np.testing.assert_array_equal(sets[0], schedule.calcSpotPoints(prices))
+	assert (sets[1, :, 0] < sets[0, :, 0]).all()		#higher prices, lower spot rates
+
+
+#The sparse schedule holds the same cash flows as the padded cash-flow matrix
+def test_priceMatchesCashFlowMatrix(bondData):
+	bonds, days = bondData
+	for day in days[[0, -1]]:
+		schedule = cashFlowSchedule(bonds.getCoupons(), bonds.getMaturities(), day)
+		flows, times, accruedInterest = cashFlowMatrix(bonds.getCoupons(), bonds.getMaturities(), day)
+		np.testing.assert_array_equal(schedule.getAccruedInterest(), accruedInterest)
+		assert (np.diff(schedule.getTimes()) > 0).all()
+		rates = np.array([0.01, 0.03])
+		dense = np.stack([(flows*np.exp(-r*times)).sum(axis=1) for r in rates], axis=1)
+		np.testing.assert_allclose(schedule.price(np.exp(-np.outer(schedule.getTimes(), rates))), dense, rtol=1e-14)
+		np.testing.assert_allclose(schedule.price(np.exp(-0.01*schedule.getTimes())), dense[:, 0], rtol=1e-14)
+
+
+def test_calcYTMsMatchesBatchSolver(bondData):
+	bonds, days = bondData
+	expected = bonds.calcYTMs(days)
+	for j, day in enumerate(days):
+		schedule = cashFlowSchedule(bonds.getCoupons(), bonds.getMaturities(), day)
+		np.testing.assert_allclose(schedule.calcYTMs(bonds.getCleanPrices()[:, j]), expected[:, j], rtol=0, atol=1e-15)
+
+
+def test_calcYTMsWithMixedConventions(mixedBonds):
+	universe, dates, yields = mixedBonds
+	for j, date in enumerate(dates):
+		schedule = cashFlowSchedule(universe.getCoupons(), universe.getMaturities(), date,
+			universe.getFrequencies(), universe.getDayCounts())
+		np.testing.assert_allclose(schedule.calcYTMs(universe.getCleanPrices()[:, j]), yields[:, j], rtol=0, atol=1e-8)
+
+
+def test_forDateCachesSchedules(bondData, monkeypatch):
+	bonds, days = bondData
+	monkeypatch.setattr(cashFlows, 'CACHE_SIZE', 2)
+	monkeypatch.setattr(cashFlows, '_cache', OrderedDict())
+	first = cashFlows.forDate(bonds.getCoupons(), bonds.getMaturities(), days[0])
+	assert cashFlows.forDate(list(bonds.getCoupons()), bonds.getMaturities(), days[0]) is first
+	assert cashFlows.forDate(bonds.getCoupons() + 1, bonds.getMaturities(), days[0]) is not first		#the terms are part of the key
+	cashFlows.forDate(bonds.getCoupons(), bonds.getMaturities(), days[1])
+	cashFlows.forDate(bonds.getCoupons(), bonds.getMaturities(), days[2])
+	assert cashFlows.forDate(bonds.getCoupons(), bonds.getMaturities(), days[0]) is not first			#evicted
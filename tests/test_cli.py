@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+import numpy as np
+import pytest
+
+import cli
+from spotCurve import spotCurve
+from util import calcLogArray, calcPCA
+from conftest import BONDS_CSV
+
+
+
+#Run a subcommand, returning what it wrote to stdout
+def run(capsys, *argv):
+	assert cli.main(list(argv)) == 0
+	return capsys.readouterr().out
+
+
+def readCSV(text):
+	header, *rows = csv.reader(io.StringIO(text))
+	return header, rows
+
+
+def test_ytm(bondData, capsys):
+	bonds, days = bondData
+	header, rows = readCSV(run(capsys, 'ytm', BONDS_CSV))
+	assert header == ['date'] + list(bonds.getISINs())
+	assert [row[0] for row in rows] == list(days.astype(str))
+	np.testing.assert_array_equal(np.array([row[1:] for row in rows], dtype=float), bonds.calcYTMs(days).T)
+
+	records = json.loads(run(capsys, 'ytm', BONDS_CSV, '--format', 'json'))
+	assert len(records) == len(days) and records[0]['date'] == '2022-01-10'
+	assert records[0][bonds.getISINs()[0]] == float(rows[0][1])
+
+
+def test_spotAndForward(bondData, capsys, tmp_path):
+	bonds, days = bondData
+	points = spotCurve(bonds, days[0].astype('datetime64[us]').item(), dates=days).calcPointsArray()
+	header, rows = readCSV(run(capsys, 'spot', BONDS_CSV))
+	assert header == ['date', 'isin', 'r', 'T']
+	assert len(rows) == len(days)*len(bonds)
+	assert rows[len(bonds)][:2] == ['2022-01-11', bonds.getISINs()[0]]
+	np.testing.assert_array_equal(np.array([row[2:] for row in rows], dtype=float), points.reshape(-1, 2))
+
+	header, rows = readCSV(run(capsys, 'forward', BONDS_CSV))
+	assert header == ['date', '1y2y', '1y3y', '1y4y', '1y5y']
+	assert len(rows) == len(days)
+
+	output = str(tmp_path / 'spot.npy')
+	assert run(capsys, 'spot', BONDS_CSV, '--format', 'npy', '--output', output) == ''
+	np.testing.assert_array_equal(np.load(output), points)
+
+
+def test_pca(bondData, capsys):
+	bonds, days = bondData
+	header, rows = readCSV(run(capsys, 'pca', BONDS_CSV, '--bonds', '1', '3', '5'))
+	assert header == ['eigenvalue', 'v1', 'v2', 'v3']
+	eigVals, eigVecs = calcPCA(np.cov(calcLogArray(bonds.calcYTMs(days).T[:, [1, 3, 5]]), rowvar=False))
+	np.testing.assert_allclose(np.array(rows, dtype=float), np.column_stack([eigVals, eigVecs.T]), rtol=1e-12)
+
+	header, rows = readCSV(run(capsys, 'pca', BONDS_CSV, '--of', 'forward'))
+	assert len(header) == 5 and len(rows) == 4
+	with pytest.raises(SystemExit, match='--output'):
+		cli.main(['pca', BONDS_CSV, '--format', 'npy'])
+
+
+def test_plot(capsys, tmp_path):
+	paths = run(capsys, 'plot', BONDS_CSV, '--directory', str(tmp_path), '--file-format', 'svg').split()
+	assert paths == [str(tmp_path / (name + '.svg')) for name in ('ytm', 'spot', 'forward')]
+	assert all((tmp_path / (name + '.svg')).stat().st_size > 0 for name in ('ytm', 'spot', 'forward'))
+
+
+#A converted directory gives the same results as the bond file
+def test_convert(capsys, tmp_path):
+	directory = str(tmp_path / 'mapped')
+	assert run(capsys, 'convert', BONDS_CSV, directory) == ''
+	assert run(capsys, 'ytm', directory) == run(capsys, 'ytm', BONDS_CSV)
+	assert run(capsys, 'forward', directory, '--format', 'json') == run(capsys, 'forward', BONDS_CSV, '--format', 'json')
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from conventions import ACT_365, ACT_ACT, THIRTY_360, dayCountCodes, days360, frequencyCounts, yearFractions
+
+
+
+def dates(*values):
+	return np.array(values, dtype='datetime64[D]')
+
+
+@pytest.mark.parametrize('start, end, days', [
+	('2022-01-31', '2022-03-01', 31),		#a start on the 31st counts as the 30th
+	('2022-02-28', '2022-08-31', 183),		#an end on the 31st is kept when the start isn't on the 30th or 31st
+	('2022-01-30', '2022-07-31', 180),		#but counts as the 30th when it is
+	('2022-03-31', '2022-09-30', 180),
+	('2022-01-15', '2023-01-15', 360),
+])
+def test_thirty360(start, end, days):
+	assert days360(dates(start), dates(end))[0] == days
+	assert yearFractions(dates(start), dates(end), THIRTY_360, dates(start), dates(end), 2)[0] == days/360
+
+
+def test_actAct():
+	#92 days of a 184-day semi-annual coupon period is a quarter of a year
+	fraction = yearFractions(dates('2022-03-01'), dates('2022-06-01'), ACT_ACT, dates('2022-03-01'), dates('2022-09-01'), 2)
+	assert fraction[0] == 0.25
+	#59 days of a 365-day annual coupon period
+	fraction = yearFractions(dates('2023-01-01'), dates('2023-03-01'), ACT_ACT, dates('2023-01-01'), dates('2024-01-01'), 1)
+	assert fraction[0] == 59/365
+
+
+def test_mixedConventions():
+	start, end = dates('2022-01-31', '2022-01-31', '2022-01-31'), dates('2022-07-31', '2022-07-31', '2022-07-31')
+	fractions = yearFractions(start, end, [ACT_365, ACT_ACT, THIRTY_360], dates('2022-01-31'), dates('2022-07-31'), 2)
+	np.testing.assert_array_equal(fractions, [181/365, 0.5, 180/360])
+
+
+def test_namesAndCodes():
+	np.testing.assert_array_equal(dayCountCodes(['ACT/365', ' act/act', '30/360']), [ACT_365, ACT_ACT, THIRTY_360])
+	np.testing.assert_array_equal(frequencyCounts(['annual', 'Semi-Annual', 'quarterly', '12']), [1, 2, 4, 12])
+	with pytest.raises(ValueError):
+		dayCountCodes(['ACT/360'])
+	with pytest.raises(ValueError):
+		frequencyCounts([5])
+	with pytest.raises(ValueError):
+		frequencyCounts([2.5])
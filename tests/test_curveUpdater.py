@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from curveUpdater import curveUpdater
+from spotCurve import spotCurve
+from forwardCurve import forwardCurve
+
+
+
+#The YTMs, spot curves, and forward curves of every day, calculated for the whole history at once
+def wholeHistory(bonds, days):
+	spt = spotCurve(bonds, days[0].astype('datetime64[us]').item(), dates=days)
+	points = spt.calcPointsArray()
+	frwd = forwardCurve(spt.getPointsArray())
+	frwd.calcRates()
+	return bonds.calcYTMs(days).T, points, np.array(frwd.getForwardArray())
+
+
+def test_matchesWholeHistory(bondData):
+	bonds, days = bondData
+	YTMs, points, forwards = wholeHistory(bonds, days)
+	updater = curveUpdater.fromUniverse(bonds)
+	for day, date in enumerate(days):
+		if day % 3 == 1:		#an intraday update that a later one on the same date replaces
+			updater.update(date, bonds.getCleanPrices()[:, day] + 0.5)
+		updater.update(date, bonds.getCleanPrices()[:, day])
+
+	np.testing.assert_array_equal(updater.getDates(), days)
+	np.testing.assert_allclose(np.array(updater.getYTMArray()), YTMs, rtol=0, atol=2e-9)		#each day is solved from the day before, to within the solver's TOLERANCE
+	np.testing.assert_array_equal(np.array(updater.getPointsArray()), points)
+	np.testing.assert_array_equal(np.array(updater.getForwardArray()), forwards)
+
+
+def test_rejectsEarlierDates(bondData):
+	bonds, days = bondData
+	updater = curveUpdater.fromUniverse(bonds)
+	updater.update(days[1], bonds.getCleanPrices()[:, 1])
+	with pytest.raises(ValueError, match='date order'):
+		updater.update(days[0], bonds.getCleanPrices()[:, 0])
+	assert len(updater.getPointsArray()) == 1
@@ -0,0 +1,51 @@
+import math
+import numpy as np
+
+from discountCurve import discountCurve
+from spotCurve import spotCurve
+
+
+
+POINTS = [[0.01, 0.5], [0.02, 1.0], [0.03, 2.0]]
+
+
+
+def test_interpolatesLikeTheBootstrap():
+	curve = discountCurve.fromPoints(POINTS)
+	assert curve.zeroRate(0.25) == 0.005					#between r=0 at T=0 and the first point-estimate
+	assert math.isclose(curve.zeroRate(1.5), 0.025)
+	assert math.isclose(curve.zeroRate(3.0), 0.04)			#the last segment extrapolates beyond the curve
+	assert math.isclose(curve.zeroRate(1.5, segment=2), 0.03)	#a given segment is extrapolated, as the bootstrap does
+	assert math.isclose(curve.price([1.0, 2.0], [5, 105]), 5*math.exp(-0.02) + 105*math.exp(-0.06))
+
+
+def test_cacheHits():
+	curve = discountCurve.fromPoints(POINTS)
+	first = curve.discountFactor(1.5)
+	assert list(curve.cache) == [(3, 1.5)]
+	curve.cache[(3, 1.5)] = (0.0, 0.5)				#a hit returns the cached value rather than recalculating it
+	assert curve.discountFactor(1.5) == 0.5
+	assert curve.zeroRate(1.5) == 0.0
+	assert len(curve.cache) == 1
+	assert first == math.exp(-0.025*1.5)
+
+
+def test_cacheEvictsLeastRecentlyUsed():
+	curve = discountCurve.fromPoints(POINTS, maxSize=2)
+	curve.discountFactor(0.25)
+	curve.discountFactor(0.75)
+	curve.discountFactor(0.25)						#now the most recently used
+	curve.discountFactor(1.25)
+	assert list(curve.cache) == [(1, 0.25), (3, 1.25)]
+
+
+#The discount curve of each day reprices the point-estimates it was built from
+def test_spotCurveDiscountCurves(bondData):
+	bonds, days = bondData
+	spt = spotCurve(bonds, days[0].astype('datetime64[us]').item(), dates=days)
+	points = spt.calcPointsArray()
+	for day in (0, len(days) - 1):
+		curve = spt.getDiscountCurve(day)
+		assert spt.getDiscountCurve(day) is curve
+		factors = [curve.discountFactor(t) for _, t in points[day]]
+		np.testing.assert_allclose(factors, np.exp(-points[day, :, 0]*points[day, :, 1]), rtol=1e-15)
@@ -0,0 +1,55 @@
+import numpy as np
+
+from forwardCurve import forwardCurve
+import forwardEngine
+from spotCurve import spotCurve
+
+
+
+#The 1yr-1yr to 1yr-4yr forward rates of one day, as the original forwardCurve.calcRatesIter calculated them
+#(linear interpolation between the point-estimates, with one point-estimate every six months)
+def baselineRates(points):
+	rPrev, rNext, tPrev, tNext = points[1][0], points[2][0], points[1][1], points[2][1]
+	r1 = rPrev + (rNext - rPrev)/(tNext - tPrev)*(1-tPrev)
+	rates = []
+	for i in range(1, 5):
+		rPrev, rNext, tPrev, tNext = points[2*i + 1][0], points[2*i + 2][0], points[2*i + 1][1], points[2*i + 2][1]
+		ri = rPrev + (rNext - rPrev)/(tNext - tPrev)*(i+1-tPrev)
+		rates.append((ri*(i+1) - r1)/i)
+	return rates
+
+
+def test_matchesBaseline(bondData):
+	bonds, days = bondData
+	spotArray = spotCurve(bonds, days[0].astype('datetime64[us]').item(), dates=days).calcPointsArray()
+	frwd = forwardCurve(spotArray)
+	frwd.calcRates()
+	expected = [baselineRates(points) for points in spotArray]
+	np.testing.assert_allclose(np.array(frwd.getForwardArray()), expected, rtol=1e-12, atol=0)
+
+
+def test_calcRatesIter(bondData):
+	bonds, days = bondData
+	spotArray = spotCurve(bonds, days[0].astype('datetime64[us]').item(), dates=days).calcPointsArray()
+	frwd = forwardCurve(spotArray)
+	for day in range(len(spotArray)):
+		frwd.calcRatesIter(day)
+	np.testing.assert_allclose(np.array(frwd.getForwardArray()), [baselineRates(points) for points in spotArray], rtol=1e-12, atol=0)
+
+
+#The forward cube on an arbitrary grid, against np.interp on each day (inside the curve), whatever the chunking
+def test_forwardCube(bondData, monkeypatch):
+	bonds, days = bondData
+	spotArray = spotCurve(bonds, days[0].astype('datetime64[us]').item(), dates=days).calcPointsArray()
+	starts, tenors = np.array([0.1, 0.5, 1.0, 1.7, 2.5]), np.array([0.25, 1.0, 2.0])
+	expected = np.empty((len(days), len(starts), len(tenors)))
+	for day, points in enumerate(spotArray):
+		spot = lambda t: np.interp(t, np.r_[0, points[:, 1]], np.r_[0, points[:, 0]])
+		ends = starts[:, None] + tenors
+		expected[day] = (spot(ends)*ends - spot(starts)[:, None]*starts[:, None])/tenors
+
+	np.testing.assert_allclose(forwardEngine.calcForwardCube(spotArray, starts, tenors), expected, rtol=1e-12, atol=1e-15)
+	monkeypatch.setattr(forwardEngine, 'CHUNK_POINTS', 8)		#one day and two start times at a time
+	out = np.zeros_like(expected)
+	assert forwardEngine.calcForwardCube(spotArray, starts, tenors, chunkSize=3, out=out) is out
+	np.testing.assert_allclose(out, expected, rtol=1e-12, atol=1e-15)
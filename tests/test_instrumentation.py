@@ -0,0 +1,61 @@
+import json
+import re
+import pytest
+
+import instrumentation
+import batchYTM
+import bondUniverse
+from bond import bond
+
+
+
+@pytest.fixture
+def instrumented():
+	instrumentation.enable()
+	try:
+		yield
+	finally:
+		instrumentation.disable()
+
+
+#Disabling puts back the original functions everywhere they are referenced, so nothing is left wrapped
+def test_disabledModeRestoresFunctions():
+	originals = (batchYTM.calcYTMBatch, bondUniverse.calcYTMBatch, bond.couponIndex, bond.calcYTM)
+	instrumentation.enable()
+	assert instrumentation.isEnabled()
+	assert bondUniverse.calcYTMBatch is batchYTM.calcYTMBatch is not originals[0]
+	instrumentation.disable()
+	assert not instrumentation.isEnabled()
+	assert (batchYTM.calcYTMBatch, bondUniverse.calcYTMBatch, bond.couponIndex, bond.calcYTM) == originals
+
+
+def test_countsStagesAndSolves(bondData, instrumented):
+	bonds, days = bondData
+	bonds.calcYTMs(days)
+	bonds[0].calcYTM(days[0].astype('datetime64[us]').item(), bonds[0].clean_prices[0])
+	summary = instrumentation.report()
+	assert summary['stages']['calcYTMBatch']['calls'] == 1
+	assert summary['stages']['bond.calcYTM']['calls'] == 1
+	assert summary['stages']['cashFlowMatrix']['seconds'] <= summary['stages']['calcYTMBatch']['seconds']		#nested stages are inclusive
+	assert summary['solver']['solves'] == len(bonds)*len(days) + 1
+	assert sum(summary['solver']['iterationCounts'].values()) == summary['solver']['solves']
+
+
+def test_exportFormats(bondData, instrumented, tmp_path):
+	bonds, days = bondData
+	bonds.calcYTMs(days)
+	summary = instrumentation.report()
+
+	text = instrumentation.toJSON(str(tmp_path / 'report.json'))
+	assert (tmp_path / 'report.json').read_text() == text
+	assert json.loads(text)['stages']['calcYTMBatch']['calls'] == 1
+
+	metrics = instrumentation.toPrometheus(str(tmp_path / 'metrics.txt'), prefix='test')
+	assert (tmp_path / 'metrics.txt').read_text() == metrics
+	lines = metrics.splitlines()
+	assert '# TYPE test_stage_calls_total counter' in lines
+	assert 'test_stage_calls_total{stage="calcYTMBatch"} 1' in lines
+	assert f'test_solver_iterations_bucket{{le="+Inf"}} {summary["solver"]["solves"]}' in lines
+	assert f'test_solver_iterations_count {summary["solver"]["solves"]}' in lines
+	sample = re.compile(r'^test_[a-z_]+(\{[a-z]+="[^"]*"\})? \S+$')
+	assert all(line.startswith('# ') or sample.match(line) for line in lines)
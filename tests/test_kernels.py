@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from batchYTM import calcYTMBatch
+import kernels
+from spotCurve import spotCurve
+from util import calcLogArray
+
+
+
+pytestmark = pytest.mark.skipif(not kernels.isAvailable(), reason='Numba is not installed')
+
+
+#Run the calculation with each backend, returning the (numpy, numba) results
+def bothBackends(func):
+	results = []
+	for backend in kernels.BACKENDS:
+		kernels.setBackend(backend)
+		try:
+			results.append(func())
+		finally:
+			kernels.setBackend('numpy')
+	return results
+
+
+#The compiled kernels sum in order and use the platform's exp and log, so they match the NumPy path to within a tolerance
+def test_solveYTMsMatchesNumPy(bondData):
+	bonds, days = bondData
+	expected, compiled = bothBackends(lambda: calcYTMBatch(bonds.getCoupons()[:, None], bonds.getMaturities()[:, None],
+		days[None, :], bonds.getCleanPrices(), chunkSize=7))
+	assert kernels.matches(compiled, expected)
+
+
+def test_solveYTMsMatchesNumPyWithMixedConventions(mixedBonds):
+	universe, dates, _ = mixedBonds
+	expected, compiled = bothBackends(lambda: universe.calcYTMs(dates))
+	assert kernels.matches(compiled, expected)
+
+
+def test_bootstrapMatchesNumPy(bondData):
+	bonds, days = bondData
+	expected, compiled = bothBackends(lambda: spotCurve(bonds, days[0].astype('datetime64[us]').item(), dates=days).calcPointsArray())
+	assert kernels.matches(compiled, expected)
+
+
+@pytest.mark.parametrize('layout', ['C', 'F', 'strided', '1D'])
+def test_logReturnsMatchesNumPy(layout):
+	data = np.random.default_rng(0).uniform(0.01, 0.05, (250, 40))
+	data = {'C': data, 'F': data.T, 'strided': data[:, ::3], '1D': data[:, 0]}[layout]
+	expected, compiled = bothBackends(lambda: calcLogArray(data))
+	assert kernels.matches(compiled, expected)
+	assert compiled.flags['C_CONTIGUOUS'] == expected.flags['C_CONTIGUOUS']
+
+
+def test_matches():
+	expected = np.array([1.0, np.nan, 0.0])
+	assert kernels.matches(expected*(1 + kernels.RTOL/2), expected)
+	assert not kernels.matches(expected*(1 + 10*kernels.RTOL), expected)
+	assert not kernels.matches(expected[:2], expected)
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+import loader
+
+
+
+def test_parsePriceDates():
+	labels = ['Jan. 10, 2022', 'Sept. 1, 2022', 'March 1, 2022', 'May 2, 2022', '2022-01-10', 'maturity_date', '']
+	parsed = loader.parsePriceDates(labels)
+	expected = np.array(['2022-01-10', '2022-09-01', '2022-03-01', '2022-05-02', '2022-01-10', 'NaT', 'NaT'], dtype='datetime64[D]')
+	np.testing.assert_array_equal(parsed, expected)
+
+
+def test_loadsBondsCSV(bondData):
+	bonds, days = bondData
+	assert len(bonds) == 11
+	np.testing.assert_array_equal(days[[0, -1]], np.array(['2022-01-10', '2022-01-21'], dtype='datetime64[D]'))
+	assert bonds.getCleanPrices().shape == (11, 10)
+	assert bonds.getISINs()[0] == 'CA135087ZU15'
+	assert bonds.getCleanPrices()[0, 0] == 100.9
+
+
+def test_rejectsUnparseableHeaders(tmp_path):
+	path = tmp_path / 'bonds.csv'
+	path.write_text('coupon,ISIN,issue_date,maturity_date,,"Jan. 10, 2022","Jan 32, 2022"\n'
+		'2.75,CA135087ZU15,8/1/2011,6/1/2022,,100.9,100.89\n')
+	with pytest.raises(ValueError, match='Jan 32, 2022'):
+		loader.load(str(path))
+
+
+def test_readsConventionColumns(tmp_path):
+	path = tmp_path / 'bonds.csv'
+	path.write_text('coupon,ISIN,issue_date,maturity_date,frequency,day_count,,"Jan. 10, 2022"\n'
+		'2.75,A,8/1/2011,6/1/2022,quarterly,30/360,,100.9\n'
+		'0.25,B,8/16/2020,11/1/2022,,,,99.55\n')
+	bonds, _ = loader.load(str(path))
+	np.testing.assert_array_equal(bonds.getFrequencies(), [4, 2])
+	np.testing.assert_array_equal(bonds.getDayCounts(), [2, 0])
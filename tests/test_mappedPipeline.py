@@ -0,0 +1,45 @@
+import os
+import numpy as np
+import pytest
+
+import mappedPipeline
+from spotCurve import spotCurve
+from forwardCurve import forwardCurve
+from conftest import BONDS_CSV
+
+
+
+def test_convertMatchesLoader(bondData, tmp_path):
+	bonds, days = bondData
+	mappedPipeline.convert(BONDS_CSV, str(tmp_path), chunkSize=4)
+	universe, dates = mappedPipeline.openUniverse(str(tmp_path))
+	assert not universe.getCleanPrices().flags.writeable		#a view of the read-only memory-mapped file, not a copy
+	np.testing.assert_array_equal(dates, days)
+	np.testing.assert_array_equal(universe.getCleanPrices(), bonds.getCleanPrices())
+	np.testing.assert_array_equal(universe.getMaturities(), bonds.getMaturities())
+	np.testing.assert_array_equal(universe.getISINs(), bonds.getISINs())
+	assert not os.path.exists(tmp_path / 'cleanPrices.bin')
+
+
+#Processing the days in blocks gives the same results as calculating the whole history in memory
+def test_calcMappedMatchesInMemory(bondData, tmp_path):
+	bonds, days = bondData
+	mappedPipeline.convert(BONDS_CSV, str(tmp_path))
+	ytm, spot, forward = mappedPipeline.calcMapped(str(tmp_path), blockDays=3)
+
+	spt = spotCurve(bonds, days[0].astype('datetime64[us]').item(), dates=days)
+	points = spt.calcPointsArray()
+	frwd = forwardCurve(spt.getPointsArray())
+	frwd.calcRates()
+	np.testing.assert_allclose(ytm, bonds.calcYTMs(days), rtol=0, atol=1e-15)
+	np.testing.assert_array_equal(spot, points)
+	np.testing.assert_array_equal(forward, np.array(frwd.getForwardArray()))
+	np.testing.assert_array_equal(np.load(tmp_path / 'spot.npy'), points)
+
+
+def test_rejectsEmptyFile(tmp_path):
+	path = tmp_path / 'bonds.csv'
+	path.write_text('coupon,ISIN,issue_date,maturity_date,,"Jan. 10, 2022"\n')
+	with pytest.raises(ValueError, match='No bonds'):
+		mappedPipeline.convert(str(path), str(tmp_path / 'mapped'))
+	assert os.listdir(tmp_path / 'mapped') == []
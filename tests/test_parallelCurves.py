@@ -0,0 +1,20 @@
+import numpy as np
+
+from parallelCurves import calcCurvesParallel
+from spotCurve import spotCurve
+from forwardCurve import forwardCurve
+
+
+
+def test_matchesSerialCurves(bondData):
+	bonds, days = bondData
+	spt = spotCurve(bonds, days[0].astype('datetime64[us]').item(), dates=days)
+	points = spt.calcPointsArray()
+	frwd = forwardCurve(spt.getPointsArray())
+	frwd.calcRates()
+	forwards = np.array(frwd.getForwardArray())
+
+	for chunkSize, workers in ((None, 2), (3, 2), (1, 3)):		#even shards, uneven shards, and one day per shard
+		parallelPoints, parallelForwards = calcCurvesParallel(bonds, days, chunkSize=chunkSize, workers=workers)
+		np.testing.assert_array_equal(parallelPoints, points)
+		np.testing.assert_array_equal(parallelForwards, forwards)
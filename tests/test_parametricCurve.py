@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from parametricCurve import TAU_BOUNDS, parametricCurve, zeroRates, fitDays, blockSeeds
+from spotCurve import spotCurve
+
+
+
+@pytest.fixture(scope='module')
+def serialFit(bondData):
+	bonds, days = bondData
+	curve = parametricCurve(bonds, days)
+	curve.fit(blockDays=3)
+	return curve
+
+
+@pytest.mark.parametrize('workers', [2, 3, None])
+def test_fitDoesNotDependOnWorkers(bondData, serialFit, workers):
+	bonds, days = bondData
+	curve = parametricCurve(bonds, days)
+	np.testing.assert_array_equal(curve.fit(blockDays=3, workers=workers), serialFit.getParams())
+	np.testing.assert_array_equal(curve.getErrors(), serialFit.getErrors())
+
+
+def test_fitPricesTheBonds(bondData, serialFit):
+	bonds, days = bondData
+	params = serialFit.getParams()
+	assert params.shape == (len(days), 6)
+	assert (serialFit.getErrors() < 0.1).all()		#RMS price error, per 100 notional
+	assert (params[:, 4:] >= np.log(TAU_BOUNDS[0])).all() and (params[:, 4:] <= np.log(TAU_BOUNDS[1])).all()
+
+	#The fitted zero rates are within 5bp of the boot-strapped ones at the bonds' maturities
+	spot = spotCurve(bonds, days[0].astype('datetime64[us]').item(), dates=days).calcPointsArray()
+	fitted = np.array([zeroRates(params[j:j+1], spot[j, :, 1])[0] for j in range(len(days))])
+	np.testing.assert_allclose(fitted, spot[:, :, 0], rtol=0, atol=5e-4)
+
+
+#Each day is warm-started from the day before it: fitting the days one block at a time from the same seeds gives the same parameters
+def test_warmStartsWithinBlocks(bondData, serialFit):
+	bonds, days = bondData
+	terms = (bonds.getCoupons(), bonds.getMaturities(), days, bonds.getCleanPrices())
+	seeds = blockSeeds(*terms, blockDays=3)
+	for block, start in enumerate(range(0, len(days), 3)):
+		params, _ = fitDays(terms[0], terms[1], days[start:start + 3], terms[3][:, start:start + 3], blockDays=3, seeds=seeds[block:block + 1])
+		np.testing.assert_allclose(params, serialFit.getParams()[start:start + 3], rtol=1e-12, atol=1e-12)
+
+	short = parametricCurve(bonds, days[:2])
+	assert short.fit(blockDays=50).shape == (2, 6)
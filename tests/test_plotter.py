@@ -0,0 +1,38 @@
+import os
+import numpy as np
+
+from plotter import plotter
+from spotCurve import spotCurve
+from forwardCurve import forwardCurve
+
+
+
+def curves(bondData):
+	bonds, days = bondData
+	spt = spotCurve(bonds, days[0].astype('datetime64[us]').item(), dates=days)
+	spotMatrix = spt.calcPointsArray()
+	frwd = forwardCurve(spt.getPointsArray())
+	frwd.calcRates()
+	return bonds.calcYTMs(days), bonds.timesToMaturity(days[0].astype('datetime64[us]').item()), spotMatrix, np.array(frwd.getForwardArray())
+
+
+def test_renderAllWritesFiles(bondData, tmp_path):
+	pltt = plotter(*curves(bondData))
+	for workers in (1, 2):
+		directory = tmp_path / str(workers)
+		paths = pltt.renderAll(str(directory), workers=workers)
+		assert paths == [os.path.join(str(directory), name + '.png') for name in ('ytm', 'spot', 'forward')]
+		for path in paths:
+			with open(path, 'rb') as f:
+				assert f.read(8) == b'\x89PNG\r\n\x1a\n'
+
+
+#More days than maxLegendDays are shaded along a colour map instead of getting legend entries
+def test_longHistory(bondData, tmp_path):
+	ytmMatrix, times, spotMatrix, forwardMatrix = curves(bondData)
+	pltt = plotter(np.tile(ytmMatrix, 3), times, np.tile(spotMatrix, (3, 1, 1)), np.tile(forwardMatrix, (3, 1)), maxLegendDays=10)
+	fig = pltt.buildSpotPlot(str(tmp_path / 'spot.svg'))
+	assert fig.axes[0].get_legend() is None
+	assert len(fig.axes) == 2		#the plot and its colourbar
+	assert (tmp_path / 'spot.svg').read_text().lstrip().startswith('<?xml')
+	assert plotter(*curves(bondData)).buildYTMPlot().axes[0].get_legend() is not None
@@ -0,0 +1,55 @@
+import asyncio
+import numpy as np
+
+from priceFeed import curveService
+from curveUpdater import calcDay
+
+
+
+#An async source of tick lines
+async def ticks(lines):
+	for line in lines:
+		yield line
+
+
+def test_onTickCoalescesAndRejects(bondData):
+	bonds, days = bondData
+	service = curveService.fromUniverse(bonds, days)
+	first, second = bonds.getISINs()[:2]
+	for line in [f'2022-01-24,{first},99.5', f'2022-01-24,{first},99.6\n', f'2022-01-25,{first},99.7', f'2022-01-24,{second},98',
+			'2022-01-24,XX0000000000,99', f'2022-01-20,{first},99', 'not a tick', f'2022-01-24,{first},abc']:
+		service.onTick(line)
+
+	assert service.pending == {np.datetime64('2022-01-24'): {0: 99.6, 1: 98.0}, np.datetime64('2022-01-25'): {0: 99.7}}
+	stats = service.getStats()
+	assert (stats['ticks'], stats['coalesced'], stats['rejected'], stats['recalculations']) == (8, 1, 4, 0)
+	assert service.ready.is_set()
+
+
+#Pending ticks are recalculated and published one date at a time, in date order, each day keeping the other bonds' latest prices
+def test_publishesDatesInOrder(bondData):
+	bonds, days = bondData
+	isins = bonds.getISINs()
+
+	async def serve():
+		service = curveService.fromUniverse(bonds, days)
+		updates = service.subscribe()
+		lines = [f'2022-01-25,{isins[2]},97.5', f'2022-01-24,{isins[0]},100.5', f'2022-01-24,{isins[1]},99', f'2022-01-25,{isins[0]},100.25']
+		await service.run(ticks(lines))
+		return service, [updates.get_nowait() for _ in range(updates.qsize())]
+
+	service, published = asyncio.run(serve())
+	assert [update['date'] for update in published] == [np.datetime64('2022-01-24'), np.datetime64('2022-01-25')]
+	assert [update['ticks'] for update in published] == [2, 2]
+
+	prices = bonds.getCleanPrices()[:, -1].copy()
+	terms = (bonds.getCoupons(), bonds.getMaturities())
+	YTMs = 0
+	for update, changes in zip(published, [{0: 100.5, 1: 99}, {2: 97.5, 0: 100.25}]):
+		prices[list(changes)] = list(changes.values())
+		YTMs, points, forwards = calcDay(*terms, update['date'], prices, YTMs)
+		np.testing.assert_array_equal(update['ytm'], YTMs)
+		np.testing.assert_array_equal(update['spot'], points)
+		np.testing.assert_array_equal(update['forward'], forwards)
+	assert service.getLatest() is published[-1]
+	np.testing.assert_array_equal(service.getCleanPrices(), prices)
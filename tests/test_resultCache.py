@@ -0,0 +1,55 @@
+import numpy as np
+
+from resultCache import resultCache
+
+
+
+#A calculation with one row of results per day, recording which days it was asked for
+class dailySums:
+
+	def __init__(self, prices):
+		self.prices = prices
+		self.calls = []
+
+	def __call__(self, days):
+		self.calls.append(list(days))
+		return {'sum': self.prices[:, days].sum(axis=0), 'scaled': 2*self.prices[:, days].T}
+
+
+def cached(cache, prices, dates, compute):
+	return cache.getOrCompute('sums', {'coupons': np.arange(3.0)}, [prices, dates], compute)
+
+
+def test_recomputesOnlyChangedAndNewDays(tmp_path):
+	cache = resultCache(str(tmp_path))
+	prices = np.random.default_rng(0).uniform(95, 105, (3, 5))
+	dates = np.arange(np.datetime64('2022-01-10'), np.datetime64('2022-01-15'))
+	compute = dailySums(prices)
+	first = cached(cache, prices, dates, compute)
+	assert compute.calls == [[0, 1, 2, 3, 4]]
+
+	#Unchanged inputs are loaded from the cache
+	again = cached(cache, prices, dates, compute)
+	assert len(compute.calls) == 1
+	np.testing.assert_array_equal(again['sum'], first['sum'])
+
+	#A changed day and a new day are the only ones recalculated
+	newPrices = np.hstack([prices, [[100.0], [101.0], [102.0]]])
+	newPrices[1, 2] += 0.5
+	newDates = np.append(dates, np.datetime64('2022-01-17'))
+	compute.prices = newPrices
+	updated = cached(cache, newPrices, newDates, compute)
+	assert compute.calls[-1] == [2, 5]
+	expected = dailySums(newPrices)(np.arange(6))
+	np.testing.assert_array_equal(updated['sum'], expected['sum'])
+	np.testing.assert_array_equal(updated['scaled'], expected['scaled'])
+
+
+def test_termsAreKeys(tmp_path):
+	cache = resultCache(str(tmp_path))
+	prices = np.ones((3, 2))
+	dates = np.array(['2022-01-10', '2022-01-11'], dtype='datetime64[D]')
+	compute = dailySums(prices)
+	cached(cache, prices, dates, compute)
+	cache.getOrCompute('sums', {'coupons': np.arange(3.0) + 1}, [prices, dates], compute)
+	assert compute.calls == [[0, 1], [0, 1]]
@@ -0,0 +1,44 @@
+import numpy as np
+
+from rollingCovariance import rollingCovariance, rollingPCA
+from util import calcPCA
+
+
+
+def test_matchesNpCov():
+	data = np.random.default_rng(0).normal(0.01, 0.2, (120, 5))
+	window = 20
+	rolling = rollingCovariance(window, data.shape[1])
+	for i, x in enumerate(data):
+		rolling.update(x)
+		recent = data[max(0, i - window + 1):i + 1]
+		assert rolling.getCount() == len(recent)
+		np.testing.assert_allclose(rolling.getMean(), recent.mean(axis=0), rtol=0, atol=1e-15)
+		if len(recent) > 1:
+			np.testing.assert_allclose(rolling.cov(), np.cov(recent, rowvar=False), rtol=0, atol=1e-14)
+
+
+def test_rollingPCAOfEachWindow():
+	data = np.random.default_rng(1).normal(size=(40, 4))
+	window = 10
+	results = list(rollingPCA(data, window))
+	assert [i for i, *_ in results] == list(range(window - 1, len(data)))
+	for i, cov, eigVals, eigVecs in results:
+		np.testing.assert_allclose(cov, np.cov(data[i - window + 1:i + 1], rowvar=False), rtol=0, atol=1e-14)
+		np.testing.assert_allclose(eigVals, calcPCA(cov)[0], rtol=1e-12)
+		np.testing.assert_allclose(cov @ eigVecs, eigVecs*eigVals, rtol=0, atol=1e-12)
+
+
+#After many updates of a series with a large mean, the covariance still matches np.cov of the window
+#(the rank-one updates alone drift by about 4e-12 of the variances here)
+def test_boundsDriftOverLongSeries():
+	rng = np.random.default_rng(2)
+	data = rng.normal(size=(20007, 4))*[1, 1e-3, 1e2, 1] + [1e3, 0, -5e2, 1]
+	window = 20
+	for recomputeEvery in (None, 7, 1):
+		rolling = rollingCovariance(window, data.shape[1], recomputeEvery)
+		for x in data:
+			rolling.update(x)
+		expected = np.cov(data[-window:], rowvar=False)
+		np.testing.assert_allclose(np.diag(rolling.cov()), np.diag(expected), rtol=1e-13, atol=0)
+		np.testing.assert_allclose(rolling.cov(), expected, rtol=0, atol=1e-13*np.abs(expected).max())
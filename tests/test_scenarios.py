@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from scenarios import scenarioEngine, parallelShocks, twistShocks
+from spotCurve import spotCurve
+from forwardCurve import forwardCurve
+from batchYTM import cashFlowMatrix
+
+
+
+@pytest.fixture(scope='module')
+def engine(bondData):
+	bonds, days = bondData
+	spt = spotCurve(bonds, days[0].astype('datetime64[us]').item(), dates=days)
+	spotArray = spt.calcPointsArray()
+	frwd = forwardCurve(spt.getPointsArray())
+	frwd.calcRates()
+	return scenarioEngine.fromSpotArray(spotArray, days), np.array(frwd.getForwardArray())[-1]
+
+
+#Zero shocks (to the rates or to their logs) give the base prices and forwardCurve's forwards, however the scenarios are chunked
+@pytest.mark.parametrize('relative', [False, True])
+def test_zeroShockGivesBase(bondData, engine, relative):
+	bonds, days = bondData
+	scenarios, forwards = engine
+	result = scenarios.revalue(bonds.getCoupons(), bonds.getMaturities(), np.zeros((5, len(bonds))), relative=relative, chunkSize=2)
+	np.testing.assert_array_equal(result['dirtyPrice'], np.tile(result['baseDirtyPrice'], (5, 1)))
+	np.testing.assert_array_equal(result['forward'], np.tile(result['baseForward'], (5, 1)))
+	np.testing.assert_allclose(result['baseForward'], forwards, rtol=1e-14)
+
+	#The boot-strapped curve reprices the bonds it was built from (to within a hundredth of a cent: the boot-strap interpolates
+	#each coupon on the segment of the bond before it, rather than on the segment the coupon falls in)
+	_, _, accruedInterest = cashFlowMatrix(bonds.getCoupons(), bonds.getMaturities(), days[-1])
+	np.testing.assert_allclose(result['baseDirtyPrice'], bonds.getCleanPrices()[:, -1] + accruedInterest, rtol=0, atol=1e-4)
+
+
+def test_parallelAndTwistShocks(bondData, engine):
+	bonds, _ = bondData
+	scenarios, _ = engine
+	times = scenarios.getTimes()
+	result = scenarios.revalue(bonds.getCoupons(), bonds.getMaturities(), parallelShocks([-0.0001, 0.0001], times))
+	np.testing.assert_allclose(result['forward'] - result['baseForward'], [[-0.0001]*4, [0.0001]*4], rtol=0, atol=1e-15)
+	assert (result['dirtyPrice'][0] > result['baseDirtyPrice']).all() and (result['dirtyPrice'][1] < result['baseDirtyPrice']).all()
+
+	twist = twistShocks([0.01], times)
+	np.testing.assert_allclose(twist[0, -1] - twist[0, 0], 0.01)
+	assert twist[0, 0] < 0 < twist[0, -1]
+
+
+def test_rejectsBondsBeyondTheCurve(bondData, engine):
+	bonds, _ = bondData
+	scenarios, _ = engine
+	maturities = bonds.getMaturities().copy()
+	maturities[-1] += np.timedelta64(365, 'D')
+	with pytest.raises(ValueError, match='Bond 10 matures .* beyond the last point-estimate'):
+		scenarios.revalue(bonds.getCoupons(), maturities, np.zeros((1, len(bonds))))
+	result = scenarios.revalue(bonds.getCoupons(), maturities, np.zeros((1, len(bonds))), extrapolate=True)
+	assert np.isfinite(result['dirtyPrice']).all()
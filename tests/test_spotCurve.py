@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from bondUniverse import bondUniverse
+from spotCurve import spotCurve
+
+
+
+def test_calcPointsArrayMatchesCalcPoints(bondData):
+	bonds, days = bondData
+	start = days[0].astype('datetime64[us]').item()
+	serial = spotCurve(bonds, start, dates=days)
+	serial.calcPoints()
+	array = spotCurve(bonds, start, dates=days).calcPointsArray()
+	assert array.shape == (len(days), len(bonds), 2)
+	np.testing.assert_array_equal(array, np.array(serial.getPointsArray()))
+
+
+def test_calcPointsArrayReadsBondLists(bondData):
+	bonds, days = bondData
+	start = days[0].astype('datetime64[us]').item()
+	fromUniverse = spotCurve(bonds, start, dates=days).calcPointsArray()
+	np.testing.assert_array_equal(spotCurve(list(bonds), start, dates=days).calcPointsArray(), fromUniverse)
+
+
+def test_rejectsMissingPointEstimates(bondData):
+	bonds, days = bondData
+	order = np.r_[0, len(bonds) - 1, 1:len(bonds) - 1]		#a long bond before the short ones it is boot-strapped from
+	shuffled = bondUniverse(bonds.getCoupons()[order], bonds.getIssueDates()[order], bonds.getMaturities()[order],
+		bonds.getCleanPrices()[order])
+	with pytest.raises(IndexError):
+		spotCurve(shuffled, days[0].astype('datetime64[us]').item(), dates=days).calcPointsArray()
@@ -0,0 +1,63 @@
+import math
+import numpy as np
+import pytest
+
+import yieldSolver
+from yieldSolver import solve, solverStats
+from batchYTM import calcYTMBatch
+
+
+
+#The (DCF, deriv) of a 5-year zero-coupon bond with a face value of 100
+def zeroCoupon(r):
+	DCF = 100*math.exp(-5*r)
+	return DCF, 5*DCF
+
+ZERO_YIELD = 0.03
+ZERO_PRICE = zeroCoupon(ZERO_YIELD)[0]
+
+
+
+def test_newtonConverges():
+	stats = solverStats()
+	r = solve(zeroCoupon, ZERO_PRICE, stats=stats)
+	assert abs(zeroCoupon(r)[0] - ZERO_PRICE) <= yieldSolver.TOLERANCE
+	assert stats.solves == 1 and stats.fallbacks == 0 and stats.failures == 0
+	assert stats.evaluations == stats.iterations + 1
+	assert stats.asDict()['iterationCounts'] == {stats.iterations: 1}
+
+
+def test_fallsBackToBisection():
+	stats = solverStats()
+	r = solve(zeroCoupon, ZERO_PRICE, initialGuess=-50, stats=stats)		#Newton steps of about 0.2 from a poor guess
+	assert abs(zeroCoupon(r)[0] - ZERO_PRICE) <= yieldSolver.TOLERANCE
+	assert stats.fallbacks == 1 and stats.failures == 0
+
+	r = solve(zeroCoupon, ZERO_PRICE, method='bisection', stats=stats)
+	assert abs(zeroCoupon(r)[0] - ZERO_PRICE) <= yieldSolver.TOLERANCE
+	assert stats.solves == 2 and stats.fallbacks == 1
+
+
+def test_recordsFailures():
+	stats = solverStats()
+	assert math.isnan(solve(zeroCoupon, -1, stats=stats))		#no yield gives a negative price
+	assert stats.asDict()['failures'] == 1
+	stats.reset()
+	assert stats.asDict() == {'solves': 0, 'iterations': 0, 'evaluations': 0, 'fallbacks': 0, 'failures': 0, 'iterationCounts': {}}
+	with pytest.raises(ValueError, match='secant'):
+		solve(zeroCoupon, ZERO_PRICE, method='secant')
+
+
+#Rows of the batch solver that Newton's method can't solve within the iteration cap are bisected to the same yields
+def test_batchFallback(bondData):
+	bonds, days = bondData
+	terms = (bonds.getCoupons()[:, None], bonds.getMaturities()[:, None], days[None, :], bonds.getCleanPrices())
+	stats, cappedStats = solverStats(), solverStats()
+	YTMs = calcYTMBatch(*terms, stats=stats)
+	capped = calcYTMBatch(*terms, initialGuess=-50, stats=cappedStats)
+	np.testing.assert_allclose(capped, YTMs, rtol=0, atol=2e-9)
+
+	assert stats.solves == cappedStats.solves == YTMs.size
+	assert stats.fallbacks == 0 and cappedStats.fallbacks > 0
+	assert sum(cappedStats.iterationCounts.values()) == YTMs.size
+	assert cappedStats.failures == 0